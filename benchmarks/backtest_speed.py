@@ -0,0 +1,78 @@
+"""
+    Backtest engine throughput on synthetic histories.
+
+    Builds random-walk daily bars (default 500 symbols x 10 years, with
+    staggered listing dates) and times alignment, signal generation and
+    simulation for the rule-based and recorded-decision strategies.
+
+    Usage:
+        python -m benchmarks.backtest_speed [--symbols 500] [--bars 2520]
+"""
+import argparse
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from benchmarks.common import save_results
+
+
+def make_histories(symbols: int, bars: int, seed: int = 0):
+    from src.tools.bars import PriceBars
+    rng = np.random.default_rng(seed)
+    calendar = (np.datetime64('2015-01-01') + np.arange(bars)).astype('datetime64[s]').astype(np.int64)
+    histories = {}
+    for i in range(symbols):
+        start = int(rng.integers(0, bars // 4)) if i % 5 == 0 else 0
+        n = bars - start
+        close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n)))
+        spread = close * rng.uniform(0.002, 0.02, n)
+        values = np.vstack([close, close + spread, close - spread, close, rng.uniform(1e5, 1e7, n)])
+        histories[f"S{i:04d}"] = PriceBars(values, calendar[start:])
+    return histories
+
+
+def make_decisions(histories, every: int = 5, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    decisions = {}
+    for symbol, bars in histories.items():
+        dates = bars.dates()[::every].tolist()
+        signals = rng.choice(['BUY', 'SELL', 'HOLD'], len(dates))
+        sizes = rng.integers(1, 11, len(dates)) * 10
+        decisions[symbol] = {
+            d: {'trading_signal': s, 'position_size': int(p)} for d, s, p in zip(dates, signals, sizes)
+        }
+    return decisions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=2520)
+    args = parser.parse_args(argv)
+
+    from src.backtest.engine import backtest
+
+    histories = make_histories(args.symbols, args.bars)
+    decisions = make_decisions(histories)
+    results = {'config': vars(args)}
+
+    for strategy, options in (('rules', {}), ('llm', {'decisions': decisions})):
+        start = time.perf_counter()
+        report = backtest(histories, strategy, cost_bps=5, **options)
+        elapsed = time.perf_counter() - start
+        results[strategy] = {
+            'seconds': round(elapsed, 3),
+            'symbol_bars_per_second': round(args.symbols * args.bars / elapsed),
+            'portfolio': report['portfolio']
+        }
+        print(f"{strategy:<6} {args.symbols} symbols x {args.bars} bars in {elapsed:.2f}s "
+              f"(hit rate {report['portfolio']['hit_rate']}, max drawdown {report['portfolio']['max_drawdown']})")
+
+    save_results("backtest_speed", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
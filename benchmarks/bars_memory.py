@@ -0,0 +1,106 @@
+"""
+    Per-request memory of the price history: legacy records vs PriceBars.
+
+    Legacy path: yfinance DataFrame -> to_dict('records') with string dates
+    stored in AgentState -> pd.DataFrame(records) in analyze_technical.
+    Columnar path: PriceBars.from_dataframe() stored in AgentState ->
+    to_dataframe() view in analyze_technical.
+
+    Reports bytes retained in state, peak bytes allocated while converting,
+    and pickled size (what a checkpointer would write) for 3mo and 5y of
+    daily bars. Synthetic data, no network.
+
+    Usage:
+        python -m benchmarks.bars_memory
+"""
+import pickle
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import save_results
+from src.tools.bars import PriceBars
+
+PERIODS = {'3mo': 63, '5y': 1258}
+
+
+def make_history(rows: int) -> pd.DataFrame:
+    """DataFrame shaped like yfinance Ticker.history() output."""
+    index = pd.date_range(end='2025-06-30', periods=rows, freq='B', tz='America/New_York', name='Date')
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(rows).cumsum()
+    return pd.DataFrame({
+        'Open': close + rng.standard_normal(rows),
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 50_000_000, rows),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    }, index=index)
+
+
+def legacy_to_state(data: pd.DataFrame):
+    historical_clean = data.reset_index()
+    historical_clean['Date'] = historical_clean['Date'].dt.strftime('%Y-%m-%d')
+    for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        historical_clean[col] = historical_clean[col].astype(float)
+    return historical_clean.to_dict('records')
+
+
+def measure(func: Callable[[], Any]) -> Tuple[Any, int, int]:
+    """Run func under tracemalloc, returning (result, retained bytes, peak bytes)."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current - before, peak - before
+
+
+def run_period(rows: int) -> Dict[str, Dict[str, int]]:
+    data = make_history(rows)
+
+    records, legacy_state, legacy_peak = measure(lambda: legacy_to_state(data))
+    _, _, legacy_df_peak = measure(lambda: pd.DataFrame(records))
+
+    bars, bars_state, bars_peak = measure(lambda: PriceBars.from_dataframe(data))
+    _, _, bars_df_peak = measure(lambda: bars.to_dataframe())
+
+    return {
+        'legacy_records': {
+            'state_bytes': legacy_state,
+            'peak_bytes': max(legacy_peak, legacy_df_peak),
+            'dataframe_rebuild_peak_bytes': legacy_df_peak,
+            'pickled_bytes': len(pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL)),
+        },
+        'price_bars': {
+            'state_bytes': bars_state,
+            'peak_bytes': max(bars_peak, bars_df_peak),
+            'dataframe_rebuild_peak_bytes': bars_df_peak,
+            'pickled_bytes': len(pickle.dumps(bars, protocol=pickle.HIGHEST_PROTOCOL)),
+        },
+    }
+
+
+def main() -> int:
+    results = {}
+    for period, rows in PERIODS.items():
+        results[period] = run_period(rows)
+        results[period]['rows'] = rows
+        legacy, bars = results[period]['legacy_records'], results[period]['price_bars']
+        print(f"\n{period} ({rows} bars)")
+        for metric in ('state_bytes', 'peak_bytes', 'dataframe_rebuild_peak_bytes', 'pickled_bytes'):
+            ratio = legacy[metric] / bars[metric] if bars[metric] else float('inf')
+            print(f"  {metric:<30} legacy {legacy[metric]:>10,}   bars {bars[metric]:>10,}   ({ratio:.1f}x)")
+
+    save_results("bars_memory", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+    Cache-hit latency: in-process MemoryCache vs the SQLite-backed SharedCache.
+
+    Measures single-process get() latency for payloads shaped like the tool
+    responses we cache, then hit throughput with several processes reading
+    the same SQLite file concurrently (as uvicorn --workers N would).
+
+    Usage:
+        python -m benchmarks.cache_latency [--iterations 5000] [--processes 4]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.common import save_results
+from src.tools.cache import MemoryCache, SharedCache
+from src.tools.utils import ToolResult
+
+
+def make_payloads() -> Dict[str, ToolResult]:
+    """Representative cached responses."""
+    financials = ToolResult(success=True, data={
+        'symbol': 'AAPL',
+        'metrics': {f"metric_{i}": i * 1.2345 for i in range(130)},
+        'series': {'annual': {f"series_{i}": [{'period': '2024-09-28', 'v': i}] * 10 for i in range(40)}},
+    })
+    market_data = ToolResult(success=True, data={
+        'symbol': 'AAPL',
+        'historical_data': [
+            {'Date': '2025-01-02', 'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5,
+             'Volume': 1e6, 'Dividends': 0.0, 'Stock Splits': 0.0}
+            for _ in range(63)
+        ],
+    })
+    profile = ToolResult(success=True, data={'symbol': 'AAPL', 'name': 'Apple Inc', 'industry': 'Technology'})
+    return {'financials': financials, 'market_data_3mo': market_data, 'profile': profile}
+
+
+def time_gets(cache, key: str, iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        cache.get('bench', key)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'p50_us': round(statistics.median(samples), 2),
+        'p99_us': round(samples[int(len(samples) * 0.99) - 1], 2),
+        'mean_us': round(statistics.fmean(samples), 2),
+    }
+
+
+def _reader(path: str, key: str, iterations: int, queue) -> None:
+    cache = SharedCache(path)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        assert cache.get('bench', key) is not None
+    queue.put(time.perf_counter() - start)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        memory, shared = MemoryCache(), SharedCache(path)
+
+        results = {'single_process': {}}
+        for name, payload in make_payloads().items():
+            memory.set('bench', name, payload, 3600)
+            shared.set('bench', name, payload, 3600)
+            results['single_process'][name] = {
+                'memory': summarize(time_gets(memory, name, args.iterations)),
+                'sqlite': summarize(time_gets(shared, name, args.iterations)),
+            }
+            row = results['single_process'][name]
+            print(f"{name:<18} memory p50 {row['memory']['p50_us']:>8} us   sqlite p50 {row['sqlite']['p50_us']:>8} us")
+
+        # Concurrent readers across processes
+        queue = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_reader, args=(path, 'financials', args.iterations, queue))
+            for _ in range(args.processes)
+        ]
+        wall_start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        elapsed = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        wall = time.perf_counter() - wall_start
+
+        total_gets = args.iterations * args.processes
+        results['multi_process'] = {
+            'processes': args.processes,
+            'gets': total_gets,
+            'wall_seconds': round(wall, 3),
+            'gets_per_second': round(total_gets / wall),
+            'per_process_mean_us': round(statistics.fmean(elapsed) / args.iterations * 1e6, 2),
+        }
+        print(f"{args.processes} processes: {results['multi_process']['gets_per_second']} gets/s "
+              f"({results['multi_process']['per_process_mean_us']} us per get)")
+
+    save_results("cache_latency", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+# Benchmark results live next to the scripts so they can be diffed over time
+RESULTS_DIR = Path(__file__).parent / "results"
+PROJECT_ROOT = Path(__file__).parent.parent
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def save_results(name: str, results: Dict[str, Any]) -> Path:
+    """
+        Store benchmark results as JSON.
+
+        Writes results/<name>.json with the latest run and appends the same
+        record to results/<name>.history.jsonl for regression tracking.
+    """
+    RESULTS_DIR.mkdir(exist_ok=True)
+    record = {
+        'benchmark': name,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+    path = RESULTS_DIR / f"{name}.json"
+    path.write_text(json.dumps(record, indent=2, default=str))
+    with open(RESULTS_DIR / f"{name}.history.jsonl", "a") as history:
+        history.write(json.dumps(record, default=str) + "\n")
+
+    print(f"results saved to {path}")
+    return path
@@ -0,0 +1,108 @@
+"""
+    Event-loop lag under mixed load: indicator math inline vs offloaded.
+
+    A probe coroutine sleeps 5 ms in a loop and records how late each wakeup
+    is, standing in for the I/O of other requests. Meanwhile a batch of
+    indicator calculations over long synthetic histories runs through
+    calculate_technical_indicators() with the executor forced inline,
+    forced to the process pool, and in adaptive mode.
+
+    Usage:
+        python -m benchmarks.event_loop_lag [--symbols 16] [--bars 2520]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.common import save_results
+
+PROBE_INTERVAL = 0.005
+
+
+def make_bars(n: int, seed: int):
+    from src.tools.bars import PriceBars
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(n).cumsum()
+    timestamps = (np.datetime64('2010-01-01') + np.arange(n)).astype('datetime64[s]').astype(np.int64)
+    return PriceBars(np.vstack([close, close + 1, close - 1, close, rng.random(n) * 1e6]), timestamps)
+
+
+async def probe(lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+
+async def run_mode(mode: str, histories, indicators: List[str], concurrency: int) -> Dict[str, float]:
+    from src.tools import executor
+    from src.tools.technical_indicator_tool import calculate_technical_indicators
+
+    executor.OFFLOAD_MODE = mode
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int, bars):
+        async with semaphore:
+            result = await calculate_technical_indicators(bars, f"SYM{i}", '2025-01-01', indicators, ['W'])
+            assert result.success, result.error
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i, bars) for i, bars in enumerate(histories)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    lags.sort()
+    return {
+        'wall_seconds': round(elapsed, 3),
+        'lag_p50_ms': round(statistics.median(lags), 2) if lags else None,
+        'lag_p99_ms': round(lags[int(len(lags) * 0.99) - 1], 2) if lags else None,
+        'lag_max_ms': round(lags[-1], 2) if lags else None,
+        'probe_wakeups': len(lags),
+    }
+
+
+async def main_async(args) -> Dict[str, Dict[str, float]]:
+    from src.tools import executor
+
+    histories = [make_bars(args.bars, seed) for seed in range(args.symbols)]
+    indicators = ['SMA', 'SMA(50)', 'SMA(200)', 'EMA', 'RSI', 'RSI(7)', 'MACD', 'BBANDS', 'ADX', 'CCI']
+
+    # Start pool workers before timing so spawn cost isn't measured
+    executor.OFFLOAD_MODE = 'pool'
+    await executor.offload(len, histories[0])
+
+    results = {}
+    for mode in ('inline', 'pool', 'auto'):
+        results[mode] = await run_mode(mode, histories, indicators, args.concurrency)
+        row = results[mode]
+        print(f"{mode:<7} wall {row['wall_seconds']:>7}s   lag p50 {row['lag_p50_ms']:>7} ms   "
+              f"p99 {row['lag_p99_ms']:>8} ms   max {row['lag_max_ms']:>8} ms")
+
+    executor.shutdown_process_pool()
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=16)
+    parser.add_argument("--bars", type=int, default=2520, help="daily bars per symbol (2520 = 10y)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(main_async(args))
+    results['config'] = vars(args)
+    save_results("event_loop_lag", results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+    Graph-level benchmark: run_analysis() end to end against stubbed tools.
+
+    Synthetic fixtures are recorded for a set of symbols (see
+    benchmarks.stubs), then every external call is replayed, optionally
+    with injected latency standing in for the network. Every run starts
+    cold (memory cache and news store cleared, stage cache disabled), so
+    the numbers cover the whole pipeline: data collection, peers,
+    indicators, news features and the portfolio decision.
+
+    Measured:
+        - sequential: one symbol at a time, per-run latency
+        - concurrent: all symbols at once, wall time and throughput
+
+    Usage:
+        python -m benchmarks.graph [--symbols 8] [--rounds 3] [--latency-ms 0]
+        python -m benchmarks.graph --latency-ms 20-80
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.common import save_results
+from benchmarks.stubs import DEFAULT_SYMBOLS, configure_replay_env, record_fixtures, reset_state
+
+ANALYSIS_DATE = '2025-06-30'
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'p50_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(samples[int(0.95 * (len(samples) - 1))], 2),
+        'max_ms': round(samples[-1], 2),
+        'runs': len(samples)
+    }
+
+
+async def timed_analysis(symbol: str) -> float:
+    from src.workflows.workflow import run_analysis
+    start = time.perf_counter()
+    result = await run_analysis(symbol, ANALYSIS_DATE)
+    if not result.get('success'):
+        raise RuntimeError(f"analysis failed for {symbol}: {result.get('error')}")
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_sequential(symbols: List[str], rounds: int) -> List[float]:
+    latencies = []
+    for _ in range(rounds):
+        for symbol in symbols:
+            reset_state()
+            latencies.append(await timed_analysis(symbol))
+    return latencies
+
+
+async def run_concurrent(symbols: List[str], rounds: int) -> Dict[str, float]:
+    walls, latencies = [], []
+    for _ in range(rounds):
+        reset_state()
+        start = time.perf_counter()
+        latencies += await asyncio.gather(*(timed_analysis(symbol) for symbol in symbols))
+        walls.append(time.perf_counter() - start)
+    wall = statistics.median(walls)
+    return {
+        **summarize(latencies),
+        'wall_s': round(wall, 3),
+        'analyses_per_s': round(len(symbols) / wall, 2)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument('--symbols', type=int, default=len(DEFAULT_SYMBOLS))
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--latency-ms', default='0', help="Injected latency per external call, e.g. 50 or 20-80")
+    args = parser.parse_args(argv)
+
+    symbols = DEFAULT_SYMBOLS[:args.symbols]
+    state_dir = tempfile.mkdtemp(prefix='goblin-bench-')
+    configure_replay_env(os.path.join(state_dir, 'fixtures'), state_dir)
+
+    from src.tools import replay
+    from src.workflows import metrics
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        record_fixtures(symbols, ANALYSIS_DATE)
+        replay.REPLAY_MODE = 'replay'
+        replay.REPLAY_LATENCY_MS = args.latency_ms
+
+        async def run():
+            # Warm-up so imports and first-call setup are not measured
+            reset_state()
+            await timed_analysis(symbols[0])
+            metrics.reset()
+            return await run_sequential(symbols, args.rounds), await run_concurrent(symbols, args.rounds)
+
+        sequential, concurrent = asyncio.run(run())
+
+    results = {
+        'symbols': len(symbols),
+        'rounds': args.rounds,
+        'latency_ms': args.latency_ms,
+        'sequential': summarize(sequential),
+        'concurrent': concurrent,
+        'metrics': metrics.snapshot()
+    }
+
+    print(f"{len(symbols)} symbols x {args.rounds} rounds, injected latency {args.latency_ms} ms")
+    print(f"  sequential  p50 {results['sequential']['p50_ms']:8.1f} ms   p95 {results['sequential']['p95_ms']:8.1f} ms")
+    print(f"  concurrent  p50 {concurrent['p50_ms']:8.1f} ms   p95 {concurrent['p95_ms']:8.1f} ms"
+          f"   {concurrent['analyses_per_s']:.1f} analyses/s")
+
+    save_results('graph', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+    HTTP benchmark of POST /chat at increasing concurrency.
+
+    Starts the app under uvicorn in a subprocess with every external call
+    replayed from synthetic fixtures (see benchmarks.stubs) and the
+    analysis cache disabled, so each request runs the workflow. Tool-level
+    caches behave as in production. For each concurrency level, that many
+    clients send requests back to back, cycling through the symbols.
+
+    Usage:
+        python -m benchmarks.http_chat [--concurrency 1 4 16 32] [--requests 64]
+        python -m benchmarks.http_chat --latency-ms 20-80
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.common import PROJECT_ROOT, save_results
+from benchmarks.stubs import DEFAULT_SYMBOLS, configure_replay_env, record_fixtures
+
+STARTUP_TIMEOUT = 60
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def server(port: int, latency_ms: str):
+    env = {
+        **os.environ,
+        'GOBLIN_REPLAY': 'replay',
+        'GOBLIN_REPLAY_LATENCY_MS': latency_ms,
+        'GOBLIN_WATCHLIST': '',
+    }
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def wait_ready(client, process) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if (await client.get('/metrics')).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start in time")
+
+
+async def run_level(client, concurrency: int, total: int, symbols: List[str]) -> Dict[str, float]:
+    latencies: List[float] = []
+    failures = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal failures
+        for i in counter:
+            start = time.perf_counter()
+            response = await client.post('/chat', json={'message': symbols[i % len(symbols)]})
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200 or not response.json()['reply'].startswith('=' * 70 + '\nGOBLIN'):
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'failures': failures,
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        'max_ms': round(latencies[-1], 2),
+        'requests_per_s': round(total / wall, 2)
+    }
+
+
+async def run(port: int, process, levels: List[int], total: int, symbols: List[str]) -> Dict[str, Dict[str, float]]:
+    import httpx
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=300) as client:
+        await wait_ready(client, process)
+        # First request waits for the background workflow import
+        await client.post('/chat', json={'message': symbols[0]})
+        results = {}
+        for concurrency in levels:
+            results[str(concurrency)] = stats = await run_level(client, concurrency, max(total, concurrency), symbols)
+            print(f"  concurrency {concurrency:>3}: p50 {stats['p50_ms']:8.1f} ms   p95 {stats['p95_ms']:8.1f} ms"
+                  f"   {stats['requests_per_s']:6.1f} req/s   failures {stats['failures']}")
+        return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 32])
+    parser.add_argument('--requests', type=int, default=64, help="Requests per concurrency level")
+    parser.add_argument('--symbols', type=int, default=len(DEFAULT_SYMBOLS))
+    parser.add_argument('--latency-ms', default='0', help="Injected latency per external call, e.g. 50 or 20-80")
+    args = parser.parse_args(argv)
+
+    symbols = DEFAULT_SYMBOLS[:args.symbols]
+    state_dir = tempfile.mkdtemp(prefix='goblin-bench-')
+    configure_replay_env(os.path.join(state_dir, 'fixtures'), state_dir)
+
+    # The server analyzes "today", so the fixtures have to be recorded for it
+    with contextlib.redirect_stdout(io.StringIO()):
+        record_fixtures(symbols, datetime.today().date().strftime("%Y-%m-%d"))
+
+    port = free_port()
+    print(f"POST /chat, {len(symbols)} symbols, injected latency {args.latency_ms} ms")
+    with server(port, args.latency_ms) as process:
+        levels = asyncio.run(run(port, process, args.concurrency, args.requests, symbols))
+
+    save_results('http_chat', {
+        'symbols': len(symbols),
+        'latency_ms': args.latency_ms,
+        'levels': levels
+    })
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
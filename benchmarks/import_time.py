@@ -0,0 +1,94 @@
+"""
+    Startup import-time budget.
+
+    Runs `python -X importtime` for the server entry point (`import main`)
+    and for the background warm-up, and reports where the time goes grouped
+    by top-level package.
+
+    Usage:
+        python -m benchmarks.import_time [--runs 3] [--budget-ms 800]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from benchmarks.common import PROJECT_ROOT, save_results
+
+STAGES = {
+    # What uvicorn has to import before it can serve the static UI
+    'startup': "import main",
+    # What the background warm-up loads after the server is up
+    'warm_up': "import main; from src.workflows.workflow import warm_up; warm_up()",
+}
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """Return (total ms, self ms per top-level package) from -X importtime output."""
+    per_package = defaultdict(float)
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        per_package[package] += int(self_us) / 1000
+        # Unindented entries are top-level imports of the measured statement
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative_us)
+    return total_us / 1000, dict(per_package)
+
+
+def run_stage(code: str) -> Tuple[float, Dict[str, float]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    return parse_importtime(proc.stderr)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=800.0, help="startup import budget")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    results = {'budget_ms': args.budget_ms}
+    for stage, code in STAGES.items():
+        totals = []
+        packages = defaultdict(list)
+        for _ in range(args.runs):
+            total, per_package = run_stage(code)
+            totals.append(total)
+            for name, ms in per_package.items():
+                packages[name].append(ms)
+
+        breakdown = sorted(
+            ((name, statistics.median(values)) for name, values in packages.items()),
+            key=lambda item: item[1], reverse=True
+        )
+        results[stage] = {
+            'total_ms': round(statistics.median(totals), 1),
+            'runs_ms': [round(t, 1) for t in totals],
+            'top_packages_ms': {name: round(ms, 1) for name, ms in breakdown[:args.top]}
+        }
+
+        print(f"\n{stage}: {results[stage]['total_ms']} ms (median of {args.runs})")
+        for name, ms in breakdown[:args.top]:
+            print(f"  {name:<28} {ms:8.1f} ms")
+
+    save_results("import_time", results)
+
+    over_budget = results['startup']['total_ms'] > args.budget_ms
+    if over_budget:
+        print(f"\nstartup import time exceeds budget of {args.budget_ms} ms")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
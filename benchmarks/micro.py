@@ -0,0 +1,181 @@
+"""
+    Micro-benchmarks for the per-request CPU work outside the LLM calls.
+
+    - calculate_technical_indicators() on 3mo / 1y / 5y of daily bars
+      (executor forced inline, so this is the pure calculation cost)
+    - LLM reply parsing as invoke_structured() does it: parse_json_object()
+      plus schema normalization and validation of a news feature reply,
+      and normalize_trading_decision() for the portfolio manager's reply
+    - build_analysis() / render_text(): the typed Analysis and the
+      plain-text report built from it by run_agent()
+    - serializing the Analysis for GET /analysis with orjson vs json
+
+    The report is built from a real run_analysis() result, produced
+    offline by replaying synthetic fixtures (see benchmarks.stubs).
+
+    Usage:
+        python -m benchmarks.micro [--repeat 200]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.common import save_results
+from benchmarks.stubs import configure_replay_env, record_fixtures, reset_state
+
+ANALYSIS_DATE = '2025-06-30'
+
+HISTORY_BARS = {'3mo': 63, '1y': 252, '5y': 1260}
+
+FEATURE_REPLIES = {
+    'json_block': '```json\n{"headline": "X", "sentiment": "positive", "impact": "high", '
+                  '"key_points": ["a", "b", "c"], "category": "earnings"}\n```',
+    'plain_block': 'Here you go:\n```\n{"headline": "X", "sentiment": "neutral", "key_points": []}\n```',
+    'bare_json': '{"headline": "X", "sentiment": "negative", "impact": "low", "key_points": ["a"]}',
+    'unparseable': 'I could not extract any features from this article.',
+}
+
+DECISION_REPLIES = {
+    'json_block': '```json\n{"trading_signal": "BUY", "confidence_level": 0.72, "position_size": 64}\n```',
+    'bare_json': '{"trading_signal": "HOLD", "confidence_level": 0.5, "position_size": 30}',
+    'invalid': 'BUY with high conviction',
+}
+
+
+def timed(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Median / p95 / mean wall time of func() in microseconds."""
+    func()
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        'median_us': round(statistics.median(samples), 2),
+        'p95_us': round(samples[int(0.95 * (len(samples) - 1))], 2),
+        'mean_us': round(statistics.fmean(samples), 2),
+        'runs': repeat
+    }
+
+
+def make_history(n: int):
+    import pandas as pd
+    rng = np.random.default_rng(n)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, n)))
+    index = pd.bdate_range(end=ANALYSIS_DATE, periods=n)
+    return pd.DataFrame({
+        'Open': close * 0.998, 'High': close * 1.01, 'Low': close * 0.99,
+        'Close': close, 'Volume': rng.uniform(1e6, 5e7, n)
+    }, index=index)
+
+
+def bench_indicators(repeat: int) -> Dict[str, Dict[str, float]]:
+    from src.tools import executor
+    from src.tools.technical_indicator_tool import calculate_technical_indicators
+    executor.OFFLOAD_MODE = 'inline'
+
+    results = {}
+    loop = asyncio.new_event_loop()
+    try:
+        for label, bars in HISTORY_BARS.items():
+            history = make_history(bars)
+            results[label] = timed(
+                lambda: loop.run_until_complete(calculate_technical_indicators(history, 'BENCH', ANALYSIS_DATE)),
+                repeat
+            )
+    finally:
+        loop.close()
+    return results
+
+
+def bench_parsers(repeat: int) -> Dict[str, Dict[str, float]]:
+    from src.Agents.news_intelligence_agent import FEATURE_SCHEMA
+    from src.Agents.portfolio_manager_agent import DECISION_SCHEMA, normalize_trading_decision
+    from src.tools.structured_output import parse_json_object
+
+    def parse(reply: str, schema) -> dict:
+        # What invoke_structured() does with a reply before any re-ask
+        data = schema.normalize(parse_json_object(reply)[0] or {})
+        schema.missing(data)
+        return data
+
+    results = {}
+    for label, reply in FEATURE_REPLIES.items():
+        results[f"parse_features:{label}"] = timed(lambda: parse(reply, FEATURE_SCHEMA), repeat)
+    for label, reply in DECISION_REPLIES.items():
+        results[f"parse_decision:{label}"] = timed(
+            lambda: normalize_trading_decision(parse(reply, DECISION_SCHEMA)), repeat
+        )
+    return results
+
+
+def sample_analysis(state_dir: str) -> dict:
+    """One run_analysis() result, replayed from freshly recorded synthetic fixtures."""
+    from src.tools import replay
+    from src.workflows.workflow import run_analysis
+    record_fixtures(['AAPL'], ANALYSIS_DATE)
+    replay.REPLAY_MODE = 'replay'
+    reset_state()
+    return asyncio.run(run_analysis('AAPL', ANALYSIS_DATE))
+
+
+def bench_report(result: dict, repeat: int) -> Dict[str, Dict[str, float]]:
+    import json
+    import orjson
+    from src.workflows.report import build_analysis, render_text
+
+    analysis = build_analysis(result)
+    payload = analysis.model_dump()
+    with_history = build_analysis(result, 'history,metrics,series').model_dump()
+    return {
+        'build_analysis': timed(lambda: build_analysis(result), repeat),
+        'render_text': {**timed(lambda: render_text(analysis), repeat), 'chars': len(render_text(analysis))},
+        'orjson': {**timed(lambda: orjson.dumps(payload), repeat), 'bytes': len(orjson.dumps(payload))},
+        'json': timed(lambda: json.dumps(payload), repeat),
+        'orjson_full': {**timed(lambda: orjson.dumps(with_history), repeat), 'bytes': len(orjson.dumps(with_history))},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    state_dir = tempfile.mkdtemp(prefix='goblin-bench-')
+    configure_replay_env(os.path.join(state_dir, 'fixtures'), state_dir)
+
+    # The pipeline prints progress for every step; keep the timings readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        indicators = bench_indicators(max(10, args.repeat // 10))
+        parsers = bench_parsers(args.repeat)
+        analysis = sample_analysis(state_dir)
+        report = bench_report(analysis, args.repeat)
+
+    results = {
+        'indicators': indicators,
+        'parsers': parsers,
+        'report': report,
+        'analysis_success': analysis.get('success')
+    }
+
+    print(f"{'benchmark':<42}{'median us':>12}{'p95 us':>12}")
+    rows = [(f"indicators:{k}", v) for k, v in indicators.items()] + list(parsers.items()) + [(f"report:{k}", v) for k, v in report.items()]
+    for name, stats in rows:
+        print(f"{name:<42}{stats['median_us']:>12.1f}{stats['p95_us']:>12.1f}")
+
+    save_results('micro', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+    Portfolio manager prompt size: repr-style inputs vs compact rendering.
+
+    Runs run_analysis() against replayed synthetic fixtures (see
+    benchmarks.stubs), captures the portfolio manager's raw prompt inputs
+    and counts the estimated tokens (prompts.compact.count_tokens) of the
+    same prompt rendered three ways: Python reprs in the indented template
+    (the previous layout), compact rendering without a budget, and compact
+    rendering within the configured GOBLIN_PM_PROMPT_TOKENS budget. Also
+    reports the llm_* token counters recorded during the runs.
+
+    Usage:
+        python -m benchmarks.prompt_tokens [--symbols 8] [--budget 1500]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+from benchmarks.common import save_results
+from benchmarks.graph import ANALYSIS_DATE, timed_analysis
+from benchmarks.stubs import DEFAULT_SYMBOLS, configure_replay_env, record_fixtures, reset_state
+
+
+async def capture_inputs(symbols: List[str]) -> List[Dict[str, Any]]:
+    from src.Agents import portfolio_manager_agent
+
+    captured = []
+    build = portfolio_manager_agent.build_portfolio_manager_prompt
+
+    def recording_build(prompt_input, budget=None):
+        captured.append(prompt_input)
+        return build(prompt_input, budget)
+
+    portfolio_manager_agent.build_portfolio_manager_prompt = recording_build
+    try:
+        for symbol in symbols:
+            reset_state()
+            await timed_analysis(symbol)
+    finally:
+        portfolio_manager_agent.build_portfolio_manager_prompt = build
+    return captured
+
+
+def measure(prompt_input: Dict[str, Any], budget: int) -> Dict[str, Any]:
+    from src.Agents.portfolio_manager_agent import build_portfolio_manager_prompt
+    from src.prompts.compact import count_tokens
+    from src.prompts.prompts import PORTFOLIO_MANAGER_TEMPLATE
+
+    # The previous layout: every line indented by 16 spaces, values as reprs
+    indented = PORTFOLIO_MANAGER_TEMPLATE.replace("\n", "\n" + " " * 16)
+    legacy = count_tokens(indented.format(**{key: str(value) for key, value in prompt_input.items()}))
+    _, compact, _ = build_portfolio_manager_prompt(prompt_input, budget=0)
+    _, budgeted, trimmed = build_portfolio_manager_prompt(prompt_input, budget=budget)
+    return {'legacy': legacy, 'compact': compact, 'budgeted': budgeted, 'trimmed': trimmed}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument('--symbols', type=int, default=len(DEFAULT_SYMBOLS))
+    parser.add_argument('--budget', type=int, default=None, help="token budget (default: GOBLIN_PM_PROMPT_TOKENS)")
+    args = parser.parse_args(argv)
+
+    symbols = DEFAULT_SYMBOLS[:args.symbols]
+    state_dir = tempfile.mkdtemp(prefix='goblin-bench-')
+    configure_replay_env(os.path.join(state_dir, 'fixtures'), state_dir)
+
+    from src.tools import replay
+    from src.workflows import metrics
+    from src.Agents.portfolio_manager_agent import PM_PROMPT_TOKEN_BUDGET
+    budget = args.budget if args.budget is not None else PM_PROMPT_TOKEN_BUDGET
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        record_fixtures(symbols, ANALYSIS_DATE)
+        replay.REPLAY_MODE = 'replay'
+        metrics.reset()
+        inputs = asyncio.run(capture_inputs(symbols))
+
+    rows = [measure(prompt_input, budget) for prompt_input in inputs]
+    results = {'symbols': len(symbols), 'budget': budget, 'prompts': {}}
+    print(f"{'rendering':<12}{'mean tokens':>14}{'vs legacy':>12}")
+    legacy = statistics.mean(row['legacy'] for row in rows)
+    for kind in ('legacy', 'compact', 'budgeted'):
+        mean = statistics.mean(row[kind] for row in rows)
+        results['prompts'][kind] = {'mean_tokens': round(mean, 1), 'saving_pct': round((1 - mean / legacy) * 100, 1)}
+        print(f"{kind:<12}{mean:>14.1f}{results['prompts'][kind]['saving_pct']:>11.1f}%")
+    results['trimmed'] = sorted({name for row in rows for name in row['trimmed']})
+    results['llm_counters'] = {key: value for key, value in metrics.snapshot().items() if key.startswith('llm_')}
+    print(f"trimmed inputs at this budget: {', '.join(results['trimmed']) or 'none'}")
+    for key, value in sorted(results['llm_counters'].items()):
+        print(f"{key}: {value}")
+
+    save_results('prompt_tokens', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+    Synthetic stand-ins for yfinance, finnhub and langchain_groq.
+
+    record_fixtures() runs the real pipeline once per symbol in record mode
+    with these fake client modules installed, which writes replay fixtures
+    exactly as a live recording would. Benchmarks then replay them
+    (GOBLIN_REPLAY=replay) with no network and no API keys.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import types
+import zlib
+from typing import Iterable
+
+import numpy as np
+
+
+DEFAULT_SYMBOLS = ['AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOG', 'META', 'TSLA', 'JPM']
+
+
+def _rng(symbol: str) -> np.random.Generator:
+    return np.random.default_rng(zlib.crc32(symbol.encode()))
+
+
+class FakeTicker:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    def history(self, period='3mo', interval='1d'):
+        import pandas as pd
+        bars = {'3mo': 63, '6mo': 126, '1y': 252, '2y': 504, '5y': 1260, '10y': 2520}.get(period, 63)
+        rng = _rng(self.symbol)
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, bars)))
+        index = pd.bdate_range(end='2025-06-30', periods=bars, tz='America/New_York')
+        return pd.DataFrame({
+            'Open': close * 0.998, 'High': close * 1.01, 'Low': close * 0.99,
+            'Close': close, 'Volume': rng.uniform(1e6, 5e7, bars),
+            'Dividends': 0.0, 'Stock Splits': 0.0
+        }, index=index)
+
+    @property
+    def info(self):
+        return {
+            'longName': f"{self.symbol} Corp", 'sector': 'Technology', 'industry': 'Software',
+            'country': 'United States', 'exchange': 'NMS', 'marketCap': 2_000_000_000_000,
+            'website': 'https://example.com', 'longBusinessSummary': 'Synthetic company. ' * 40,
+            'mostRecentQuarter': 1743379200
+        }
+
+
+class FakeFinnhubClient:
+    def __init__(self, api_key=None):
+        pass
+
+    def company_basic_financials(self, symbol, metric):
+        rng = _rng(symbol)
+        metrics = {name: float(rng.uniform(1, 40)) for name in (
+            'peBasicExclExtraTTM', 'pbAnnual', 'roeRfy', 'roaRfy', 'totalDebt/totalEquityAnnual',
+            'currentRatioAnnual', 'netProfitMarginTTM', 'revenueGrowthTTM',
+            'epsBasicExclExtraItemsTTM', 'dividendYieldIndicatedAnnual'
+        )}
+        metrics.update({f"metric_{i}": float(i) for i in range(120)})
+        series = {'quarterly': {'eps': [{'period': '2025-03-31', 'v': 1.5}, {'period': '2024-12-31', 'v': 1.4}]}}
+        return {'metric': metrics, 'series': series}
+
+    def company_profile2(self, symbol):
+        return {'ticker': symbol, 'name': f"{symbol} Corp", 'country': 'US', 'currency': 'USD',
+                'exchange': 'NASDAQ', 'finnhubIndustry': 'Technology', 'marketCapitalization': 2_000_000}
+
+    def company_peers(self, symbol):
+        return [symbol] + [peer for peer in DEFAULT_SYMBOLS if peer != symbol][:5]
+
+    def company_news(self, symbol, _from, to):
+        return [
+            {'id': zlib.crc32(f"{symbol}{i}".encode()), 'datetime': 1751000000 - i * 3600, 'category': 'company',
+             'headline': f"{symbol} headline {i}", 'summary': 'Quarterly results beat estimates. ' * 5,
+             'source': 'Synthetic', 'url': f"https://example.com/{symbol}/{i}", 'image': '', 'related': symbol}
+            for i in range(12)
+        ]
+
+
+class FakeChatGroq:
+    def __init__(self, model=None, **kwargs):
+        self.model_name = model
+
+    async def ainvoke(self, messages, **kwargs):
+        from langchain_core.messages import AIMessage
+        text = messages[-1].content if isinstance(messages, list) else str(messages)
+        if 'portfolio manager' in text:
+            return AIMessage(content='{"trading_signal": "BUY", "confidence_level": 0.7, "position_size": 60}')
+        return AIMessage(content=(
+            '```json\n{"headline": "Synthetic", "published_date": "2025-06-30", "source": "Synthetic", '
+            '"key_points": ["Results beat estimates", "Guidance raised"], "sentiment": "positive", '
+            '"impact": "medium", "category": "earnings"}\n```'
+        ))
+
+
+@contextlib.contextmanager
+def fake_client_modules():
+    """Install fake yfinance / finnhub / langchain_groq modules for the block."""
+    fakes = {
+        'yfinance': types.SimpleNamespace(Ticker=FakeTicker),
+        'finnhub': types.SimpleNamespace(Client=FakeFinnhubClient),
+        'langchain_groq': types.SimpleNamespace(ChatGroq=FakeChatGroq),
+    }
+    saved = {name: sys.modules.get(name) for name in fakes}
+    sys.modules.update(fakes)
+    try:
+        yield
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def configure_replay_env(fixtures_dir: str, state_dir: str) -> None:
+    """Environment for an isolated, cache-free replay run (set before importing src)."""
+    os.environ.update({
+        'GOBLIN_FIXTURES_DIR': fixtures_dir,
+        'GOBLIN_CACHE_BACKEND': 'memory',
+        'GOBLIN_STAGE_CACHE': '0',
+        'GOBLIN_ANALYSIS_CACHE_TTL': '0',
+        'GOBLIN_NEWS_DB': os.path.join(state_dir, 'news.sqlite3'),
+        'GOBLIN_FUNDAMENTALS_DB': os.path.join(state_dir, 'fundamentals.sqlite3'),
+        'FINNHUB_MAX_PER_MINUTE': '1000000',
+        'FINNHUB_BURST': '1000',
+        'GOBLIN_OFFLOAD_MODE': 'inline',
+    })
+
+
+def reset_state() -> None:
+    """Forget everything cached in-process so the next run does all the work."""
+    from src.tools.cache import get_cache
+    from src.tools.news_store import get_news_store
+    get_cache().clear()
+    conn = get_news_store()._conn()
+    conn.execute("DELETE FROM news_articles")
+    conn.execute("DELETE FROM news_coverage")
+
+
+def record_fixtures(symbols: Iterable[str], analysis_date: str) -> None:
+    """Run the pipeline once per symbol against the fakes, recording fixtures."""
+    from src.tools import replay
+    import src.tools.finnhub_tool as finnhub_tool
+
+    previous = replay.REPLAY_MODE, finnhub_tool.finnhub_api_key, os.environ.get('GROQ_API_KEY')
+    replay.REPLAY_MODE = 'record'
+    finnhub_tool.finnhub_api_key = 'synthetic'
+    os.environ['GROQ_API_KEY'] = 'synthetic'
+    try:
+        from src.workflows.workflow import run_analysis
+        with fake_client_modules(), contextlib.redirect_stdout(io.StringIO()):
+            for symbol in symbols:
+                reset_state()
+                asyncio.run(run_analysis(symbol, analysis_date))
+    finally:
+        replay.REPLAY_MODE, finnhub_tool.finnhub_api_key = previous[0], previous[1]
+        if previous[2] is None:
+            os.environ.pop('GROQ_API_KEY', None)
+        else:
+            os.environ['GROQ_API_KEY'] = previous[2]
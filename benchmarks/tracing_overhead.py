@@ -0,0 +1,98 @@
+"""
+    Latency overhead of tracing at different sampling rates.
+
+    Runs run_analysis() end to end against replayed synthetic fixtures (see
+    benchmarks.stubs), cold every time, with GOBLIN_TRACE_SAMPLE_RATE at 0,
+    10% and 100% and the memory exporter. Rates are interleaved round by
+    round so drift on the host affects all of them equally. Also reports
+    the cost of a single span() when sampled and when not.
+
+    Usage:
+        python -m benchmarks.tracing_overhead [--rounds 20] [--rates 0 0.1 1]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.common import save_results
+from benchmarks.graph import ANALYSIS_DATE, summarize, timed_analysis
+from benchmarks.stubs import DEFAULT_SYMBOLS, configure_replay_env, record_fixtures, reset_state
+
+
+def span_cost(iterations: int = 200_000) -> Dict[str, float]:
+    """Nanoseconds per span() enter/exit outside and inside a sampled trace."""
+    from src.workflows import tracing
+
+    def loop():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            with tracing.span('bench'):
+                pass
+        return (time.perf_counter() - start) / iterations * 1e9
+
+    unsampled = loop()
+    with tracing.start_trace('bench', force=True):
+        sampled = loop()
+    tracing.clear()
+    return {'unsampled_ns': round(unsampled, 1), 'sampled_ns': round(sampled, 1)}
+
+
+async def run(symbols: List[str], rates: List[float], rounds: int) -> Dict[str, List[float]]:
+    from src.workflows import tracing
+
+    # Warm-up so imports and first-call setup are not measured
+    reset_state()
+    await timed_analysis(symbols[0])
+
+    latencies: Dict[str, List[float]] = {str(rate): [] for rate in rates}
+    for _ in range(rounds):
+        for rate in rates:
+            tracing.TRACE_SAMPLE_RATE = rate
+            for symbol in symbols:
+                reset_state()
+                latencies[str(rate)].append(await timed_analysis(symbol))
+        tracing.clear()
+    return latencies
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--symbols', type=int, default=4)
+    parser.add_argument('--rates', type=float, nargs='+', default=[0.0, 0.1, 1.0])
+    args = parser.parse_args(argv)
+
+    symbols = DEFAULT_SYMBOLS[:args.symbols]
+    state_dir = tempfile.mkdtemp(prefix='goblin-bench-')
+    configure_replay_env(os.path.join(state_dir, 'fixtures'), state_dir)
+    os.environ['GOBLIN_TRACE_EXPORTERS'] = 'memory'
+
+    from src.tools import replay
+    with contextlib.redirect_stdout(io.StringIO()):
+        record_fixtures(symbols, ANALYSIS_DATE)
+        replay.REPLAY_MODE = 'replay'
+        latencies = asyncio.run(run(symbols, args.rates, args.rounds))
+
+    results = {'rounds': args.rounds, 'symbols': len(symbols), 'rates': {}, 'span': span_cost()}
+    baseline = statistics.median(latencies[str(args.rates[0])])
+    print(f"{'sample rate':<14}{'p50 ms':>10}{'p95 ms':>10}{'p50 vs first':>15}")
+    for rate in args.rates:
+        stats = summarize(latencies[str(rate)])
+        stats['p50_overhead_pct'] = round((stats['p50_ms'] / baseline - 1) * 100, 2)
+        results['rates'][str(rate)] = stats
+        print(f"{rate:<14.0%}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p50_overhead_pct']:>14.2f}%")
+    print(f"span(): {results['span']['unsampled_ns']:.0f} ns unsampled, {results['span']['sampled_ns']:.0f} ns sampled")
+
+    save_results('tracing_overhead', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
+from typing import List, Optional
+from urllib.parse import parse_qs
+import asyncio
+import hashlib
+import orjson
+import re
 import warnings
+from contextlib import asynccontextmanager
 import sys
 import os
 from datetime import datetime
@@ -11,20 +20,134 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-os.environ["LANGSMITH_API_KEY"] = os.getenv("LANGSMITH_API_KEY")
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "Goblin Agent"
-
 # Project Setup
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 
-from src.workflows.workflow import run_analysis
+from src.tools import replay
+from src.tools.model_router import get_model_router
+from src.workflows import metrics, profiling, tracing
+from src.workflows.analysis_cache import expires_in, get_or_run_analysis, PREWARM_CACHE_TTL
+from src.workflows.scheduler import WatchlistScheduler
+from src.workflows.live_feed import LIVE_MAX_SYMBOLS, Subscriber, get_live_feed
+from src.workflows.report import Analysis, build_analysis, parse_include, render_text
+
+# LangSmith export is opt-in (GOBLIN_TRACE_EXPORTERS=memory,langsmith)
+tracing.configure_remote_export()
+
+
+# The workflow module pulls in langgraph, langchain_groq, pandas, ta, yfinance
+# and finnhub. Load it in a background thread once the server is accepting
+# connections instead of at import time.
+_workflow_loader = None
+
+def _import_workflow():
+    from src.workflows.workflow import run_analysis, warm_up
+    warm_up()
+    return run_analysis
+
+
+def start_loading_workflow() -> asyncio.Future:
+    """Start importing the workflow in a worker thread (once)."""
+    global _workflow_loader
+    if _workflow_loader is None:
+        _workflow_loader = asyncio.ensure_future(asyncio.to_thread(_import_workflow))
+    return _workflow_loader
+
+
+async def load_run_analysis():
+    """Return run_analysis, waiting for the background warm-up if needed."""
+    global _workflow_loader
+    loader = start_loading_workflow()
+    try:
+        return await asyncio.shield(loader)
+    except Exception:
+        # Let the next request retry a failed import
+        if _workflow_loader is loader:
+            _workflow_loader = None
+        raise
+
+
+async def prewarm_symbol(symbol: str) -> bool:
+    """Run a full analysis for a watchlist symbol and cache it."""
+    await load_run_analysis()
+    analysis_date = replay.analysis_date()
+    # Nobody is waiting on a pre-warm: let every stage finish, so the result
+    # is complete and keeps PREWARM_CACHE_TTL
+    result = await get_or_run_analysis(
+        symbol, analysis_date, f"prewarm_{datetime.now()}", refresh=True, ttl=PREWARM_CACHE_TTL, deadline=0
+    )
+    return bool(result.get('success'))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_loading_workflow()
+
+    scheduler = WatchlistScheduler.from_env(prewarm_symbol)
+    if scheduler:
+        scheduler.start()
+
+    yield
+
+    if scheduler:
+        await scheduler.stop()
+
+    await get_live_feed().close()
+
+    from src.tools.executor import shutdown_process_pool
+    shutdown_process_pool()
+
+
+# Request header (or ?profile=1 query flag) that turns on profiling for one request
+PROFILE_HEADER = "x-goblin-profile"
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request when the client asks for it.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so requests without the flag
+    go straight through. The profile covers the whole response, including
+    streamed bodies, and its id is returned in the X-Goblin-Profile-Id header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def requested(scope) -> bool:
+        if scope["type"] != "http" or scope["path"].startswith("/profiles"):
+            return False
+        flag = dict(scope["headers"]).get(PROFILE_HEADER.encode())
+        if flag is None and b"profile" in scope["query_string"]:
+            flag = parse_qs(scope["query_string"].decode()).get("profile", [""])[-1].encode()
+        return flag is not None and profiling.authorized(flag.decode(errors="replace"))
+
+    async def __call__(self, scope, receive, send):
+        if not self.requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        with profiling.profile_request(f"{scope['method']} {scope['path']}") as profile:
+            async def send_with_profile_id(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", []).append((b"x-goblin-profile-id", profile.id.encode()))
+                await send(message)
+
+            await self.app(scope, receive, send_with_profile_id)
+
+
+# Responses smaller than this many bytes are sent uncompressed
+GZIP_MINIMUM_SIZE = int(os.getenv('GOBLIN_GZIP_MIN_SIZE', 1000))
 
 
 # FASTAPI App
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=6)
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,177 +165,109 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     reply: str
 
+class PortfolioRequest(BaseModel):
+    symbols: List[str]
+    signal_source: str = "llm"
+    lookback: int = 252
+    target_volatility: float = 0.10
+    max_gross: float = 1.0
+    allow_short: bool = False
+    include_correlation: bool = False
 
-# Helper Functions
-def safe_get(dictionary, *keys, default="N/A"):
-    """Safely extract nested dictionary values."""
-    if dictionary is None:
-        return default
-    result = dictionary
-    for key in keys:
-        if isinstance(result, dict):
-            result = result.get(key)
-            if result is None:
-                return default
-        else:
-            return default
-    return result if result is not None else default
+# How often a running request checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
 
 
-def format_currency(value):
-    try:
-        return f"${float(value):,.2f}"
-    except:
-        return "N/A"
+async def run_until_disconnected(request: Request, coro):
+    """
+    Run coro as a task and cancel it if the HTTP client disconnects.
 
-
-def format_percentage(value):
+    Returns:
+        (completed, result) - completed is False when the client went away
+    """
+    task = asyncio.create_task(coro)
     try:
-        return f"{float(value):.2f}%"
-    except:
-        return "N/A"
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return True, task.result()
+
+            if await request.is_disconnected():
+                metrics.increment("client_disconnects")
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                return False, None
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == opaque
+        for candidate in (part.strip() for part in if_none_match.split(","))
+    )
+
+
+def conditional_json(request: Request, payload, max_age: Optional[float] = None) -> Response:
+    """
+    JSON response with an ETag derived from its content and Cache-Control.
+
+    Returns 304 Not Modified without a body when the client's If-None-Match
+    already names this content. The ETag is weak because GZipMiddleware may
+    re-encode the body.
+
+    Args:
+        max_age: Seconds the client may reuse the response without asking
+                 (None or 0: revalidate every time)
+    """
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={int(max_age)}" if max_age else "private, no-cache"
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        metrics.increment("http_not_modified")
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 
-def format_billions(value):
-    try:
-        return f"${float(value)/1_000_000_000:.2f}B"
-    except:
-        return "N/A"
+# MAIN AGENT FUNCTION
+async def get_analysis(symbol: str) -> dict:
+    """Today's run_analysis() result for symbol, from cache when possible."""
+    warnings.filterwarnings("ignore", message=".*UUID v7.*")
 
+    analysis_date = replay.analysis_date()
+    session_id = f"analysis_{datetime.now()}"
+
+    run_analysis = await load_run_analysis()
+    if profiling.active():
+        # A profile has to show a run of its own, not a cached or shared one
+        profiling.annotate(symbol=symbol, analysis_date=analysis_date)
+        return await run_analysis(symbol, analysis_date, session_id)
+    return await get_or_run_analysis(symbol, analysis_date, session_id)
 
 
-# MAIN AGENT FUNCTION
 async def run_agent(message: str) -> str:
     """Run the Goblin workflow and return a formatted summary."""
-
-    warnings.filterwarnings("ignore", message=".*UUID v7.*")
-
     symbol = message.strip().upper()
-    analysis_date = datetime.today().date().strftime("%Y-%m-%d")
-    session_id = f"analysis_{datetime.now()}"
 
     try:
-        result = await run_analysis(symbol, analysis_date, session_id)
+        result = await get_analysis(symbol)
 
         if not result.get("success"):
             return f"Analysis failed: {result.get('error', 'Unknown error')}"
 
-        results = result.get("results", {})
-
-        # DATA COLLECTION
-        data = results.get("data_collection", {})
-        market_data = safe_get(data, "market_data", default={})
-        price_data = safe_get(market_data, "price_data", default={})
-        company_info = safe_get(data, "company_info", default={})
-        basic_financials = safe_get(data, "basic_financials", default={})
-        metrics = safe_get(basic_financials, "metrics", default={})
-
-        # TECHNICALS
-        technical = results.get("technical_analysis", {})
-        indicators = safe_get(technical, "indicators", default={})
-        tech_data = safe_get(indicators, "technical_indicators", default={})
-
-        # NEWS
-        news = results.get("news_intelligence", {})
-        nlp_features = safe_get(news, "nlp_features", default={})
-        news_features = safe_get(nlp_features, "news_features", default=[])
-
-        # PORTFOLIO
-        portfolio = results.get("portfolio_manager", {})
-        portfolio_data = safe_get(portfolio, symbol, default={})
-
-
-        # BUILD SUMMARY (PLAIN TEXT - NO HTML)
-        lines = []
-        lines.append("=" * 70)
-        lines.append("GOBLIN - FINANCIAL ANALYST")
-        lines.append(f"Symbol: {symbol} | Date: {analysis_date}")
-        lines.append("=" * 70)
-        lines.append("")
-        
-        lines.append("MARKET DATA")
-        lines.append("-" * 70)
-        lines.append(f"Current Price:      {format_currency(safe_get(market_data, 'current_price'))}")
-        lines.append(f"Previous Close:     {format_currency(safe_get(price_data, 'previous_close'))}")
-        lines.append(f"Price Change:       {format_currency(safe_get(price_data, 'price_change'))} ({format_percentage(safe_get(price_data, 'price_change_pct'))})")
-        lines.append("")
-        lines.append(f"Company:            {safe_get(company_info, 'name')}")
-        lines.append(f"Sector:             {safe_get(company_info, 'sector')}")
-        lines.append(f"Industry:           {safe_get(company_info, 'industry')}")
-        lines.append(f"Market Cap:         {format_billions(safe_get(company_info, 'market_cap'))}")
-        lines.append("")
-        
-        desc = safe_get(company_info, 'description', default='N/A')
-        lines.append(f"Description: {desc}...")
-        lines.append("")
-
-        lines.append("FUNDAMENTAL METRICS")
-        lines.append("-" * 70)
-        lines.append(f"P/E Ratio:          {safe_get(metrics, 'peBasicExclExtraTTM')}")
-        lines.append(f"P/B Ratio:          {safe_get(metrics, 'pbAnnual')}")
-        lines.append(f"Dividend Yield:     {format_percentage(safe_get(metrics, 'dividendYieldIndicatedAnnual', 0))}")
-        lines.append("")
-        lines.append(f"ROE:                {format_percentage(safe_get(metrics, 'roeRfy'))}")
-        lines.append(f"ROA:                {format_percentage(safe_get(metrics, 'roaRfy'))}")
-        lines.append(f"Profit Margin:      {format_percentage(safe_get(metrics, 'netProfitMarginTTM'))}")
-        lines.append(f"EPS:                {format_currency(safe_get(metrics, 'epsBasicExclExtraItemsTTM'))}")
-        lines.append("")
-        lines.append(f"Current Ratio:      {safe_get(metrics, 'currentRatioAnnual')}")
-        lines.append(f"Debt/Equity:        {safe_get(metrics, 'totalDebt/totalEquityAnnual')}")
-        lines.append(f"Revenue Growth:     {format_percentage(safe_get(metrics, 'revenueGrowthTTM'))}")
-        lines.append("")
-
-        lines.append("TECHNICAL INDICATORS")
-        lines.append("-" * 70)
-        lines.append(f"SMA (20):           {safe_get(tech_data, 'SMA')}")
-        lines.append(f"EMA (20):           {safe_get(tech_data, 'EMA')}")
-        lines.append(f"RSI (14):           {safe_get(tech_data, 'RSI')}")
-        lines.append(f"ADX (14):           {safe_get(tech_data, 'ADX')}")
-        lines.append(f"CCI (20):           {safe_get(tech_data, 'CCI')}")
-        lines.append("")
-        lines.append(f"MACD Line:          {safe_get(tech_data, 'MACD', 'macd')}")
-        lines.append(f"MACD Signal:        {safe_get(tech_data, 'MACD', 'signal')}")
-        lines.append(f"MACD Histogram:     {safe_get(tech_data, 'MACD', 'histogram')}")
-        lines.append("")
-        lines.append(f"BB Upper:           {safe_get(tech_data, 'BBANDS', 'upper')}")
-        lines.append(f"BB Middle:          {safe_get(tech_data, 'BBANDS', 'middle')}")
-        lines.append(f"BB Lower:           {safe_get(tech_data, 'BBANDS', 'lower')}")
-        lines.append("")
-
-        lines.append("NEWS ANALYSIS")
-        lines.append("-" * 70)
-        lines.append(f"Articles Analyzed:  {len(news_features)}")
-        lines.append("")
-
-        for i, article in enumerate(news_features[:3], 1):
-            headline = safe_get(article, "headline", default="No headline")
-            sentiment = safe_get(article, "sentiment", default="neutral").upper()
-            
-            lines.append(f"Article {i}:  {sentiment}")
-            lines.append(f"  {headline}...")
-            lines.append("")
-
-        lines.append("PORTFOLIO RECOMMENDATION")
-        lines.append("-" * 70)
-
-        if portfolio_data and safe_get(portfolio_data, "success"):
-            signal = safe_get(portfolio_data, 'trading_signal', default='HOLD')
-            confidence = safe_get(portfolio_data, 'confidence_level', default=0)
-            position = safe_get(portfolio_data, 'position_size', default=0)
-            
-            
-            lines.append(f"Signal:             {signal}")
-            lines.append(f"Confidence:         {confidence:.1f}/1.0 ({confidence*100:.0f}%)")
-            lines.append(f"Position Size:      {position}%")
-        else:
-            lines.append("Portfolio analysis unavailable")
-
-        lines.append("")
-        lines.append("=" * 70)
-        lines.append("End of Analysis")
-        lines.append("=" * 70)
-
-        return "\n".join(lines)
+        return render_text(build_analysis(result))
 
     except Exception as e:
         import traceback
@@ -232,11 +287,205 @@ async def run_agent(message: str) -> str:
 
 # Endpoint
 @app.post("/chat")
-async def chat(request: ChatRequest) -> ChatResponse:
-    reply = await run_agent(request.message)
+async def chat(request: ChatRequest, http_request: Request) -> ChatResponse:
+    completed, reply = await run_until_disconnected(http_request, run_agent(request.message))
+    if not completed:
+        # Client closed the connection, nobody will read this
+        return Response(status_code=499)
     return ChatResponse(reply=reply)
 
 
+@app.get("/analysis/{symbol}", response_model=Analysis)
+async def analysis(symbol: str, http_request: Request, include: str = ""):
+    """
+    Today's analysis as typed JSON (the data behind the /chat report).
+
+    include: comma-separated extras, any of "history" (daily OHLCV),
+    "metrics" (every Finnhub metric) and "series" (Finnhub time series)
+    """
+    try:
+        include_options = parse_include(include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    completed, result = await run_until_disconnected(http_request, get_analysis(symbol.strip().upper()))
+    if not completed:
+        return Response(status_code=499)
+    if not result.get("success"):
+        raise HTTPException(status_code=502, detail=f"Analysis failed: {result.get('error', 'Unknown error')}")
+    return conditional_json(http_request, build_analysis(result, include_options).model_dump(), expires_in(result))
+
+
+@app.post("/portfolio")
+async def portfolio(request: PortfolioRequest):
+    # NumPy/pandas load on first use, not at startup
+    from src.portfolio.allocation import build_portfolio
+    try:
+        return await build_portfolio(**request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/news/{symbol}/features")
+async def news_features(symbol: str, start: str, end: str, request: Request):
+    # Served from the local news index only, never from Finnhub
+    from src.tools.news_store import get_news_store
+    try:
+        articles = get_news_store().features(symbol, start, end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be YYYY-MM-DD dates")
+    return conditional_json(request, {"symbol": symbol.upper(), "start": start, "end": end, "articles": articles})
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+
+# Ticker symbols as yfinance/Finnhub spell them (BRK-B, ^GSPC, EURUSD=X)
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9.\-^=]{1,15}$')
+
+
+@app.websocket("/ws/watchlist")
+async def watchlist_feed(websocket: WebSocket):
+    """
+    Live watchlist: send {"action": "subscribe" | "unsubscribe", "symbols": [...]}.
+
+    Each subscribed symbol gets a snapshot, then "bar" messages with the
+    price fields and indicator values that changed, and "news" / "signal"
+    messages when those change. See src/workflows/live_feed.py.
+    """
+    await websocket.accept()
+    hub = get_live_feed()
+    subscriber = Subscriber()
+
+    def reply(message: dict):
+        if not subscriber.queue.full():
+            subscriber.queue.put_nowait(orjson.dumps(message).decode())
+
+    async def forward():
+        while True:
+            await websocket.send_text(await subscriber.queue.get())
+
+    sender = asyncio.create_task(forward())
+    try:
+        while True:
+            try:
+                message = orjson.loads(await websocket.receive_text())
+                action, symbols = message.get("action"), message.get("symbols")
+                if action not in ("subscribe", "unsubscribe") or not isinstance(symbols, list):
+                    raise ValueError('expected {"action": "subscribe" | "unsubscribe", "symbols": [...]}')
+                symbols = [str(symbol).strip().upper() for symbol in symbols]
+                invalid = [symbol for symbol in symbols if not SYMBOL_PATTERN.match(symbol)]
+                if invalid:
+                    raise ValueError(f"invalid symbols: {invalid}")
+            except (orjson.JSONDecodeError, AttributeError, ValueError) as e:
+                reply({"type": "error", "message": str(e)})
+                continue
+
+            if action == "subscribe":
+                if len(subscriber.symbols | set(symbols)) > LIVE_MAX_SYMBOLS:
+                    reply({"type": "error", "message": f"at most {LIVE_MAX_SYMBOLS} symbols per connection"})
+                    continue
+                for symbol in symbols:
+                    hub.subscribe(symbol, subscriber)
+            else:
+                for symbol in symbols:
+                    await hub.unsubscribe(symbol, subscriber)
+            reply({"type": "subscribed", "symbols": sorted(subscriber.symbols)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        await hub.disconnect(subscriber)
+
+
+@app.get("/live")
+async def live_feeds():
+    # Polled symbols and their subscriber counts
+    return get_live_feed().stats()
+
+
+@app.get("/models")
+async def model_tiers():
+    # Rolling latency / quality record of each model tier
+    return get_model_router().stats()
+
+
+@app.get("/intraday/{symbol}")
+async def intraday(symbol: str, interval: str = "5m", limit: int = 100, indicators: Optional[List[str]] = Query(None)):
+    """
+    Latest intraday bars at any multiple of 1m (1m, 5m, 15m, 1h, ...) and
+    indicators calculated on them, e.g. ?interval=5m&indicators=RSI&indicators=SMA(50)
+    """
+    from src.tools.intraday import get_intraday_store, intraday_indicators, refresh_intraday
+    symbol = symbol.upper()
+    store = get_intraday_store()
+    refreshed = await refresh_intraday(symbol)
+    if not refreshed.success and store.age(symbol) is None:
+        raise HTTPException(status_code=502, detail=refreshed.error)
+
+    try:
+        bars = store.bars(symbol, interval, limit=max(1, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Copy out of the ring before awaiting; the live feed may ingest meanwhile
+    records = bars.to_records("m") if bars is not None else []
+
+    technicals = await intraday_indicators(symbol, interval, indicators)
+    return {
+        "symbol": symbol,
+        "interval": interval,
+        "bars": records,
+        "technical_indicators": technicals.data["technical_indicators"] if technicals.success else None
+    }
+
+
+@app.get("/traces")
+async def get_traces(limit: int = 50):
+    return tracing.recent_traces(limit)
+
+
+@app.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    trace = tracing.get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Unknown trace (not sampled or already evicted)")
+    return trace
+
+
+def require_profile_access(request: Request) -> None:
+    # Profiles show code paths and timings: same flag (or token) as a profiled request
+    flag = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+    if not profiling.authorized(flag):
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+
+@app.get("/profiles")
+async def get_profiles(request: Request):
+    require_profile_access(request)
+    return profiling.list_profiles()
+
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    require_profile_access(request)
+    summary = profiling.load_profile(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return summary
+
+
+@app.get("/profiles/{profile_id}/pstats")
+async def download_profile(profile_id: str, request: Request):
+    require_profile_access(request)
+    # Open with `python -m pstats` or snakeviz
+    path = profiling.profile_path(profile_id, "prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail="No CPU profile for this id")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"goblin-{profile_id}.prof")
+
+
 
 # Static UI
 app.mount("/", StaticFiles(directory="static", html=True), name="static")
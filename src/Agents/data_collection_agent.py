@@ -1,15 +1,33 @@
 from typing import Any,Dict
 from ..workflows.state import AgentState
-from ..tools.yfinance_tool import get_market_data,get_company_info
+from ..tools.yfinance_tool import get_market_data,get_company_info,history_period_for
+from ..tools.indicator_registry import parse_indicator_request,required_bars
+from ..tools.technical_indicator_tool import DEFAULT_INDICATORS
 from ..tools.finnhub_tool import get_company_basic_financials,get_company_profile
 
-async def collect_data(symbol: str, analysis_date : str) -> Dict[str, Any]:
+def history_period_for_request(indicators, timeframes) -> str:
+    """
+        Price history period long enough for the default indicators (always
+        calculated) and any requested ones on every requested timeframe.
+    """
+    requests = [parse_indicator_request(indicator) for indicator in DEFAULT_INDICATORS]
+    for indicator in indicators or []:
+        try:
+            requests.append(parse_indicator_request(indicator))
+        except ValueError:
+            continue
+    # Some slack for holidays and the warm-up of smoothed indicators
+    return history_period_for(int(required_bars(requests, timeframes) * 1.2))
+
+
+async def collect_data(symbol: str, analysis_date : str, period : str = '3mo') -> Dict[str, Any]:
     """
     Collect market data and news for a symbol.
     
     Args:
         symbol: Stock symbol (e.g., 'AAPL')
         analysis_date: Date for analysis in YYYY-MM-DD format (optional)
+        period: Price history period (default: 3mo)
         
     Returns:
         Dict with collected data or error info
@@ -18,7 +36,7 @@ async def collect_data(symbol: str, analysis_date : str) -> Dict[str, Any]:
         symbol = symbol.upper()
         
         # Collect market data
-        market_result = await get_market_data(symbol, analysis_date)
+        market_result = await get_market_data(symbol, analysis_date, period)
         company_result = await get_company_info(symbol)
         profile_result = await get_company_profile(symbol)
         financials_result = await get_company_basic_financials(symbol)
@@ -59,8 +77,9 @@ async def data_collection_agent_node(state:AgentState) -> AgentState:
         symbol = state['symbol']
         analysis_date = state['analysis_date']
 
-        # collect data
-        result = await collect_data(symbol,analysis_date)
+        # collect data, with enough history for the requested indicators
+        period = history_period_for_request(state.get('indicators'), state.get('timeframes'))
+        result = await collect_data(symbol,analysis_date,period)
 
         # update state
         state['data_collection_results'] = result
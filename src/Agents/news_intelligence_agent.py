@@ -1,99 +1,107 @@
 from ..workflows.state import AgentState
 from typing import Optional,Dict,Any
 from ..tools.finnhub_tool import get_company_news
+from ..tools.news_store import article_id, get_news_store
+from ..tools.llm import groq_configured
+from ..tools.model_router import get_model_router
+from ..tools.structured_output import OutputField, OutputSchema, invoke_structured
 from typing import List
-import os,json
-from langchain_groq import ChatGroq
+import os
 from ..prompts.prompts import news_feature_analyze_template
+from ..prompts.compact import count_tokens
+from ..workflows.stage_cache import fingerprint, run_stage
+from ..workflows.tracing import span
+
+# Number of most recent articles sent to the LLM
+MAX_ARTICLES = 3
+
+# Articles whose headline and summary fit in this many tokens go to the
+# cheapest model tier
+SHORT_ARTICLE_TOKENS = int(os.getenv('GOBLIN_SHORT_ARTICLE_TOKENS', 120))
+
+# Keys expected from the feature extraction; missing required ones are re-asked
+FEATURE_SCHEMA = OutputSchema('news_features', (
+    OutputField('headline', 'string', 'the article headline'),
+    OutputField('published_date', 'string', required=False),
+    OutputField('source', 'string', required=False),
+    OutputField('key_points', 'array', 'up to 3 main points as strings'),
+    OutputField('sentiment', 'string', enum=('positive', 'negative', 'neutral')),
+    OutputField('impact', 'string', enum=('high', 'medium', 'low')),
+    OutputField('category', 'string', required=False, enum=(
+        'earnings', 'product', 'regulatory', 'litigation', 'macro', 'management',
+        'competitive', 'analyst_ratings', 'supply_chain', 'other'
+    ))
+))
+
+
+def news_ids(news : List[Dict[str, Any]]) -> List[str]:
+    """Identity of each article (Finnhub id, falling back to headline and time)."""
+    return [article_id(article) for article in news]
+
 
 async def extract_nlp_features(symbol: str, news_result: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    """Extract NLP features from news result"""
-    api_key = os.getenv('GROQ_API_KEY')
+    """
+        Extract NLP features from news result
 
-    if not api_key:
+        Features are stored with each article in the news store, so an
+        article is only sent to the LLM the first time it is seen.
+    """
+    limited_news = news_result[:MAX_ARTICLES]
+    ids = news_ids(limited_news)
+    store = get_news_store()
+    stored = store.get_features(symbol, ids)
+
+    if len(stored) == len(set(ids)):
+        print(f"All {len(ids)} articles for {symbol} already analyzed")
+        return {
+            'news_features': [stored[news_id] for news_id in ids],
+            'total_analyzed': len(ids)
+        }
+
+    if not groq_configured():
         print(f"No Groq API key available for {symbol}")
         return None
-    
-    llm = ChatGroq(
-        model='llama-3.3-70b-versatile', 
-        api_key=api_key, 
-        temperature=0.2,
-        max_tokens=1000
-    )
+
+    router = get_model_router()
     prompt_template = news_feature_analyze_template()
 
     nlp_features = []
     
-    limited_news = news_result[:3]
     print(f"Processing {len(limited_news)} articles for {symbol}\n")
 
-    for idx, article in enumerate(limited_news, 1):
+    for idx, (article, news_id) in enumerate(zip(limited_news, ids), 1):
         
+        if news_id in stored:
+            nlp_features.append(stored[news_id])
+            print(f"Article {idx}/{len(limited_news)} already analyzed")
+            continue
+
         print(f"Processing article {idx}/{len(limited_news)}")
         
         
         try:
             prompt = prompt_template.format(**article)
             
-            response = await llm.ainvoke(prompt)
-            content = response.content.strip()
-            
-            print(content)
+            # Short items go to the small model tier, longer ones start a tier up
+            simple = count_tokens(f"{article.get('headline', '')} {article.get('summary', '')}") <= SHORT_ARTICLE_TOKENS
+            with span('llm:news_features', symbol=symbol):
+                data, model = await router.run(
+                    'news_features',
+                    lambda llm: invoke_structured(llm, prompt, FEATURE_SCHEMA),
+                    temperature=0.2,
+                    max_tokens=1000,
+                    simple=simple
+                )
+
+            print(f"{model}: {data}")
             print(f"\n\n")
-
-            # Try to parse the JSON
-            data = None
-            
-            # Method 1: Extract from ```json blocks
-            if "```json" in content:
-                # print("Found ```json block")
-                start = content.find("```json") + 7
-                end = content.find("```", start)
-                
-                if end == -1:
-                    print("WARNING: No closing ``` found, using rest of content")
-                    json_str = content[start:].strip()
-                else:
-                    json_str = content[start:end].strip()
-                
-                print(f"Extracted JSON string (length {len(json_str)}):")
-                print(json_str)
-                
-                try:
-                    data = json.loads(json_str)
-                    print("✓ Successfully parsed JSON from code block")
-                except json.JSONDecodeError as e:
-                    print(f"✗ JSON parse error: {e}")
-                    print(f"Error at position {e.pos}")
-            
-            # Method 2: Extract from regular ``` blocks
-            elif "```" in content:
-                start = content.find("```") + 3
-                end = content.find("```", start)
-                
-                if end == -1:
-                    json_str = content[start:].strip()
-                else:
-                    json_str = content[start:end].strip()
-                
-                try:
-                    data = json.loads(json_str)
-                except json.JSONDecodeError as e:
-                    print(f"✗ JSON parse error: {e}")
-            
-            # Method 3: Try direct parsing
-            else:
-                print("No code blocks found, trying direct parse")
-                try:
-                    data = json.loads(content)
-                except json.JSONDecodeError as e:
-                    print(f"✗ Direct JSON parse failed: {e}")
             
             if data:
                 nlp_features.append(data)
+                store.set_features(symbol, news_id, data)
                 print(f"✓ Article {idx} successfully processed\n")
             else:
-                print(f"✗ Article {idx} failed - no valid JSON extracted\n")
+                print(f"✗ Article {idx} failed - required fields missing after re-ask\n")
         
         except Exception as e:
             print(f"ERROR processing article {idx}: {e}")
@@ -138,7 +146,24 @@ async def analyze_news(symbol:str,analysis_date : str)->Dict[str,Any]:
         news = news_result.get('news',[])
         total_news = news_result.get('total_count',0)
 
-        nlp_features = await extract_nlp_features(symbol,news)
+        # No articles in the window is a finding, not a failure: the decision
+        # has its news input (nothing to report) and is not degraded
+        if not news:
+            print(f"No recent news for {symbol}")
+            return {
+                'symbol': symbol,
+                'success': True,
+                'nlp_features': {'news_features': [], 'total_analyzed': 0},
+                'total_news': 0
+            }
+
+        # Only re-run the LLM extraction when the analyzed articles changed
+        nlp_features = await run_stage(
+            'news_intelligence',
+            symbol,
+            fingerprint(sorted(news_ids(news[:MAX_ARTICLES]))),
+            lambda: extract_nlp_features(symbol,news)
+        )
 
         if not nlp_features:
             return {
@@ -0,0 +1,137 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+import numpy as np
+from ..workflows.state import AgentState
+from ..tools.finnhub_tool import ESSENTIAL_FINANCIALS, essential_financials, get_company_basic_financials, get_company_peers
+
+# Peers compared against (Finnhub lists the closest ones first)
+MAX_PEERS = int(os.getenv('GOBLIN_MAX_PEERS', 10))
+
+
+def percentile_ranks(target: Dict[str, Any], peers: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+        Rank the target's metrics against the peer set.
+
+        Percentile is the share of peers below the target (ties count
+        half), 0-100. Metrics the target or every peer lacks are left out.
+    """
+    keys = list(ESSENTIAL_FINANCIALS)
+    peer_values = np.array(
+        [[_as_float(peer.get(key)) for key in keys] for peer in peers],
+        dtype=np.float64
+    ).reshape(len(peers), len(keys))
+    target_values = np.array([_as_float(target.get(key)) for key in keys], dtype=np.float64)
+
+    present = ~np.isnan(peer_values)
+    counts = present.sum(axis=0)
+    with np.errstate(invalid='ignore'):
+        below = (peer_values < target_values).sum(axis=0)
+        equal = (peer_values == target_values).sum(axis=0)
+    percentiles = 100.0 * (below + 0.5 * equal) / np.maximum(counts, 1)
+    medians = np.array([np.median(peer_values[present[:, i], i]) if counts[i] else np.nan for i in range(len(keys))])
+
+    ranks = {}
+    for i, key in enumerate(keys):
+        if np.isnan(target_values[i]) or not counts[i]:
+            continue
+        ranks[key] = {
+            'value': round(float(target_values[i]), 4),
+            'peer_median': round(float(medians[i]), 4),
+            'percentile': int(round(percentiles[i])),
+            'peers_reporting': int(counts[i])
+        }
+    return ranks
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+async def compare_to_peers(symbol: str, basic_financials: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+        Compare a company's essential financials with its industry peers.
+
+        Peer fundamentals are fetched concurrently; every call still goes
+        through the shared Finnhub rate limit and the fundamentals cache, so
+        a repeat run for the same industry makes no API calls.
+
+        Args:
+            symbol: Stock symbol
+            basic_financials: The symbol's basic financials from data collection
+
+        Returns:
+            Dict with peers used and percentile ranks per metric
+    """
+    symbol = symbol.upper()
+    try:
+        if not basic_financials or not basic_financials.get('metrics'):
+            return {'symbol': symbol, 'success': False, 'error': 'No financials to compare'}
+
+        peers_result = await get_company_peers(symbol)
+        if not peers_result.success:
+            return {'symbol': symbol, 'success': False, 'error': peers_result.error}
+
+        peers = peers_result.data['peers'][:MAX_PEERS]
+        results = await asyncio.gather(*(get_company_basic_financials(peer) for peer in peers))
+
+        compared = {
+            peer: essential_financials(result.data.get('metrics'))
+            for peer, result in zip(peers, results)
+            if result.success
+        }
+        if not compared:
+            return {'symbol': symbol, 'success': False, 'error': 'No peer financials available'}
+
+        target = essential_financials(basic_financials.get('metrics'))
+        return {
+            'symbol': symbol,
+            'peers': list(compared),
+            'metrics': percentile_ranks(target, list(compared.values())),
+            'success': True
+        }
+
+    except Exception as e:
+        print(f"Error comparing {symbol} to peers: {e}")
+        return {'symbol': symbol, 'success': False, 'error': str(e)}
+
+
+def peer_summary(peer_results: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compact peer context for the portfolio manager prompt."""
+    if not peer_results or not peer_results.get('success'):
+        return {'available': False}
+    return {
+        'peer_count': len(peer_results.get('peers', [])),
+        'percentile_vs_peers': {key: rank['percentile'] for key, rank in peer_results['metrics'].items()},
+        'peer_median': {key: rank['peer_median'] for key, rank in peer_results['metrics'].items()}
+    }
+
+
+async def peer_comparison_agent_node(state: AgentState) -> AgentState:
+    """
+        LangGraph node for peer comparison.
+
+        Args:
+            state: Current workflow state
+
+        Returns:
+            Updated state with peer comparison results
+    """
+    try:
+        symbol = state['symbol']
+        data_results = state.get('data_collection_results') or {}
+
+        result = await compare_to_peers(symbol, data_results.get('basic_financials'))
+
+        # A missing peer set is not fatal, the prompt just lacks the context
+        state['peer_comparison_results'] = result
+        state['current_step'] = 'peer_comparison_complete'
+        return state
+
+    except Exception as e:
+        print(f"Peer comparison node error: {e}")
+        state['peer_comparison_results'] = {'success': False, 'error': str(e)}
+        return state
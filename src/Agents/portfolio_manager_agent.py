@@ -1,8 +1,176 @@
 from ..workflows.state import AgentState
-from typing import Optional,Dict,Any
-import os,json
-from langchain_groq import ChatGroq
-from ..prompts.prompts import get_portfolio_manager_template
+from typing import Optional,Dict,Any,List
+import os
+import numpy as np
+from ..prompts.prompts import PORTFOLIO_MANAGER_TEMPLATE, get_portfolio_manager_template
+from ..prompts.compact import PromptField, fit_to_budget
+from ..workflows.stage_cache import fingerprint, run_stage
+from ..workflows.tracing import span
+from ..workflows import metrics as workflow_metrics
+from ..backtest.decisions import record_decision
+from ..tools.finnhub_tool import essential_financials
+from ..tools.llm import groq_configured
+from ..tools.model_router import get_model_router
+from ..tools.structured_output import OutputField, OutputSchema, invoke_structured
+from .peer_comparison_agent import peer_summary
+
+# Estimated prompt tokens per portfolio manager call (0 = no budget). Over
+# budget, peers, then news, the company profile, fundamentals and price
+# history are shortened in that order; technicals are always sent in full.
+PM_PROMPT_TOKEN_BUDGET = int(os.getenv('GOBLIN_PM_PROMPT_TOKENS', 1500))
+
+# Prompt inputs the budget may shorten, lowest value first
+TRIM_ORDER = ('peers', 'news', 'company_profile', 'financials', 'history')
+
+# Decisions less confident than this are re-asked on the next model tier
+ESCALATE_CONFIDENCE = float(os.getenv('GOBLIN_ESCALATE_CONFIDENCE', 0.5))
+
+# Inputs of the decision and the share of confidence and position size taken
+# off when one is missing (peers are optional context)
+MISSING_INPUT_PENALTY = {
+    'technical_analysis': 0.3,
+    'data_collection': 0.1,
+    'news_intelligence': 0.2,
+    'peer_comparison': 0.0
+}
+
+# How missing inputs are named in the prompt
+INPUT_LABELS = {
+    'technical_analysis': 'technical indicators',
+    'data_collection': 'company profile and fundamentals',
+    'news_intelligence': 'news',
+    'peer_comparison': 'peer comparison'
+}
+
+# Keys of the portfolio manager's reply
+DECISION_SCHEMA = OutputSchema('portfolio_manager', (
+    OutputField('trading_signal', 'string', enum=('BUY', 'SELL', 'HOLD')),
+    OutputField('confidence_level', 'number', '0.1 to 1.0 in steps of 0.1'),
+    OutputField('position_size', 'integer', '10 to 100 in steps of 10')
+))
+
+
+def clamp_position(position):
+    """Round a position size down to a multiple of 10 within 10-100 (ints or NumPy arrays)."""
+    return np.clip((position // 10) * 10, 10, 100)
+
+
+def missing_inputs(results : Dict[str, Any]) -> List[str]:
+    """
+        Input stages without a successful result in results (keyed like the
+        state: '<stage>_results'). Optional stages (no penalty) only count
+        when they missed the deadline, not when there was nothing to find.
+    """
+    missing = []
+    for stage, penalty in MISSING_INPUT_PENALTY.items():
+        result = results.get(f"{stage}_results") or {}
+        if not result.get('success') and (penalty or result.get('missing')):
+            missing.append(stage)
+    return missing
+
+
+def discount_for_missing(decision : Dict[str, Any], missing : Optional[List[str]]) -> Dict[str, Any]:
+    """Scale confidence and position size down for each missing input."""
+    factor = 1 - sum(MISSING_INPUT_PENALTY[stage] for stage in missing or [])
+    if factor >= 1:
+        return decision
+    return {
+        **decision,
+        'confidence_level': max(0.1, round(decision['confidence_level'] * factor, 1)),
+        'position_size': int(clamp_position(int(decision['position_size'] * factor)))
+    }
+
+
+def _trim_levels(name: str, value: Any) -> list:
+    """Renderings of a trimmable prompt input, most detailed first."""
+    if name == 'news':
+        return [
+            lambda: value,
+            lambda: [{k: v for k, v in article.items() if k != 'top_point'} for article in value],
+            lambda: [{k: v for k, v in article.items() if k != 'top_point'} for article in value[:1]],
+            lambda: None
+        ]
+    if name == 'peers':
+        return [lambda: value, lambda: {k: v for k, v in value.items() if k != 'peer_median'}, lambda: None]
+    if name == 'company_profile':
+        return [lambda: value, lambda: {'name': value.get('name')}]
+    if name == 'financials':
+        return [lambda: value, lambda: dict(list(value.items())[:5])]
+    return [lambda: value]
+
+
+def build_portfolio_manager_prompt(prompt_input : Dict[str, Any], budget : Optional[int] = None):
+    """
+        Render the portfolio manager inputs compactly within a token budget.
+
+        Returns:
+            (template inputs as strings, estimated prompt tokens, trimmed input names)
+    """
+    budget = PM_PROMPT_TOKEN_BUDGET if budget is None else budget
+    fixed = {key: value for key, value in prompt_input.items() if key not in TRIM_ORDER}
+    trimmable = [PromptField(name, _trim_levels(name, prompt_input.get(name))) for name in TRIM_ORDER]
+    return fit_to_budget(PORTFOLIO_MANAGER_TEMPLATE, fixed, trimmable, budget or None)
+
+
+async def _decide_trading_signal(prompt_values : Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+        Ask the portfolio manager LLM for a decision and validate it.
+
+        The cheapest model tier decides first; a decision below
+        ESCALATE_CONFIDENCE is asked again one tier up, and that answer is
+        kept if it is valid.
+    """
+    messages = get_portfolio_manager_template().format_messages(**prompt_values)
+    router = get_model_router()
+
+    # JSON-constrained where the model supports it; missing fields are re-asked
+    async def decide(above : Optional[str] = None):
+        result, model = await router.run(
+            'portfolio_manager',
+            lambda llm: invoke_structured(llm, messages, DECISION_SCHEMA),
+            temperature=0.7,
+            max_tokens=1000,
+            above=above
+        )
+        return (normalize_trading_decision(result) if result else None), model
+
+    with span('llm:portfolio_manager'):
+        decision, model = await decide()
+        if decision and decision['confidence_level'] < ESCALATE_CONFIDENCE and not router.is_top('portfolio_manager', model):
+            print(f"{model} decided with confidence {decision['confidence_level']}, escalating")
+            workflow_metrics.increment("model_escalations:portfolio_manager")
+            escalated, _ = await decide(above=model)
+            decision = escalated or decision
+
+    return decision
+
+
+def normalize_trading_decision(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Validate a parsed decision and clamp confidence and position size."""
+    missing = DECISION_SCHEMA.missing(result)
+    if missing:
+        print(f"Missing or invalid {', '.join(field.name for field in missing)} in portfolio result")
+        print(f"Available keys: {list(result.keys())}")
+        return None
+
+    signal = str(result.get('trading_signal', '')).strip().upper()
+    try:
+        confidence = float(result.get('confidence_level', 0))
+        position = int(float(result.get('position_size', 0)))
+
+        # Validate and clamp values
+        confidence = max(0.1, min(1.0, round(confidence, 1)))
+        position = int(clamp_position(position))
+
+        return {
+            'trading_signal': signal,
+            'confidence_level': confidence,
+            'position_size': position
+        }
+
+    except (ValueError, TypeError) as e:
+        print(f"Invalid numeric values: {e}")
+        return None
 
 
 async def generate_trading_signal_with_prompts(
@@ -10,31 +178,32 @@ async def generate_trading_signal_with_prompts(
         tech_results: Optional[Dict[str, Any]],
         data_collection_results: Optional[Dict[str, Any]],
         news_data: Optional[Dict[str, Any]],
-        analysis_date: str
+        analysis_date: str,
+        peer_results: Optional[Dict[str, Any]] = None,
+        missing: Optional[List[str]] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Generate trading signal using proper Portfolio Manager prompts.
+
+    Inputs named in missing are left out of the prompt and listed as
+    unavailable; the rest are used as usual.
     """
     try:
-        # Get Groq API key
-        api_key = os.getenv('GROQ_API_KEY')
-
-        if not api_key:
+        if not groq_configured():
             print(f"No Groq API Key found")
             return None
-        
-        # LLM without structured output
-        llm = ChatGroq(
-            model='openai/gpt-oss-120b',
-            api_key=api_key,
-            temperature=0.7,
-            max_tokens=1000
-        )
 
-        # Get current price from technical data
-        indicators_data = tech_results.get('indicators', {})
-        technical_indicators = indicators_data.get('technical_indicators', {})
-        current_price = indicators_data.get('current_price', 0)
+        # Any of the inputs may be missing (failed or past the deadline)
+        tech_results = tech_results or {}
+        data_collection_results = data_collection_results or {}
+        news_data = news_data or {}
+        missing = missing or []
+        market_data = data_collection_results.get('market_data') or {}
+
+        # Get current price from technical data, else from the market data
+        indicators_data = tech_results.get('indicators') or {}
+        technical_indicators = indicators_data.get('technical_indicators') or {}
+        current_price = indicators_data.get('current_price') or market_data.get('current_price')
         sma = technical_indicators.get('SMA')
         ema = technical_indicators.get('EMA')
         rsi = technical_indicators.get('RSI')
@@ -52,28 +221,16 @@ async def generate_trading_signal_with_prompts(
         basic_financials_raw = data_collection_results.get('basic_financials', {})
         metrics = basic_financials_raw.get('metrics', {}) if basic_financials_raw else {}
         
-        essential_financials = {
-            'pe_ratio': metrics.get('peBasicExclExtraTTM'),
-            'pb_ratio': metrics.get('pbAnnual'),
-            'roe': metrics.get('roeRfy'),
-            'roa': metrics.get('roaRfy'),
-            'debt_equity': metrics.get('totalDebt/totalEquityAnnual'),
-            'current_ratio': metrics.get('currentRatioAnnual'),
-            'profit_margin': metrics.get('netProfitMarginTTM'),
-            'revenue_growth': metrics.get('revenueGrowthTTM'),
-            'eps': metrics.get('epsBasicExclExtraItemsTTM'),
-            'dividend_yield': metrics.get('dividendYieldIndicatedAnnual')
-        }
+        essential = essential_financials(metrics)
         
-        company_profile = data_collection_results.get('company_profile', {})
+        company_profile = data_collection_results.get('company_profile') or {}
         profile_data = {
             'name': company_profile.get('name', symbol),
             'industry': company_profile.get('industry', 'Unknown'),
             'market_cap': company_profile.get('market_cap', 0)
         }
 
-        market_data = data_collection_results.get('market_data', {})
-        price_data = market_data.get('price_data', {})
+        price_data = market_data.get('price_data') or {}
         
         historical_summary = {
             'prev_close': price_data.get('previous_close'),
@@ -81,7 +238,7 @@ async def generate_trading_signal_with_prompts(
             'change_pct': price_data.get('price_change_pct')
         }
         
-        news_features = news_data.get('nlp_features', {}).get('news_features', [])
+        news_features = (news_data.get('nlp_features') or {}).get('news_features', [])
         minimal_news = []
         for article in news_features[:2]:
             minimal_news.append({
@@ -101,88 +258,29 @@ async def generate_trading_signal_with_prompts(
             "bbands" : bbands,
             "adx" : adx,
             "cci" : cci,
-            "moving_average" : sma[0]/ema[0],
-            "financials": essential_financials,
+            "moving_average" : sma[0]/ema[0] if sma and ema and ema[0] else None,
+            "financials": essential,
+            "peers": peer_summary(peer_results),
             "company_profile": profile_data,
             "news": minimal_news,
             "history": historical_summary,
+            "missing_inputs": [INPUT_LABELS[stage] for stage in missing] or "none",
             "analysis_date": analysis_date
         }
 
-        # Get prompt template
-        prompt_template = get_portfolio_manager_template()
+        prompt_values, prompt_tokens, trimmed = build_portfolio_manager_prompt(prompt_input)
+        if trimmed:
+            print(f"portfolio prompt for {symbol} trimmed to ~{prompt_tokens} tokens : {', '.join(trimmed)}")
+            workflow_metrics.increment("prompt_trimmed:portfolio_manager")
 
-        # Create and execute chain (NO structured output)
-        chain = prompt_template | llm 
-        result = await chain.ainvoke(prompt_input)
-        
-        # Parse the result
-        if hasattr(result, 'content'):
-            result_content = result.content.strip()
-            
-            try:
-                # Extract JSON from response
-                if "```json" in result_content:
-                    start = result_content.find("```json") + 7
-                    end = result_content.find("```", start)
-                    json_str = result_content[start:end].strip() if end > start else result_content[start:].strip()
-                    result = json.loads(json_str)
-                elif "```" in result_content:
-                    start = result_content.find("```") + 3
-                    end = result_content.find("```", start)
-                    json_str = result_content[start:end].strip() if end > start else result_content[start:].strip()
-                    result = json.loads(json_str)
-                else:
-                    result = json.loads(result_content)
-                
-                # Normalize keys to handle any format
-                if isinstance(result, dict):
-                    normalized = {}
-                    for key, value in result.items():
-                        normalized_key = key.lower().replace(' ', '_').replace('-', '_')
-                        normalized[normalized_key] = value
-                    result = normalized
-                    print(f"Final Conclusion : {result}")
-                    
-            except json.JSONDecodeError as e:
-                print(f"Failed to parse LLM response: {e}")
-                return None
-        
-        # Validate result
-        if isinstance(result, dict):
-            required_fields = ['trading_signal', 'confidence_level', 'position_size']
-            
-            for field in required_fields:
-                if field not in result:
-                    print(f"Missing {field} in portfolio result")
-                    print(f"Available keys: {list(result.keys())}")
-                    return None
-            
-            signal = str(result.get('trading_signal', '')).upper()
-            if signal not in ['BUY', 'SELL', 'HOLD']:
-                print(f"Invalid trading signal: {signal}")
-                return None
-            
-            try:
-                confidence = float(result.get('confidence_level', 0))
-                position = int(result.get('position_size', 0))
-                
-                # Validate and clamp values
-                confidence = max(0.1, min(1.0, round(confidence, 1)))
-                position = max(10, min(100, (position // 10) * 10))
-                
-                return {
-                    'trading_signal': signal,
-                    'confidence_level': confidence,
-                    'position_size': position
-                }
-                
-            except (ValueError, TypeError) as e:
-                print(f"Invalid numeric values: {e}")
-                return None
-        else:
-            print(f"Invalid result format: {type(result)}")
-            return None
+        # Reuse the previous decision when the prompt inputs are unchanged
+        decision = await run_stage(
+            'portfolio_manager',
+            symbol,
+            fingerprint(prompt_values, get_model_router().tiers['portfolio_manager']),
+            lambda: _decide_trading_signal(prompt_values)
+        )
+        return discount_for_missing(decision, missing) if decision else None
 
     except Exception as e:
         print(f"Error generating trading signal for {symbol}: {e}")
@@ -196,15 +294,22 @@ async def analyze_protfolio(
         tech_results : Optional[Dict[str,Any]] = None,
         data_collection_result : Optional[Dict[str,Any]] = None,
         news_data : Optional[Dict[str,Any]] = None,
-        analysis_date : Optional[str] = None
+        analysis_date : Optional[str] = None,
+        peer_results : Optional[Dict[str,Any]] = None
 ) -> Dict[str,Any]:
     """
         Generate trading decision for a symbol based on technical and news data.
+
+        Inputs that failed or missed the deadline are listed in
+        missing_inputs; the decision is made without them and its
+        confidence and position size discounted (MISSING_INPUT_PENALTY).
+        Without technicals and market data there is no price to act on.
     
         Args:
             symbol: Stock symbol
             technical_data: Technical analysis from previous agent
             news_data: News intelligence from previous agent
+            peer_results: Peer comparison (optional)
             
         Returns:
             Dict with trading decision or error info
@@ -212,49 +317,53 @@ async def analyze_protfolio(
     try:
         symbol = symbol.upper()
 
-        # Validate and extract the actual data for symbol
-        if not tech_results or not tech_results.get('success'):
-            return {
-                'symbol': symbol,
-                'success': False,
-                'error': 'No valid technical analysis data provided'
-            }
-        
-        if not data_collection_result or not data_collection_result.get('success'):
-            return{
-                'symbol' : symbol,
-                'success' : False,
-                'error' : 'No valid companys data provided'
-            }
-        
-        if not news_data or not news_data.get('success'):
+        # Decide on whatever arrived; only a price is indispensable
+        missing = missing_inputs({
+            'technical_analysis_results': tech_results,
+            'data_collection_results': data_collection_result,
+            'news_intelligence_results': news_data,
+            'peer_comparison_results': peer_results
+        })
+        if 'technical_analysis' in missing and 'data_collection' in missing:
             return {
                 'symbol': symbol,
                 'success': False,
-                'error': 'No valid news intelligence data provided'
+                'error': 'No price data available (technical analysis and data collection both missing)',
+                'missing_inputs': missing
             }
-        
+        if missing:
+            print(f"Deciding {symbol} without : {', '.join(missing)}")
+            workflow_metrics.increment("degraded_decisions")
+
         # pass only the relevant data
         trading_decision = await generate_trading_signal_with_prompts(
             symbol, 
             tech_results,
             data_collection_result,
             news_data,
-            analysis_date
+            analysis_date,
+            peer_results,
+            missing
         )
         
         if trading_decision is None:
             return {
                 'symbol': symbol,
                 'success': False,
-                'error': 'Trading signal generation failed'
+                'error': 'Trading signal generation failed',
+                'missing_inputs': missing
             }
 
+        # Keep the decision for backtesting the LLM path (complete inputs only)
+        if not any(MISSING_INPUT_PENALTY[stage] for stage in missing):
+            record_decision(symbol, analysis_date, trading_decision)
+
         return {
             'symbol': symbol,
             'trading_signal': trading_decision.get('trading_signal'),
             'confidence_level': trading_decision.get('confidence_level'),
             'position_size': trading_decision.get('position_size'),
+            'missing_inputs': missing,
             'success': True
         }
                 
@@ -285,11 +394,12 @@ async def protfolio_manager_agent_node(state:AgentState)->AgentState:
         tech_results = state.get('technical_analysis_results',{})
         news_results = state.get('news_intelligence_results',{})
         data_collection_results = state.get('data_collection_results',{})
+        peer_results = state.get('peer_comparison_results')
 
         
 
         # Analysis protfolio 
-        analysis_result = await analyze_protfolio(symbol,tech_results,data_collection_results,news_results,analysis_date)
+        analysis_result = await analyze_protfolio(symbol,tech_results,data_collection_results,news_results,analysis_date,peer_results)
 
         all_results = {symbol: analysis_result}
         
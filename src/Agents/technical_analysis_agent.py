@@ -1,9 +1,48 @@
 from ..workflows.state import AgentState
 from typing import Optional,Dict,Any
-import pandas as pd
-from ..tools.technical_indicator_tool import calculate_technical_indicators
+from ..tools.technical_indicator_tool import calculate_technical_indicators,DEFAULT_INDICATORS
+from ..tools.bars import PriceBars
+from ..workflows.stage_cache import fingerprint, run_stage
 
-async def analyze_technical(symbol : str,analysis_date : str,market_data: Optional[Dict[str, Any]] = None)->Dict[str,Any]:
+
+async def _compute_technical(symbol : str,analysis_date : str,market_data : Dict[str, Any],indicators : list,timeframes : Optional[list] = None)->Dict[str,Any]:
+    """Run the indicator tool over the collected price history."""
+    # Columnar history goes straight to the tool (offloaded when large)
+    bars = PriceBars.coerce(market_data.get('historical_data'))
+    result = await calculate_technical_indicators(bars,symbol,analysis_date,indicators,timeframes)
+
+    if not result.success:
+        return{
+            'symbol':symbol,
+            'success' : False,
+            'error' : result.error or "Technical analysis failed"
+        }
+    
+    # Get current price from market data or last close price from filtered data
+    current_price = 0.0
+    if market_data and isinstance(market_data, dict) and 'current_price' in market_data:
+        current_price = market_data['current_price']
+    elif len(bars):
+        current_price = float(bars.close[-1])
+    
+    # Add current price to indicators
+    indicators_data = result.data if result.data else {}
+    indicators_data['current_price'] = current_price
+    
+    return {
+        'symbol': symbol,
+        'indicators': indicators_data,
+        'success': True
+    }
+
+
+async def analyze_technical(
+        symbol : str,
+        analysis_date : str,
+        market_data: Optional[Dict[str, Any]] = None,
+        extra_indicators : Optional[list] = None,
+        timeframes : Optional[list] = None
+)->Dict[str,Any]:
     """
     Calculate technical indicators for a symbol .
     
@@ -11,6 +50,8 @@ async def analyze_technical(symbol : str,analysis_date : str,market_data: Option
         symbol: Stock symbol (e.g., 'AAPL')
         analysis_date: Date for analysis in YYYY-MM-DD format
         market_data: Optional market data from previous agent
+        extra_indicators: Requests on top of the default set, e.g. ['SMA(200)', 'RSI(7)']
+        timeframes: Extra timeframes ('W', 'M') to calculate the indicators on
         
     Returns:
         Dict with technical indicators or error info
@@ -30,38 +71,25 @@ async def analyze_technical(symbol : str,analysis_date : str,market_data: Option
                 'error' : f"Insufficient historical data available upto {analysis_date}"
             }
         
-        # Calculate technical indicators with dedicated tools
-        indicators = ['SMA','EMA','RSI','MACD','BBANDS','ADX','CCI']
+        # The default set is always calculated since the portfolio manager reads it
+        indicators = DEFAULT_INDICATORS + [i for i in (extra_indicators or []) if i not in DEFAULT_INDICATORS]
 
-        # Ensure market_data is DataFrame
-        hist_data_df = pd.DataFrame(market_data.get('historical_data'))
-        result = await calculate_technical_indicators(hist_data_df,symbol,analysis_date,indicators)
+        # Skip recomputation when the price history hasn't changed
+        input_fingerprint = fingerprint(
+            market_data.get('historical_data'),
+            market_data.get('current_price'),
+            indicators,
+            timeframes,
+            analysis_date
+        )
+        return await run_stage(
+            'technical_analysis',
+            symbol,
+            input_fingerprint,
+            lambda: _compute_technical(symbol,analysis_date,market_data,indicators,timeframes),
+            is_valid=lambda output: output.get('success')
+        )
 
-        if not result.success:
-            return{
-                'symbol':symbol,
-                'success' : False,
-                'error' : result.error or "Technical analysis failed"
-            }
-        
-        # Get current price from market data or last close price from filtered data
-        current_price = 0.0
-        if market_data and isinstance(market_data, dict) and 'current_price' in market_data:
-            current_price = market_data['current_price']
-        elif not hist_data_df.empty:
-            current_price = float(hist_data_df['Close'].iloc[-1])
-        
-        # Add current price to indicators
-        indicators_data = result.data if result.data else {}
-        indicators_data['current_price'] = current_price
-        
-        return {
-            'symbol': symbol,
-            'indicators': indicators_data,
-            'success': True
-        }
-
-        
     except Exception as e:
         print(f"error in technical analysis for {symbol}")
         return {
@@ -90,7 +118,13 @@ async def technical_analysis_agent_node(state : AgentState) -> AgentState:
         market_data = data_collection_results.get('market_data') if data_collection_results else None
 
         # perform technical analysis with analysis date
-        result = await analyze_technical(symbol,analysis_date,market_data)
+        result = await analyze_technical(
+            symbol,
+            analysis_date,
+            market_data,
+            state.get('indicators'),
+            state.get('timeframes')
+        )
 
         # update state
         state['technical_analysis_results'] = result
@@ -0,0 +1,38 @@
+"""
+    Backtest signals over stored price history.
+
+    Usage:
+        python -m src.backtest AAPL MSFT NVDA [--period 10y] [--strategy rules|llm]
+                               [--short] [--cost-bps 5] [--hit-horizon 1]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from .engine import STRATEGIES, run_backtest
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--period", default="10y")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="rules")
+    parser.add_argument("--short", action="store_true", help="trade SELL signals as shorts")
+    parser.add_argument("--cost-bps", type=float, default=0.0)
+    parser.add_argument("--hit-horizon", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_backtest(
+        args.symbols,
+        period=args.period,
+        strategy=args.strategy,
+        allow_short=args.short,
+        cost_bps=args.cost_bps,
+        hit_horizon=args.hit_horizon
+    ))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
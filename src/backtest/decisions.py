@@ -0,0 +1,42 @@
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+from ..tools.cache import get_cache
+
+# Seconds a recorded portfolio manager decision is kept for backtesting
+DECISION_LOG_TTL = int(os.getenv('GOBLIN_DECISION_LOG_TTL', 5 * 365 * 24 * 3600))
+
+_NAMESPACE = 'decisions'
+
+
+def record_decision(symbol: str, analysis_date: Optional[str], decision: Dict[str, Any]) -> None:
+    """
+        Remember the LLM decision for symbol on analysis_date.
+
+        Decisions are stored per symbol as {date: decision}, so a backtest
+        reads one entry per symbol. Concurrent writers for the same symbol
+        may drop each other's newest date; the next analysis records it again.
+    """
+    if not analysis_date:
+        return
+    symbol = symbol.upper()
+    try:
+        cache = get_cache()
+        log = cache.get(_NAMESPACE, symbol) or {}
+        log[analysis_date] = {
+            'trading_signal': decision.get('trading_signal'),
+            'confidence_level': decision.get('confidence_level'),
+            'position_size': decision.get('position_size')
+        }
+        cache.set(_NAMESPACE, symbol, log, DECISION_LOG_TTL)
+    except sqlite3.Error as e:
+        print(f"decision log write failed for {symbol} : {e}")
+
+
+def load_decisions(symbol: str) -> Dict[str, Dict[str, Any]]:
+    """All recorded decisions for symbol, keyed by YYYY-MM-DD."""
+    try:
+        return get_cache().get(_NAMESPACE, symbol.upper()) or {}
+    except sqlite3.Error as e:
+        print(f"decision log read failed for {symbol} : {e}")
+        return {}
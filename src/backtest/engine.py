@@ -0,0 +1,235 @@
+import asyncio
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from ..tools.bars import PriceBars
+from .decisions import load_decisions
+from .signals import decision_signals, rule_based_signals
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Symbols whose history is downloaded at the same time
+BACKTEST_FETCH_CONCURRENCY = int(os.getenv('GOBLIN_BACKTEST_FETCH_CONCURRENCY', 8))
+
+STRATEGIES = ('rules', 'llm')
+
+
+def align_histories(histories: Dict[str, PriceBars]) -> Dict[str, Any]:
+    """
+        Put every symbol's bars on one shared calendar.
+
+        Returns the sorted union of timestamps plus (dates x symbols) close,
+        high and low frames. Gaps inside a symbol's history are forward
+        filled; bars before its first trade stay NaN.
+    """
+    symbols = [symbol for symbol, bars in histories.items() if bars is not None and len(bars)]
+    if not symbols:
+        raise ValueError("No price history to backtest")
+
+    timestamps = np.unique(np.concatenate([histories[symbol].timestamps for symbol in symbols]))
+    panel = np.full((3, len(timestamps), len(symbols)), np.nan)
+    for column, symbol in enumerate(symbols):
+        bars = histories[symbol]
+        rows = np.searchsorted(timestamps, bars.timestamps)
+        panel[0, rows, column] = bars.close
+        panel[1, rows, column] = bars.high
+        panel[2, rows, column] = bars.low
+
+    index = pd.DatetimeIndex(timestamps.astype('datetime64[s]'), name='Date')
+    close, high, low = (pd.DataFrame(layer, index=index, columns=symbols).ffill() for layer in panel)
+    return {'timestamps': timestamps, 'symbols': symbols, 'close': close, 'high': high, 'low': low}
+
+
+def simulate(
+        close: np.ndarray,
+        signal: np.ndarray,
+        position: np.ndarray,
+        allow_short: bool = False,
+        cost_bps: float = 0.0
+) -> Dict[str, np.ndarray]:
+    """
+        Vectorized position simulation over (dates x symbols) arrays.
+
+        A BUY on bar t targets position/100 of capital from the close of t,
+        a SELL targets the short side (or flat when shorting is off), and
+        HOLD or no signal keeps the previous exposure. Returns are earned
+        from bar t+1, so a signal never trades on its own bar's move.
+        cost_bps is charged on every change in exposure.
+    """
+    weight = position / 100.0
+    sell_weight = -weight if allow_short else np.zeros_like(weight)
+    with np.errstate(invalid='ignore'):
+        target = np.where(signal > 0, weight, np.where(signal < 0, sell_weight, np.nan))
+    exposure = pd.DataFrame(target).ffill().fillna(0.0).to_numpy()
+
+    asset_returns = np.zeros_like(close)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        asset_returns[1:] = close[1:] / close[:-1] - 1.0
+    asset_returns = np.nan_to_num(asset_returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+    held = np.zeros_like(exposure)
+    held[1:] = exposure[:-1]
+    turnover = np.abs(np.diff(exposure, axis=0, prepend=0.0))
+    returns = held * asset_returns - turnover * (cost_bps / 10_000)
+
+    return {'returns': returns, 'exposure': exposure, 'turnover': turnover, 'asset_returns': asset_returns}
+
+
+def hit_rate(close: np.ndarray, signal: np.ndarray, horizon: int = 1) -> Dict[str, np.ndarray]:
+    """Share of BUY/SELL signals whose direction matched the next `horizon` bars' move."""
+    forward = np.full_like(close, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        forward[:-horizon] = close[horizon:] / close[:-horizon] - 1.0
+        directional = (np.nan_to_num(signal) != 0) & ~np.isnan(forward)
+        hits = directional & (np.sign(forward) == signal)
+    calls = directional.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = np.where(calls > 0, hits.sum(axis=0) / np.maximum(calls, 1), np.nan)
+    return {'hit_rate': rate, 'signals': calls}
+
+
+def _performance(returns: np.ndarray, active_bars: np.ndarray) -> Dict[str, np.ndarray]:
+    """Return, volatility, Sharpe and drawdown per column of a (dates x n) returns array."""
+    equity = np.cumprod(1.0 + returns, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1.0
+    total = equity[-1] - 1.0
+    years = np.maximum(active_bars, 1) / TRADING_DAYS_PER_YEAR
+    mean = returns.mean(axis=0)
+    std = returns.std(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        annualized = np.where(total > -1.0, np.power(np.maximum(1.0 + total, 0.0), 1.0 / years) - 1.0, -1.0)
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS_PER_YEAR), np.nan)
+    return {
+        'total_return': total,
+        'annualized_return': annualized,
+        'annualized_volatility': std * np.sqrt(TRADING_DAYS_PER_YEAR),
+        'sharpe': sharpe,
+        'max_drawdown': drawdown.min(axis=0)
+    }
+
+
+def _rounded(value: Any) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+
+def backtest(
+        histories: Dict[str, PriceBars],
+        strategy: str = 'rules',
+        decisions: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+        allow_short: bool = False,
+        cost_bps: float = 0.0,
+        hit_horizon: int = 1
+) -> Dict[str, Any]:
+    """
+        Replay price histories and score the signals they would have produced.
+
+        Args:
+            histories: symbol -> daily PriceBars
+            strategy: 'rules' (indicator rules from the portfolio manager
+                      prompt, one signal per bar) or 'llm' (recorded
+                      portfolio manager decisions)
+            decisions: symbol -> {date: decision} for the 'llm' strategy
+            allow_short: Trade SELL signals as shorts instead of going flat
+            cost_bps: Cost in basis points per unit of exposure traded
+            hit_horizon: Bars ahead used to judge a signal's direction
+
+        Returns:
+            Dict with per-symbol and equal-weighted portfolio metrics
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+
+    aligned = align_histories(histories)
+    symbols = aligned['symbols']
+    close = aligned['close']
+    dates = np.datetime_as_string(aligned['timestamps'].astype('datetime64[s]'), unit='D').tolist()
+
+    if strategy == 'rules':
+        signal, position = rule_based_signals(close, aligned['high'], aligned['low'])
+    else:
+        signal, position = decision_signals(decisions or {}, dates, symbols)
+
+    prices = close.to_numpy()
+    simulation = simulate(prices, signal, position, allow_short, cost_bps)
+    hits = hit_rate(prices, signal, hit_horizon)
+
+    listed = ~np.isnan(prices)
+    active_bars = listed.sum(axis=0)
+    strategy_perf = _performance(simulation['returns'], active_bars)
+    buy_and_hold = _performance(simulation['asset_returns'], active_bars)['total_return']
+    trades = (simulation['turnover'] > 0).sum(axis=0)
+    exposure = np.abs(simulation['exposure']).sum(axis=0) / np.maximum(active_bars, 1)
+
+    per_symbol = {}
+    for column, symbol in enumerate(symbols):
+        per_symbol[symbol] = {
+            **{name: _rounded(values[column]) for name, values in strategy_perf.items()},
+            'buy_and_hold_return': _rounded(buy_and_hold[column]),
+            'hit_rate': _rounded(hits['hit_rate'][column]),
+            'signals': int(hits['signals'][column]),
+            'trades': int(trades[column]),
+            'average_exposure': _rounded(exposure[column]),
+            'bars': int(active_bars[column])
+        }
+
+    # Equal weight across the symbols trading on each bar
+    listed_count = listed.sum(axis=1)
+    portfolio_returns = np.where(
+        listed_count > 0,
+        np.where(listed, simulation['returns'], 0.0).sum(axis=1) / np.maximum(listed_count, 1),
+        0.0
+    )
+    portfolio_perf = _performance(portfolio_returns[:, None], np.array([len(dates)]))
+    all_calls = int(hits['signals'].sum())
+    portfolio_hits = np.nansum(hits['hit_rate'] * hits['signals'])
+
+    return {
+        'strategy': strategy,
+        'start': dates[0],
+        'end': dates[-1],
+        'bars': len(dates),
+        'allow_short': allow_short,
+        'cost_bps': cost_bps,
+        'portfolio': {
+            **{name: _rounded(values[0]) for name, values in portfolio_perf.items()},
+            'hit_rate': _rounded(portfolio_hits / all_calls) if all_calls else None,
+            'signals': all_calls
+        },
+        'symbols': per_symbol
+    }
+
+
+async def load_histories(symbols: List[str], period: str = '10y') -> Dict[str, PriceBars]:
+    """Fetch daily history for each symbol through the cached market data tool."""
+    from ..tools.yfinance_tool import get_market_data
+
+    today = date.today().isoformat()
+    semaphore = asyncio.Semaphore(BACKTEST_FETCH_CONCURRENCY)
+
+    async def fetch(symbol: str) -> Optional[PriceBars]:
+        async with semaphore:
+            result = await get_market_data(symbol, today, period)
+        if not result.success:
+            print(f"backtest : no history for {symbol} : {result.error}")
+            return None
+        return PriceBars.coerce(result.data.get('historical_data'))
+
+    symbols = [symbol.upper() for symbol in symbols]
+    histories = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+    return {symbol: bars for symbol, bars in zip(symbols, histories) if bars is not None}
+
+
+async def run_backtest(symbols: List[str], period: str = '10y', strategy: str = 'rules', **options) -> Dict[str, Any]:
+    """
+        Download history for symbols and backtest them.
+
+        The 'llm' strategy replays the decisions recorded by the portfolio
+        manager. options are passed to backtest().
+    """
+    histories = await load_histories(symbols, period)
+    if strategy == 'llm' and 'decisions' not in options:
+        options['decisions'] = {symbol: load_decisions(symbol) for symbol in histories}
+    return await asyncio.to_thread(backtest, histories, strategy, **options)
@@ -0,0 +1,76 @@
+from typing import Any, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from ..tools.indicator_registry import IndicatorContext
+from ..Agents.portfolio_manager_agent import clamp_position
+
+# RSI thresholds from the portfolio manager prompt
+RSI_OVERSOLD = 40
+RSI_OVERBOUGHT = 60
+
+# Position size by how strongly RSI, MACD and trend agree, following the
+# prompt's sizing table (conflicting / moderate / strong alignment)
+ALIGNMENT_POSITION = {1: 30, 2: 50, 3: 80}
+
+_SIGNAL_VALUES = {'BUY': 1.0, 'SELL': -1.0, 'HOLD': 0.0}
+
+
+def rule_based_signals(close: pd.DataFrame, high: pd.DataFrame, low: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Per-bar signals for every symbol from the prompt's technical rules.
+
+        Each of RSI (below 40 / above 60), MACD histogram sign and price vs
+        SMA votes +1, -1 or 0; the sign of the total is the signal and its
+        size picks the position. Indicators use the registry formulas on
+        (dates x symbols) frames, so all symbols are evaluated at once.
+
+        Returns:
+            (signal, position) arrays shaped (dates, symbols): signal is
+            1 (BUY), -1 (SELL), 0 (HOLD) or NaN during indicator warm-up;
+            position is the clamped position size in percent
+    """
+    ctx = IndicatorContext.from_columns(close, high, low)
+    rsi = ctx.get('RSI').to_numpy()
+    histogram = ctx.get('MACD')['histogram'].to_numpy()
+    sma = ctx.get('SMA').to_numpy()
+    price = close.to_numpy()
+
+    with np.errstate(invalid='ignore'):
+        rsi_vote = (rsi < RSI_OVERSOLD).astype(np.float64) - (rsi > RSI_OVERBOUGHT)
+        score = rsi_vote + np.sign(histogram) + np.sign(price - sma)
+
+    ready = ~(np.isnan(rsi) | np.isnan(histogram) | np.isnan(sma) | np.isnan(price))
+    signal = np.where(ready, np.sign(score), np.nan)
+
+    alignment = np.abs(np.nan_to_num(score)).astype(np.int64)
+    lookup = np.zeros(4)
+    for votes, size in ALIGNMENT_POSITION.items():
+        lookup[votes] = size
+    position = clamp_position(lookup[alignment])
+    return signal, position
+
+
+def decision_signals(
+        decisions: Dict[str, Dict[str, Dict[str, Any]]],
+        dates: List[str],
+        symbols: List[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Signal/position arrays from recorded LLM decisions.
+
+        Bars without a recorded decision are NaN (keep the previous
+        position), the same as the warm-up bars of the rule-based path.
+    """
+    signal = np.full((len(dates), len(symbols)), np.nan)
+    position = np.full((len(dates), len(symbols)), 10.0)
+    row_of = {date: row for row, date in enumerate(dates)}
+
+    for column, symbol in enumerate(symbols):
+        for date, decision in (decisions.get(symbol) or {}).items():
+            row = row_of.get(date)
+            value = _SIGNAL_VALUES.get(str(decision.get('trading_signal', '')).upper())
+            if row is None or value is None:
+                continue
+            signal[row, column] = value
+            position[row, column] = decision.get('position_size') or 10
+    return signal, clamp_position(position)
@@ -0,0 +1,274 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+import numpy as np
+from ..backtest.decisions import load_decisions
+from ..backtest.engine import TRADING_DAYS_PER_YEAR, align_histories, load_histories
+from ..backtest.signals import rule_based_signals
+from ..tools.yfinance_tool import history_period_for
+
+# Annualized volatility the allocation is scaled to (capped by MAX_GROSS_EXPOSURE)
+TARGET_VOLATILITY = float(os.getenv('GOBLIN_PORTFOLIO_TARGET_VOL', 0.10))
+MAX_GROSS_EXPOSURE = float(os.getenv('GOBLIN_PORTFOLIO_MAX_GROSS', 1.0))
+
+# Upper bound on names in one request
+MAX_PORTFOLIO_SYMBOLS = int(os.getenv('GOBLIN_PORTFOLIO_MAX_SYMBOLS', 500))
+
+# Fewer daily returns than this and a symbol is left out
+MIN_OBSERVATIONS = 20
+
+# Weight moved from the sample correlations to the identity; pairwise
+# estimates over hundreds of names are noisy and not always positive definite
+CORRELATION_SHRINKAGE = 0.1
+
+SIGNAL_SOURCES = ('llm', 'rules')
+
+_SIGNAL_DIRECTIONS = {'BUY': 1.0, 'SELL': -1.0, 'HOLD': 0.0}
+
+
+def risk_metrics(returns: np.ndarray, shrinkage: float = CORRELATION_SHRINKAGE) -> Dict[str, np.ndarray]:
+    """
+        Annualized covariance, volatilities and correlations of daily returns.
+
+        returns is (dates x symbols) and may contain NaN where a symbol did
+        not trade; every pair uses the dates both symbols have. Correlations
+        are shrunk towards the identity and the covariance is rebuilt from
+        them and clipped to be positive semi-definite.
+    """
+    mask = ~np.isnan(returns)
+    counts = mask.sum(axis=0)
+    means = np.nansum(returns, axis=0) / np.maximum(counts, 1)
+    centered = np.where(mask, returns - means, 0.0)
+
+    present = mask.astype(np.float64)
+    pair_counts = present.T @ present
+    covariance = (centered.T @ centered) / np.maximum(pair_counts - 1, 1) * TRADING_DAYS_PER_YEAR
+
+    volatility = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+    scale = np.outer(volatility, volatility)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = np.where(scale > 0, covariance / scale, 0.0)
+    correlation = np.clip(correlation, -1.0, 1.0)
+    correlation = (1.0 - shrinkage) * correlation + shrinkage * np.eye(len(volatility))
+    np.fill_diagonal(correlation, 1.0)
+
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    if eigenvalues.min() < 1e-10:
+        correlation = (eigenvectors * np.clip(eigenvalues, 1e-10, None)) @ eigenvectors.T
+        diagonal = np.sqrt(np.diag(correlation))
+        correlation = correlation / np.outer(diagonal, diagonal)
+
+    return {
+        'covariance': correlation * scale,
+        'volatility': volatility,
+        'correlation': correlation
+    }
+
+
+def risk_budget_weights(covariance: np.ndarray, budgets: np.ndarray, max_iter: int = 100, tol: float = 1e-9) -> np.ndarray:
+    """
+        Long weights whose risk contributions are proportional to budgets.
+
+        Solves x_i * (covariance @ x)_i = b_i by Newton's method on the
+        convex objective 0.5 x'Cx - sum(b log x), halving steps to keep x
+        positive. Each step is one n x n linear solve, so a few hundred
+        names take milliseconds. Weights sum to 1.
+    """
+    budgets = budgets / budgets.sum()
+    x = budgets / np.sqrt(np.diag(covariance))
+    x /= np.sqrt(x @ covariance @ x)
+
+    for _ in range(max_iter):
+        marginal = covariance @ x
+        gradient = marginal - budgets / x
+        if np.max(np.abs(x * marginal - budgets)) < tol:
+            break
+        hessian = covariance + np.diag(budgets / x ** 2)
+        step = np.linalg.solve(hessian, gradient)
+        t = 1.0
+        while np.any(x - t * step <= 0):
+            t *= 0.5
+        x = x - t * step
+    return x / x.sum()
+
+
+def check_risk_limits(target_volatility: float, max_gross: float) -> None:
+    """
+        Raises:
+            ValueError: a non-positive target volatility or gross exposure
+                        (a negative one would flip every position's side)
+    """
+    if not target_volatility > 0:
+        raise ValueError(f"target_volatility must be positive, got {target_volatility}")
+    if not max_gross > 0:
+        raise ValueError(f"max_gross must be positive, got {max_gross}")
+
+
+def allocate(
+        symbols: List[str],
+        returns: np.ndarray,
+        directions: np.ndarray,
+        position_sizes: np.ndarray,
+        target_volatility: float = TARGET_VOLATILITY,
+        max_gross: float = MAX_GROSS_EXPOSURE,
+        allow_short: bool = False
+) -> Dict[str, Any]:
+    """
+        Turn per-symbol signals into one risk-budgeted allocation.
+
+        Each BUY (or SELL, when shorting is allowed) gets a risk budget
+        proportional to its position_size, so conviction sets how much of
+        the portfolio's risk a name carries rather than its raw weight:
+        a volatile or highly correlated name gets less capital for the
+        same budget. The book is then scaled to target_volatility without
+        exceeding max_gross exposure.
+
+        Args:
+            symbols: Column names of returns
+            returns: (dates x symbols) daily returns, NaN where missing
+            directions: 1 (BUY), -1 (SELL) or 0 (HOLD) per symbol
+            position_sizes: Position size in percent per symbol (10-100)
+
+        Returns:
+            Dict with weights and risk contributions per symbol and
+            portfolio-level risk figures
+
+        Raises:
+            ValueError: target_volatility or max_gross not positive
+    """
+    check_risk_limits(target_volatility, max_gross)
+    metrics = risk_metrics(returns)
+    volatility = metrics['volatility']
+    observations = (~np.isnan(returns)).sum(axis=0)
+
+    if not allow_short:
+        directions = np.where(directions < 0, 0.0, directions)
+    active = (directions != 0) & (volatility > 0) & (observations >= MIN_OBSERVATIONS)
+
+    weights = np.zeros(len(symbols))
+    contributions = np.zeros(len(symbols))
+    portfolio_volatility = 0.0
+
+    if active.any():
+        signed = metrics['covariance'][np.ix_(active, active)] * np.outer(directions[active], directions[active])
+        raw = risk_budget_weights(signed, position_sizes[active] / 100.0)
+
+        gross_volatility = np.sqrt(raw @ signed @ raw)
+        scale = min(max_gross, target_volatility / gross_volatility) if gross_volatility > 0 else max_gross
+        weights[active] = directions[active] * raw * scale
+
+        covariance = metrics['covariance'][np.ix_(active, active)]
+        portfolio_variance = weights[active] @ covariance @ weights[active]
+        portfolio_volatility = float(np.sqrt(portfolio_variance))
+        if portfolio_variance > 0:
+            contributions[active] = weights[active] * (covariance @ weights[active]) / portfolio_variance
+
+    n = len(symbols)
+    off_diagonal = metrics['correlation'][~np.eye(n, dtype=bool)]
+    per_symbol = {}
+    for column, symbol in enumerate(symbols):
+        per_symbol[symbol] = {
+            'direction': int(directions[column]),
+            'position_size': int(position_sizes[column]),
+            'weight': round(float(weights[column]), 4),
+            'risk_contribution': round(float(contributions[column]), 4),
+            'volatility': round(float(volatility[column]), 4),
+            'observations': int(observations[column])
+        }
+
+    return {
+        'symbols': per_symbol,
+        'portfolio': {
+            'expected_volatility': round(portfolio_volatility, 4),
+            'gross_exposure': round(float(np.abs(weights).sum()), 4),
+            'net_exposure': round(float(weights.sum()), 4),
+            'average_correlation': round(float(off_diagonal.mean()), 4) if n > 1 else None,
+            'positions': int((weights != 0).sum())
+        },
+        'correlation': metrics['correlation']
+    }
+
+
+def _latest_decision(symbol: str) -> Optional[Dict[str, Any]]:
+    decisions = load_decisions(symbol)
+    if not decisions:
+        return None
+    return decisions[max(decisions)]
+
+
+async def build_portfolio(
+        symbols: List[str],
+        signal_source: str = 'llm',
+        lookback: int = TRADING_DAYS_PER_YEAR,
+        target_volatility: float = TARGET_VOLATILITY,
+        max_gross: float = MAX_GROSS_EXPOSURE,
+        allow_short: bool = False,
+        include_correlation: bool = False
+) -> Dict[str, Any]:
+    """
+        Allocate across many symbols from their signals and return history.
+
+        Signals come from the latest recorded portfolio manager decision
+        ('llm') or the rule-based technical signal on the last bar
+        ('rules'); symbols without a recorded decision fall back to rules.
+        Returns are the last `lookback` daily closes from the market data tool.
+
+        Raises:
+            ValueError: no symbols, too many symbols, unknown signal_source,
+                        a lookback under 2 days or non-positive risk limits
+    """
+    symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols if symbol.strip()))
+    if not symbols:
+        raise ValueError("No symbols given")
+    if len(symbols) > MAX_PORTFOLIO_SYMBOLS:
+        raise ValueError(f"At most {MAX_PORTFOLIO_SYMBOLS} symbols per portfolio")
+    if signal_source not in SIGNAL_SOURCES:
+        raise ValueError(f"Unknown signal_source {signal_source!r}, expected one of {SIGNAL_SOURCES}")
+    if lookback < 2:
+        raise ValueError(f"lookback must be at least 2 days, got {lookback}")
+    check_risk_limits(target_volatility, max_gross)
+
+    histories = await load_histories(symbols, history_period_for(lookback))
+    missing = [symbol for symbol in symbols if symbol not in histories]
+    if not histories:
+        raise ValueError("No price history available for any symbol")
+
+    decisions = {}
+    if signal_source == 'llm':
+        decisions = {symbol: _latest_decision(symbol) for symbol in histories}
+
+    def compute() -> Dict[str, Any]:
+        aligned = align_histories(histories)
+        names = aligned['symbols']
+        close = aligned['close'].iloc[-(lookback + 1):]
+
+        rule_signal, rule_position = rule_based_signals(aligned['close'], aligned['high'], aligned['low'])
+        directions = np.nan_to_num(rule_signal[-1])
+        position_sizes = rule_position[-1].astype(np.float64)
+        sources = ['rules'] * len(names)
+
+        for column, symbol in enumerate(names):
+            decision = decisions.get(symbol)
+            direction = _SIGNAL_DIRECTIONS.get(str((decision or {}).get('trading_signal', '')).upper())
+            if direction is not None:
+                directions[column] = direction
+                position_sizes[column] = decision.get('position_size') or 10
+                sources[column] = 'llm'
+
+        prices = close.to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = prices[1:] / prices[:-1] - 1.0
+
+        result = allocate(names, returns, directions, position_sizes, target_volatility, max_gross, allow_short)
+        for symbol, source in zip(names, sources):
+            result['symbols'][symbol]['signal_source'] = source
+
+        correlation = result.pop('correlation')
+        if include_correlation:
+            result['correlation'] = {'symbols': names, 'matrix': np.round(correlation, 4).tolist()}
+        return result
+
+    result = await asyncio.to_thread(compute)
+    result['missing'] = missing
+    result['lookback'] = lookback
+    return result
@@ -0,0 +1,144 @@
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Pieces a GPT-style BPE tokenizer splits text into before merging: words
+# (with their leading space), numbers in groups of up to 3 digits, runs of
+# punctuation, and whitespace
+_PIECES = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+")
+
+
+def count_tokens(text: str) -> int:
+    """
+        Local estimate of the tokens a GPT-style BPE tokenizer produces.
+
+        Needs no tokenizer files or network. Common words and short numbers
+        are one token, long words a token per ~6 letters, punctuation about
+        one per 2 characters and non-ASCII symbols one each. Good to about
+        10% on English prompts and compact data, which is enough to budget
+        prompts and compare renderings.
+    """
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        stripped = piece.strip()
+        if not stripped:
+            tokens += 1
+        elif stripped[0].isalpha():
+            tokens += 1 if len(stripped) <= 8 else math.ceil(len(stripped) / 6)
+        elif stripped[0].isdigit():
+            tokens += 1
+        else:
+            ascii_chars = sum(1 for char in stripped if ord(char) < 128)
+            tokens += math.ceil(ascii_chars / 2) + (len(stripped) - ascii_chars)
+    return tokens
+
+
+def _number(value: float) -> str:
+    if not math.isfinite(value):
+        return "n/a"
+    if abs(value) >= 1000:
+        return str(int(round(value)))
+    text = f"{value:.4f}".rstrip('0').rstrip('.')
+    return "0" if text == "-0" else text
+
+
+def render(value: Any) -> str:
+    """
+        Compact, canonical text for a prompt input.
+
+        Floats get at most 4 decimals (none from 1000 up), one-element
+        lists like [round(x, 4)] become the bare value, dicts become
+        "key=value, ..." with missing values left out (nested ones in
+        parentheses), and lists of dicts one "- ..." line per item. The same
+        input always renders the same.
+    """
+    if value is None:
+        return "n/a"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return _number(value)
+    if isinstance(value, str):
+        return " ".join(value.split()) or "n/a"
+    if hasattr(value, 'item') and not isinstance(value, (list, tuple, dict)):
+        # NumPy scalars
+        return render(value.item())
+    if isinstance(value, dict):
+        parts = [
+            f"{key}=({render(item)})" if isinstance(item, dict) else f"{key}={render(item)}"
+            for key, item in value.items() if item is not None and item != [] and item != {}
+        ]
+        return ", ".join(parts) or "n/a"
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return "n/a"
+        if len(value) == 1 and not isinstance(value[0], (dict, list, tuple)):
+            return render(value[0])
+        if any(isinstance(item, dict) for item in value):
+            return "\n".join(f"- {render(item)}" for item in value)
+        return "[" + ", ".join(render(item) for item in value) + "]"
+    return str(value)
+
+
+def compact_template(template: str) -> str:
+    """Strip the indentation and blank-line padding of a prompt template."""
+    lines = [line.strip() for line in template.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+class PromptField:
+    """
+        One prompt input and its renderings from most to least detailed.
+
+        levels are callables returning the value to render, so a cheaper
+        rendering is only built when the budget needs it.
+    """
+
+    def __init__(self, name: str, levels: Sequence[Callable[[], Any]]):
+        self.name = name
+        self.levels = list(levels)
+        self.level = 0
+
+    @property
+    def text(self) -> str:
+        return render(self.levels[self.level]())
+
+    def trim(self) -> bool:
+        """Step down to the next cheaper rendering; False when there is none."""
+        if self.level + 1 >= len(self.levels):
+            return False
+        self.level += 1
+        return True
+
+
+def fit_to_budget(
+        template: str,
+        fixed: Dict[str, Any],
+        trimmable: List[PromptField],
+        budget: Optional[int]
+    ) -> Tuple[Dict[str, str], int, List[str]]:
+    """
+        Render prompt inputs so the formatted template fits a token budget.
+
+        Fixed inputs are always rendered in full. Trimmable ones are listed
+        lowest value first; while the prompt is over budget the first field
+        that still has a cheaper rendering is stepped down. If everything is
+        trimmed and the prompt is still over, it is sent as is.
+
+        Returns:
+            (rendered inputs, estimated prompt tokens, names of trimmed fields)
+    """
+    rendered = {name: render(value) for name, value in fixed.items()}
+    trimmed: List[str] = []
+    while True:
+        values = {**rendered, **{field.name: field.text for field in trimmable}}
+        tokens = count_tokens(template.format(**values))
+        if budget is None or tokens <= budget:
+            return values, tokens, trimmed
+        field = next((field for field in trimmable if field.trim()), None)
+        if field is None:
+            return values, tokens, trimmed
+        if field.name not in trimmed:
+            trimmed.append(field.name)
@@ -1,4 +1,5 @@
 from langchain_core.prompts import ChatPromptTemplate
+from .compact import compact_template
 # from langchain.output_parsers import StructuredOutputParser, ResponseSchema
 
 def news_feature_analyze_template()->ChatPromptTemplate:
@@ -41,14 +42,12 @@ def news_feature_analyze_template()->ChatPromptTemplate:
                         "category": "earnings | product | regulatory | litigation | macro | management | competitive | analyst_ratings | supply_chain | other"
                     }}
                 """
-    return ChatPromptTemplate.from_template(template)
+    return ChatPromptTemplate.from_template(compact_template(template))
 
 
-def get_portfolio_manager_template() -> ChatPromptTemplate:
-    """
-    Portfolio Manager with balanced decision-making focused on actionable signals.
-    """
-    template = """You are an aggressive quantitative portfolio manager making decisive trading decisions.
+# Portfolio Manager with balanced decision-making focused on actionable signals.
+# Inputs arrive pre-rendered by prompts.compact (see build_portfolio_manager_prompt).
+PORTFOLIO_MANAGER_TEMPLATE = compact_template("""You are an aggressive quantitative portfolio manager making decisive trading decisions.
 
                 [ANALYSIS DATE: {analysis_date}]
                 [SYMBOL: {symbol}]
@@ -64,13 +63,19 @@ def get_portfolio_manager_template() -> ChatPromptTemplate:
                 [FUNDAMENTAL METRICS]
                 {financials}
 
+                [PEER COMPARISON] (percentile vs industry peers, 100 = highest value in the peer set)
+                {peers}
+
                 [NEWS SENTIMENT & KEY DEVELOPMENTS]
                 {news}
 
                 [RECENT PRICE ACTION]
                 {history}
 
-                ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+                [UNAVAILABLE INPUTS] (did not arrive in time for this decision)
+                {missing_inputs}
+
+                ---
 
                 [TRADING DECISION FRAMEWORK]
 
@@ -134,14 +139,15 @@ def get_portfolio_manager_template() -> ChatPromptTemplate:
                 - 0.2-0.3: Weak signals, low conviction
                 - 0.1: Truly ambiguous (rare, use HOLD)
 
-                ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+                ---
 
                 [CRITICAL REQUIREMENTS]
                 1. Be DECISIVE - HOLD should be rare (<15% of cases)
                 2. Weight technicals heavily - they predict short-term moves
                 3. News adds conviction - use it to adjust position size and confidence
                 4. When uncertain between BUY/SELL, choose based on dominant signal
-                5. Return ONLY valid JSON with exact lowercase keys using underscores
+                5. If inputs are unavailable, decide on the rest and lower confidence for each missing one
+                6. Return ONLY valid JSON with exact lowercase keys using underscores
 
                 [OUTPUT FORMAT]
                 Return ONLY this JSON (no markdown, no extra text):
@@ -154,9 +160,12 @@ def get_portfolio_manager_template() -> ChatPromptTemplate:
                 Valid signals: BUY, SELL, HOLD
                 Valid confidence: 0.1 to 1.0 (steps of 0.1)
                 Valid position: 10 to 100 (steps of 10)
-                """
+                """)
+
 
-    return ChatPromptTemplate.from_template(template)
+def get_portfolio_manager_template() -> ChatPromptTemplate:
+    """Portfolio manager prompt; fill it with the inputs from build_portfolio_manager_prompt()."""
+    return ChatPromptTemplate.from_template(PORTFOLIO_MANAGER_TEMPLATE)
 
 
 # def get_structured_output_parser():
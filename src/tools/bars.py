@@ -0,0 +1,151 @@
+import hashlib
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# Row order of the OHLCV matrix
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class PriceBars:
+    """
+        Compact columnar OHLCV history.
+
+        Prices and volume live in one C-contiguous (5, n) float64 matrix, so
+        every column is a contiguous array and the transposed matrix is
+        exactly the memory layout pandas uses for a single float block.
+        to_dataframe() therefore wraps the buffer without copying it.
+        Timestamps are an int64 array of epoch seconds in exchange-local time.
+
+        The object is passed through AgentState as-is (no per-row dicts) and
+        pickles as two raw buffers, which keeps checkpointing cheap.
+    """
+
+    __slots__ = ('values', 'timestamps')
+
+    def __init__(self, values: np.ndarray, timestamps: np.ndarray):
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        if values.ndim != 2 or values.shape[0] != len(COLUMNS) or values.shape[1] != len(timestamps):
+            raise ValueError(f"Expected a ({len(COLUMNS)}, {len(timestamps)}) value matrix, got {values.shape}")
+        self.values = values
+        self.timestamps = timestamps
+
+    # --- construction ---
+
+    @classmethod
+    def from_dataframe(cls, df) -> 'PriceBars':
+        """Build from a yfinance-style DataFrame with a DatetimeIndex and OHLCV columns."""
+        index = df.index
+        if getattr(index, 'tz', None) is not None:
+            index = index.tz_localize(None)
+        timestamps = index.values.astype('datetime64[s]').astype(np.int64)
+
+        values = np.empty((len(COLUMNS), len(df)), dtype=np.float64)
+        for row, column in enumerate(COLUMNS):
+            values[row] = df[column].to_numpy(dtype=np.float64)
+        return cls(values, timestamps)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'PriceBars':
+        """Build from the legacy list of {'Date': 'YYYY-MM-DD', 'Open': ...} dicts."""
+        timestamps = np.array([record['Date'] for record in records], dtype='datetime64[s]').astype(np.int64)
+        values = np.array([[record[column] for record in records] for column in COLUMNS], dtype=np.float64)
+        return cls(values.reshape(len(COLUMNS), len(records)), timestamps)
+
+    @classmethod
+    def coerce(cls, history: Any) -> Optional['PriceBars']:
+        """Accept PriceBars, legacy records or None."""
+        if history is None or isinstance(history, cls):
+            return history
+        return cls.from_records(history)
+
+    # --- column access (views, never copies) ---
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.values[0]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.values[1]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.values[2]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.values[3]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.values[4]
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, key: slice) -> 'PriceBars':
+        """Slicing returns a view sharing the same buffers."""
+        if not isinstance(key, slice):
+            raise TypeError("PriceBars only supports slicing")
+        view = object.__new__(PriceBars)
+        view.values = self.values[:, key]
+        view.timestamps = self.timestamps[key]
+        return view
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.timestamps.nbytes
+
+    def dates(self, unit: str = 'D') -> np.ndarray:
+        """Timestamps as ISO strings ('D' -> YYYY-MM-DD, 'm' -> minutes)."""
+        return np.datetime_as_string(self.timestamps.astype('datetime64[s]'), unit=unit)
+
+    # --- conversion ---
+
+    def to_dataframe(self):
+        """DataFrame view over the same buffer (no copy of the price data)."""
+        import pandas as pd
+        index = pd.DatetimeIndex(self.timestamps.astype('datetime64[s]'), name='Date')
+        return pd.DataFrame(self.values.T, index=index, columns=list(COLUMNS), copy=False)
+
+    def to_records(self, unit: str = 'D') -> List[Dict[str, Any]]:
+        """Legacy list-of-dicts form, for JSON output ('m' dates intraday bars to the minute)."""
+        dates = self.dates(unit)
+        rows = self.values.T.tolist()
+        return [
+            {'Date': date, **dict(zip(COLUMNS, row))}
+            for date, row in zip(dates.tolist(), rows)
+        ]
+
+    def fingerprint(self) -> str:
+        """Hash of the raw buffers, used by the stage cache."""
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(self.timestamps).data)
+        digest.update(np.ascontiguousarray(self.values).data)
+        return digest.hexdigest()
+
+    # --- serialization ---
+
+    def to_bytes(self) -> bytes:
+        """Length-prefixed raw buffers: int64 n, timestamps, values."""
+        values = np.ascontiguousarray(self.values)
+        timestamps = np.ascontiguousarray(self.timestamps)
+        return np.int64(len(timestamps)).tobytes() + timestamps.tobytes() + values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> 'PriceBars':
+        n = int(np.frombuffer(payload, dtype=np.int64, count=1)[0])
+        # Read-only views over the payload, no copy
+        timestamps = np.frombuffer(payload, dtype=np.int64, count=n, offset=8)
+        values = np.frombuffer(payload, dtype=np.float64, count=len(COLUMNS) * n, offset=8 + 8 * n)
+        return cls(values.reshape(len(COLUMNS), n), timestamps)
+
+    def __reduce__(self):
+        return (PriceBars.from_bytes, (self.to_bytes(),))
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "PriceBars(0 bars)"
+        dates = self.dates()
+        return f"PriceBars({len(self)} bars, {dates[0]} to {dates[-1]})"
@@ -0,0 +1,388 @@
+import asyncio
+import contextvars
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+from . import replay
+from .utils import ToolResult
+from ..workflows import metrics
+from ..workflows import tracing
+
+# Per-user directory of the SQLite state files. Cached values are unpickled
+# on read, so it is created private (0700) rather than shared like the temp dir.
+STATE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'goblin')
+
+# Shared state lives in one SQLite file so every uvicorn worker on the host
+# sees the same cached responses and rate-limit buckets.
+STATE_DB_PATH = os.getenv('GOBLIN_STATE_DB', os.path.join(STATE_DIR, 'state.sqlite3'))
+
+# "sqlite" (shared across processes) or "memory" (per process)
+CACHE_BACKEND = os.getenv('GOBLIN_CACHE_BACKEND', 'sqlite')
+
+# Long-lived store for fundamentals and company profiles; unlike the
+# response cache it is kept out of the temp dir so it survives restarts
+# (and next to the fixtures when recording or replaying)
+FUNDAMENTALS_DB_PATH = os.getenv('GOBLIN_FUNDAMENTALS_DB') or (
+    replay.state_path('fundamentals.sqlite3') if replay.REPLAY_MODE != 'off'
+    else os.path.join(STATE_DIR, 'fundamentals.sqlite3')
+)
+
+# Seconds one process may hold the right to refresh a stale entry
+REFRESH_LEASE_SECONDS = 60
+
+# Remove expired rows every N writes
+_PURGE_EVERY = 500
+
+_local = threading.local()
+
+
+def private_directory(path: str) -> None:
+    """Create a directory (and its parents) only this user can access."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+
+
+def get_connection(path: str = None) -> sqlite3.Connection:
+    """
+        Get this thread's connection to the shared state database.
+
+        Connections are opened in WAL mode so readers never block the single
+        writer, with a busy timeout so concurrent writers from other
+        processes wait instead of failing.
+    """
+    path = path or STATE_DB_PATH
+    connections = getattr(_local, 'connections', None)
+    if connections is None or _local.pid != os.getpid():
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+
+    conn = connections.get(path)
+    if conn is None:
+        private_directory(os.path.dirname(os.path.abspath(path)))
+        conn = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        connections[path] = conn
+    return conn
+
+
+class MemoryCache:
+    """In-process TTL cache with the same interface as SharedCache."""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+        if entry is None or entry[1] < time.time():
+            return default
+        return entry[0]
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[(namespace, key)] = (value, time.time() + ttl)
+
+    def add(self, namespace: str, key: str, value: Any, ttl: float) -> bool:
+        """Set the value only if the key is absent or expired. Returns True if set."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is not None and entry[1] >= now:
+                return False
+            self._entries[(namespace, key)] = (value, now + ttl)
+            return True
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for entry_key in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[entry_key]
+
+
+class SharedCache:
+    """
+        TTL cache stored in SQLite (WAL mode), shared by all processes on the host.
+
+        Values are pickled, so anything the tools return (ToolResult, dicts,
+        bar containers) can be stored. Only point it at a file other users
+        cannot write (see STATE_DIR).
+
+        Calls block while another process holds the write lock (up to the
+        busy timeout); async code goes through _call().
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or STATE_DB_PATH
+        self._writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        return get_connection(self.path)
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return default
+        return pickle.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, payload, time.time() + ttl)
+        )
+        self._writes += 1
+        if self._writes % _PURGE_EVERY == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def add(self, namespace: str, key: str, value: Any, ttl: float) -> bool:
+        """
+            Set the value only if the key is absent or expired. Returns True if set.
+
+            Atomic across processes, so it doubles as a lease (e.g. to let only
+            one worker run a scheduled job).
+        """
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ? AND expires_at < ?",
+                (namespace, key, now)
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, payload, now + ttl)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._conn().execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        if namespace is None:
+            self._conn().execute("DELETE FROM cache")
+        else:
+            self._conn().execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+
+_cache = None
+
+def get_cache():
+    """Return the process-wide cache for the configured backend."""
+    global _cache
+    if _cache is None:
+        _cache = MemoryCache() if CACHE_BACKEND == 'memory' else SharedCache()
+    return _cache
+
+
+_fundamentals_store = None
+
+def get_fundamentals_store():
+    """Return the persistent store used by revalidating_tool."""
+    global _fundamentals_store
+    if _fundamentals_store is None:
+        if CACHE_BACKEND == 'memory':
+            _fundamentals_store = get_cache()
+        else:
+            _fundamentals_store = SharedCache(FUNDAMENTALS_DB_PATH)
+    return _fundamentals_store
+
+
+async def _call(store, method: str, *args) -> Any:
+    """
+        Call a cache method from async code. SQLite calls run in a worker
+        thread, so a write lock held by another process never stalls the
+        event loop; the in-memory backend is called directly.
+    """
+    if isinstance(store, MemoryCache):
+        return getattr(store, method)(*args)
+    return await asyncio.to_thread(getattr(store, method), *args)
+
+
+def cached_tool(namespace: str, ttl: float, key: Optional[Callable[..., str]] = None):
+    """
+        Cache successful ToolResults of an async tool function.
+
+        Args:
+            namespace: Cache namespace for this tool
+            ttl: Seconds a cached result stays valid
+            key: Builds the cache key from the tool's arguments
+                 (default: the arguments joined with ':')
+
+        Failed results are never cached, so errors are retried on the next call.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> ToolResult:
+            cache_key = key(*args, **kwargs) if key else ":".join(
+                [str(arg) for arg in args] + [f"{k}={v}" for k, v in sorted(kwargs.items())]
+            )
+            try:
+                cached = await _call(get_cache(), 'get', namespace, cache_key)
+            except sqlite3.Error as e:
+                print(f"cache read failed for {namespace}:{cache_key} : {e}")
+                cached = None
+            if cached is not None:
+                metrics.increment(f"cache_hit:{namespace}")
+                tracing.set_attribute("cache", "hit")
+                return cached
+
+            metrics.increment(f"cache_miss:{namespace}")
+            tracing.set_attribute("cache", "miss")
+            with tracing.span(f"fetch:{namespace}"):
+                result = await func(*args, **kwargs)
+            if result is not None and result.success:
+                try:
+                    await _call(get_cache(), 'set', namespace, cache_key, result, ttl)
+                except sqlite3.Error as e:
+                    print(f"cache write failed for {namespace}:{cache_key} : {e}")
+            return result
+
+        return tracing.traced(f"tool:{namespace}")(wrapper)
+    return decorator
+
+
+# Background refreshes in flight in this process (keeps the tasks referenced)
+_refresh_tasks: Dict[Tuple[str, str], "asyncio.Task"] = {}
+
+
+def revalidating_tool(
+        namespace: str,
+        ttl: float,
+        max_age: float,
+        key: Optional[Callable[..., str]] = None,
+        fresh_until: Optional[Callable[[ToolResult], Optional[float]]] = None,
+        min_ttl: float = 3600
+):
+    """
+        Persistent stale-while-revalidate cache for slow-changing tool data.
+
+        Successful results are kept in the fundamentals store for max_age
+        seconds. An entry is fresh for ttl seconds, or until
+        fresh_until(result) (e.g. when the next fiscal report is due) if that
+        comes first, but never less than min_ttl. A stale entry is returned
+        immediately and refreshed by one background task, leased across
+        processes; only misses wait for the API.
+
+        Args:
+            namespace: Store namespace for this tool
+            ttl: Seconds a result is fresh at most
+            max_age: Seconds a stale result may still be served
+            key: Builds the store key from the tool's arguments
+            fresh_until: Epoch seconds after which the result is known to be outdated
+            min_ttl: Lower bound on freshness, so a late report isn't refetched on every call
+    """
+    def decorator(func):
+        async def fetch_and_store(cache_key: str, args, kwargs) -> ToolResult:
+            with tracing.span(f"fetch:{namespace}"):
+                result = await func(*args, **kwargs)
+            if result is not None and result.success:
+                stored_at = time.time()
+                expires = stored_at + ttl
+                if fresh_until is not None:
+                    try:
+                        deadline = fresh_until(result)
+                    except Exception as e:
+                        print(f"fresh_until failed for {namespace}:{cache_key} : {e}")
+                        deadline = None
+                    if deadline is not None:
+                        expires = min(expires, max(deadline, stored_at + min_ttl))
+                try:
+                    await _call(get_fundamentals_store(), 'set', namespace, cache_key, (result, expires), max_age)
+                except sqlite3.Error as e:
+                    print(f"store write failed for {namespace}:{cache_key} : {e}")
+            return result
+
+        async def refresh(cache_key: str, args, kwargs) -> None:
+            try:
+                result = await fetch_and_store(cache_key, args, kwargs)
+                if result is not None and result.success:
+                    # Failures keep the lease, which backs off the next attempt
+                    await _call(get_fundamentals_store(), 'delete', 'refresh_lease', f"{namespace}:{cache_key}")
+            except Exception as e:
+                print(f"background refresh failed for {namespace}:{cache_key} : {e}")
+            finally:
+                _refresh_tasks.pop((namespace, cache_key), None)
+
+        async def schedule_refresh(cache_key: str, args, kwargs) -> None:
+            if (namespace, cache_key) in _refresh_tasks:
+                return
+            try:
+                leased = await _call(
+                    get_fundamentals_store(), 'add',
+                    'refresh_lease', f"{namespace}:{cache_key}", os.getpid(), REFRESH_LEASE_SECONDS
+                )
+            except sqlite3.Error:
+                leased = False
+            if leased:
+                # Detached from the request's context: the refresh outlives it
+                # and must not add spans to its trace
+                _refresh_tasks[(namespace, cache_key)] = asyncio.create_task(
+                    refresh(cache_key, args, kwargs), context=contextvars.Context()
+                )
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> ToolResult:
+            cache_key = key(*args, **kwargs) if key else ":".join(
+                [str(arg) for arg in args] + [f"{k}={v}" for k, v in sorted(kwargs.items())]
+            )
+            try:
+                entry = await _call(get_fundamentals_store(), 'get', namespace, cache_key)
+            except sqlite3.Error as e:
+                print(f"store read failed for {namespace}:{cache_key} : {e}")
+                entry = None
+
+            if entry is not None:
+                result, expires = entry
+                if time.time() < expires:
+                    metrics.increment(f"cache_hit:{namespace}")
+                    tracing.set_attribute("cache", "hit")
+                else:
+                    metrics.increment(f"cache_stale:{namespace}")
+                    tracing.set_attribute("cache", "stale")
+                    await schedule_refresh(cache_key, args, kwargs)
+                return result
+
+            metrics.increment(f"cache_miss:{namespace}")
+            tracing.set_attribute("cache", "miss")
+            return await fetch_and_store(cache_key, args, kwargs)
+
+        return tracing.traced(f"tool:{namespace}")(wrapper)
+    return decorator
@@ -0,0 +1,125 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional
+import numpy as np
+from .bars import COLUMNS, PriceBars
+from ..workflows import metrics
+
+# "auto" (adaptive), "inline" (always on the event loop) or "pool" (always offload)
+OFFLOAD_MODE = os.getenv('GOBLIN_OFFLOAD_MODE', 'auto')
+
+# Offload when the predicted inline run time exceeds this many milliseconds
+OFFLOAD_THRESHOLD_MS = float(os.getenv('GOBLIN_OFFLOAD_THRESHOLD_MS', 15))
+
+POOL_WORKERS = int(os.getenv('GOBLIN_PROCESS_POOL_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+
+# Start method for pool workers; forking a process that runs threads is unsafe
+POOL_START_METHOD = os.getenv('GOBLIN_PROCESS_POOL_START_METHOD', 'spawn')
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+# Running estimate of inline seconds per unit of cost (bars x indicators),
+# refined from every inline run so the offload decision adapts to the host
+_seconds_per_unit = 2e-6
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=POOL_WORKERS,
+            mp_context=multiprocessing.get_context(POOL_START_METHOD)
+        )
+    return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _attach_bars(name: str, n: int):
+    """Map PriceBars onto a shared memory segment created by the parent."""
+    # Pool workers share the parent's resource tracker, which unlinks the
+    # segment only once (when the parent calls unlink)
+    segment = shared_memory.SharedMemory(name=name)
+    timestamps = np.ndarray((n,), dtype=np.int64, buffer=segment.buf)
+    values = np.ndarray((len(COLUMNS), n), dtype=np.float64, buffer=segment.buf, offset=8 * n)
+    return segment, PriceBars(values, timestamps)
+
+
+def _run_with_shared_bars(func: Callable, name: str, n: int, args: tuple) -> Any:
+    """Pool worker entry point: run func over bars read from shared memory."""
+    segment, bars = _attach_bars(name, n)
+    try:
+        return func(bars, *args)
+    finally:
+        del bars
+        try:
+            segment.close()
+        except BufferError:
+            # A lingering view still references the buffer; the mapping is
+            # released when it is garbage collected
+            pass
+
+
+def _should_offload(cost: float) -> bool:
+    if OFFLOAD_MODE == 'inline':
+        return False
+    if OFFLOAD_MODE == 'pool':
+        return True
+    return cost * _seconds_per_unit * 1000 > OFFLOAD_THRESHOLD_MS
+
+
+async def offload(func: Callable[..., Any], bars: PriceBars, *args, cost: Optional[float] = None) -> Any:
+    """
+        Run a CPU-bound func(bars, *args) without stalling the event loop.
+
+        Small inputs run inline, where a process hop would cost more than the
+        work. Large ones go to the process pool: the OHLCV buffers are copied
+        once into a shared memory segment and the worker maps them directly,
+        so no DataFrame is pickled. Only args and the (small) result cross
+        the process boundary.
+
+        Args:
+            func: Module-level function taking PriceBars first
+            bars: Price history
+            args: Extra picklable arguments for func
+            cost: Relative amount of work (default: number of bars)
+
+        Returns:
+            func's result
+    """
+    global _seconds_per_unit
+    cost = float(cost if cost is not None else len(bars))
+
+    if not _should_offload(cost):
+        start = time.perf_counter()
+        result = func(bars, *args)
+        if cost > 0:
+            observed = (time.perf_counter() - start) / cost
+            _seconds_per_unit = 0.8 * _seconds_per_unit + 0.2 * observed
+        metrics.increment("offload_inline")
+        return result
+
+    n = len(bars)
+    segment = shared_memory.SharedMemory(create=True, size=max(1, bars.nbytes))
+    try:
+        np.ndarray((n,), dtype=np.int64, buffer=segment.buf)[:] = bars.timestamps
+        np.ndarray((len(COLUMNS), n), dtype=np.float64, buffer=segment.buf, offset=8 * n)[:] = bars.values
+
+        loop = asyncio.get_running_loop()
+        metrics.increment("offload_pool")
+        return await loop.run_in_executor(
+            get_process_pool(), _run_with_shared_bars, func, segment.name, n, args
+        )
+    finally:
+        segment.close()
+        segment.unlink()
@@ -1,29 +1,92 @@
-import finnhub
 import asyncio
 from datetime import datetime,timedelta
-from .utils import ToolResult
+from .utils import ToolResult, next_report_expected
+from .cache import cached_tool, revalidating_tool
+from .rate_limiter import SharedRateLimiter
+from .news_store import get_news_store
+from .replay import wrap_client
+from ..workflows import metrics
+from ..workflows.tracing import traced
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 finnhub_api_key = os.getenv('FINNHUB_API_KEY')
 
-
+# One quota shared by every worker process on the host
+finnhub_rate_limiter = SharedRateLimiter(
+    'finnhub',
+    max_per_minute=float(os.getenv('FINNHUB_MAX_PER_MINUTE', 50)),
+    burst=int(os.getenv('FINNHUB_BURST', 5))
+)
+
+# Seconds each Finnhub response stays in the shared cache
+PEERS_CACHE_TTL = 24 * 3600
+
+# News window before the analysis date, and how often its newest day is re-pulled
+NEWS_WINDOW_DAYS = 5
+NEWS_CACHE_TTL = 5 * 60
+
+# Fundamentals and profiles live in the persistent store: fresh for the TTL
+# (financials: at most until the next quarterly report is due), then served
+# stale while a background refresh runs, up to FUNDAMENTALS_MAX_AGE
+FINANCIALS_CACHE_TTL = int(os.getenv('GOBLIN_FINANCIALS_TTL', 30 * 24 * 3600))
+PROFILE_CACHE_TTL = int(os.getenv('GOBLIN_PROFILE_TTL', 7 * 24 * 3600))
+FUNDAMENTALS_MAX_AGE = int(os.getenv('GOBLIN_FUNDAMENTALS_MAX_AGE', 180 * 24 * 3600))
+
+# Fundamentals shown to the portfolio manager: prompt key -> Finnhub metric
+ESSENTIAL_FINANCIALS = {
+    'pe_ratio': 'peBasicExclExtraTTM',
+    'pb_ratio': 'pbAnnual',
+    'roe': 'roeRfy',
+    'roa': 'roaRfy',
+    'debt_equity': 'totalDebt/totalEquityAnnual',
+    'current_ratio': 'currentRatioAnnual',
+    'profit_margin': 'netProfitMarginTTM',
+    'revenue_growth': 'revenueGrowthTTM',
+    'eps': 'epsBasicExclExtraItemsTTM',
+    'dividend_yield': 'dividendYieldIndicatedAnnual'
+}
+
+
+def essential_financials(metrics : dict) -> dict:
+    """Pick the ESSENTIAL_FINANCIALS out of a Finnhub metric dict."""
+    metrics = metrics or {}
+    return {key: metrics.get(metric) for key, metric in ESSENTIAL_FINANCIALS.items()}
+
+
+@traced('wait:finnhub_rate_limit')
 async def _apply_rate_limiting():
     """Apply rate limiting for Finnhub API calls."""
-    # Use existing news rate limiting config (60 seconds / max_per_minute)
-    rate_limit = 60.0 / 50 
-    if rate_limit > 0:
-        await asyncio.sleep(rate_limit)
+    await finnhub_rate_limiter.acquire()
 
 def _get_finnhub_client():
-    """"Get finnhub client with api key from config"""
-    finnhub_key = finnhub_api_key
-    if not finnhub_key:
-        return None
-    
-    return finnhub.Client(api_key=finnhub_key)
-
+    """"Get finnhub client with api key from config (a record/replay proxy under GOBLIN_REPLAY)"""
+    def live():
+        finnhub_key = finnhub_api_key
+        if not finnhub_key:
+            return None
+
+        # finnhub is imported on first use to keep it off the startup path
+        import finnhub
+
+        return finnhub.Client(api_key=finnhub_key)
+
+    return wrap_client('finnhub', live)
+
+def _next_financials_report(result : ToolResult):
+    """When the quarter after the latest one in the financials' series is due."""
+    quarterly = (result.data.get('series') or {}).get('quarterly') or {}
+    periods = [point.get('period') for points in quarterly.values() for point in (points or []) if point.get('period')]
+    return next_report_expected(max(periods)) if periods else None
+
+@revalidating_tool(
+    'finnhub_basic_financials',
+    FINANCIALS_CACHE_TTL,
+    FUNDAMENTALS_MAX_AGE,
+    key=lambda symbol, metric="all": f"{symbol.upper()}:{metric}",
+    fresh_until=_next_financials_report
+)
 async def get_company_basic_financials(symbol : str,metric : str = "all") -> ToolResult:
     """Get company basic financial metric"""
     client = _get_finnhub_client()
@@ -37,7 +100,7 @@ async def get_company_basic_financials(symbol : str,metric : str = "all") -> Too
     
     try:
         await _apply_rate_limiting()
-        result = client.company_basic_financials(symbol,metric)
+        result = await asyncio.to_thread(client.company_basic_financials,symbol,metric)
 
         if not result or 'metric' not in result:
             return ToolResult(success=False, error=f"No financial data found for {symbol}")
@@ -67,6 +130,7 @@ async def get_company_basic_financials(symbol : str,metric : str = "all") -> Too
     except Exception as e:
         return ToolResult(success=False,error=f"Failed to fetch financial analysis for {symbol}")
     
+@revalidating_tool('finnhub_profile', PROFILE_CACHE_TTL, FUNDAMENTALS_MAX_AGE, key=lambda symbol: symbol.upper())
 async def get_company_profile(symbol : str) -> ToolResult:
     """Get company profile information"""
     client = _get_finnhub_client()
@@ -80,7 +144,7 @@ async def get_company_profile(symbol : str) -> ToolResult:
 
     try:
         await _apply_rate_limiting()
-        result = client.company_profile2(symbol=symbol)
+        result = await asyncio.to_thread(client.company_profile2,symbol=symbol)
 
         if not result:
             return ToolResult(success=False,error=f"No company profile found for {symbol}")
@@ -105,10 +169,37 @@ async def get_company_profile(symbol : str) -> ToolResult:
     except Exception as e:
         return ToolResult(success=False,error=f"Failed to fetch comapny profile : {str(e)}")
     
+@cached_tool('finnhub_peers', PEERS_CACHE_TTL, key=lambda symbol: symbol.upper())
+async def get_company_peers(symbol : str) -> ToolResult:
+    """Get companies in the same industry (Finnhub peers, the symbol itself excluded)"""
+    client = _get_finnhub_client()
+    if not client:
+        return ToolResult(success=False,error="finnhub API key not configured")
+
+    symbol = symbol.upper()
+
+    try:
+        await _apply_rate_limiting()
+        result = await asyncio.to_thread(client.company_peers,symbol)
+        peers = [peer.upper() for peer in (result or []) if isinstance(peer, str) and peer.upper() != symbol]
+
+        if not peers:
+            return ToolResult(success=False,error=f"No peers found for {symbol}")
+
+        return ToolResult(success=True,data={'symbol': symbol, 'peers': peers})
+
+    except Exception as e:
+        return ToolResult(success=False,error=f"Failed to fetch {symbol} peers : {str(e)}")
+
+@traced('tool:finnhub_news')
 async def get_company_news(symbol:str,analysis_date:str)->ToolResult:
     """
         Get latest  company news
 
+        Articles are served from the local news store. Finnhub is only asked
+        for the days of the window the store hasn't pulled yet, plus the
+        newest day again once it is older than NEWS_CACHE_TTL.
+
         Args:
             Symbol : Stock Symbol
             Analysis Date : Current Date
@@ -116,23 +207,36 @@ async def get_company_news(symbol:str,analysis_date:str)->ToolResult:
         Return ToolResult with latest comapny news
     """
 
-    client = _get_finnhub_client()
-    if not client:
-        return ToolResult(success=False,error="finnhub API key not configured")
-    
     try:
-        await _apply_rate_limiting()
-
         end_date = datetime.strptime(analysis_date, "%Y-%m-%d")
-        start_date = end_date - timedelta(days=5)
+        start_date = end_date - timedelta(days=NEWS_WINDOW_DAYS)
 
         # Convert datetime objects to strings in YYYY-MM-DD format
         start_date = start_date.strftime("%Y-%m-%d")
         end_date = end_date.strftime("%Y-%m-%d")
 
-        # make API call
-        result = client.company_news(symbol=symbol,_from = start_date,to=end_date)
-        news_items = result if isinstance(result, list) else []
+        store = get_news_store()
+        missing = store.missing_ranges(symbol, start_date, end_date, NEWS_CACHE_TTL)
+
+        if missing:
+            client = _get_finnhub_client()
+            if not client:
+                return ToolResult(success=False,error="finnhub API key not configured")
+
+        # make API calls for the missing days only
+        for pull_from, pull_to in missing:
+            await _apply_rate_limiting()
+            result = await asyncio.to_thread(client.company_news,symbol=symbol,_from=pull_from,to=pull_to)
+            fetched = result if isinstance(result, list) else []
+            added = store.add_articles(symbol, fetched)
+            store.record_pull(symbol, pull_from, pull_to)
+            metrics.increment("news_articles_fetched", len(fetched))
+            metrics.increment("news_articles_new", added)
+
+        if not missing:
+            metrics.increment("cache_hit:finnhub_news")
+
+        news_items = store.articles(symbol, start_date, end_date)
 
         return ToolResult(
             success=True,
@@ -147,4 +251,4 @@ async def get_company_news(symbol:str,analysis_date:str)->ToolResult:
 
 
     except Exception as e:
-        return ToolResult(success=False,error=f"Failed to fetch {symbol} news : {str(e)}")
\ No newline at end of file
+        return ToolResult(success=False,error=f"Failed to fetch {symbol} news : {str(e)}")
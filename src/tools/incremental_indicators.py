@@ -0,0 +1,144 @@
+import copy
+import math
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Indicators maintained bar by bar (default parameters of the registry).
+# ADX is left out: its smoothing seeds on a full window and is only
+# recalculated by the analysis pipeline.
+LIVE_INDICATORS = ['SMA', 'EMA', 'RSI', 'MACD', 'BBANDS', 'CCI']
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None and math.isfinite(value) else None
+
+
+class _EWM:
+    """pandas ewm(adjust=False) recurrence; None until min_periods values were seen."""
+
+    __slots__ = ('alpha', 'min_periods', 'value', 'count')
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value: Optional[float] = None
+        self.count = 0
+
+    def update(self, x: float) -> Optional[float]:
+        self.value = x if self.value is None else (1 - self.alpha) * self.value + self.alpha * x
+        self.count += 1
+        return self.output
+
+    @property
+    def output(self) -> Optional[float]:
+        return self.value if self.count >= self.min_periods else None
+
+
+class _Window:
+    """The last size values."""
+
+    __slots__ = ('values',)
+
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+
+    def update(self, x: float) -> bool:
+        """Add x; True once the window is full."""
+        self.values.append(x)
+        return len(self.values) == self.values.maxlen
+
+    def mean(self) -> float:
+        return math.fsum(self.values) / len(self.values)
+
+
+class IncrementalIndicators:
+    """
+        LIVE_INDICATORS updated one bar at a time, O(1) (O(window) for the
+        rolling ones) per bar instead of recomputing the whole history.
+
+        Formulas and warm-up periods match indicator_registry, so after the
+        same bars latest() equals the last values of
+        compute_technical_indicators() (rounded to 4 places, None while an
+        indicator is still warming up).
+
+        update() commits a closed bar. preview() returns the values as if a
+        still-forming bar closed now, without changing the state, so the
+        in-progress bar can be re-evaluated on every tick.
+    """
+
+    def __init__(self):
+        self.bars = 0
+        self._sma = _Window(20)
+        self._ema = _EWM(2 / (20 + 1), 20)
+        self._prev_close: Optional[float] = None
+        self._rsi_up = _EWM(1 / 14, 14)
+        self._rsi_down = _EWM(1 / 14, 14)
+        self._macd_fast = _EWM(2 / (12 + 1), 12)
+        self._macd_slow = _EWM(2 / (26 + 1), 26)
+        self._macd_signal = _EWM(2 / (9 + 1), 9)
+        self._typical = _Window(20)
+        self._latest: Dict[str, Any] = {}
+
+    @classmethod
+    def from_bars(cls, bars) -> 'IncrementalIndicators':
+        """Seed the state from a PriceBars history."""
+        state = cls()
+        for high, low, close in zip(bars.high.tolist(), bars.low.tolist(), bars.close.tolist()):
+            state.update(high, low, close)
+        return state
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, Any]:
+        """Commit a closed bar and return the latest indicator values."""
+        self.bars += 1
+        values: Dict[str, Any] = {}
+
+        full = self._sma.update(close)
+        middle = self._sma.mean() if full else None
+        values['SMA'] = _rounded(middle)
+        values['EMA'] = _rounded(self._ema.update(close))
+
+        # The first bar has no change; like the registry it counts as 0 up, 0 down
+        diff = close - self._prev_close if self._prev_close is not None else 0.0
+        up = self._rsi_up.update(diff if diff > 0 else 0.0)
+        down = self._rsi_down.update(-diff if diff < 0 else 0.0)
+        if down == 0:
+            values['RSI'] = 100.0
+        else:
+            values['RSI'] = _rounded(100 - 100 / (1 + up / down)) if down is not None else None
+        self._prev_close = close
+
+        self._macd_fast.update(close)
+        macd_line = signal_line = None
+        if self._macd_slow.update(close) is not None:
+            macd_line = self._macd_fast.value - self._macd_slow.value
+            signal_line = self._macd_signal.update(macd_line)
+        values['MACD'] = {
+            'macd': _rounded(macd_line),
+            'signal': _rounded(signal_line),
+            'histogram': _rounded(macd_line - signal_line) if signal_line is not None else None
+        }
+
+        if middle is not None:
+            std = math.sqrt(max(0.0, math.fsum((x - middle) ** 2 for x in self._sma.values) / len(self._sma.values)))
+            values['BBANDS'] = {'upper': _rounded(middle + 2 * std), 'middle': _rounded(middle), 'lower': _rounded(middle - 2 * std)}
+        else:
+            values['BBANDS'] = {'upper': None, 'middle': None, 'lower': None}
+
+        typical_price = (high + low + close) / 3.0
+        values['CCI'] = None
+        if self._typical.update(typical_price):
+            mean = self._typical.mean()
+            mean_deviation = math.fsum(abs(x - mean) for x in self._typical.values) / len(self._typical.values)
+            if mean_deviation > 0:
+                values['CCI'] = _rounded((typical_price - mean) / (0.015 * mean_deviation))
+
+        self._latest = values
+        return values
+
+    def preview(self, high: float, low: float, close: float) -> Dict[str, Any]:
+        """Values if a bar with these prices closed now; the state is left as is."""
+        return copy.deepcopy(self).update(high, low, close)
+
+    def latest(self) -> Dict[str, Any]:
+        """Values after the last committed bar."""
+        return self._latest
@@ -0,0 +1,262 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """An indicator, its parameters (with defaults) and the indicators it builds on."""
+    name: str
+    params: Tuple[Tuple[str, Any], ...]
+    compute: Callable[..., Union[pd.Series, Dict[str, pd.Series]]]
+    lookback: Callable[..., int]
+    depends: Tuple[str, ...] = ()
+    description: str = ''
+
+    @property
+    def defaults(self) -> Dict[str, Any]:
+        return dict(self.params)
+
+
+@dataclass(frozen=True)
+class IndicatorRequest:
+    """One requested indicator with fully resolved parameters."""
+    name: str
+    params: Tuple[Tuple[str, Any], ...] = field(default=())
+
+    @property
+    def label(self) -> str:
+        """Plain name for default parameters (e.g. 'SMA'), otherwise 'SMA(50)'."""
+        spec = INDICATORS[self.name]
+        if self.params == spec.params:
+            return self.name
+        return f"{self.name}({','.join(str(value) for _, value in self.params)})"
+
+
+# name -> spec
+INDICATORS: Dict[str, IndicatorSpec] = {}
+
+# Bars per period for the supported resampling timeframes
+TIMEFRAMES = {'D': 1, 'W': 5, 'M': 21}
+
+
+def register_indicator(name: str, lookback: Callable[..., int], depends: Tuple[str, ...] = (), **defaults):
+    """
+        Register an indicator compute function.
+
+        The function receives an IndicatorContext plus its parameters and
+        returns a Series (or a dict of Series for multi-line indicators).
+        Dependencies are fetched through ctx.get(), so shared intermediates
+        are computed once per request.
+    """
+    def decorator(func):
+        INDICATORS[name] = IndicatorSpec(
+            name=name,
+            params=tuple(defaults.items()),
+            compute=func,
+            lookback=lookback,
+            depends=depends,
+            description=(func.__doc__ or '').strip()
+        )
+        return func
+    return decorator
+
+
+class IndicatorContext:
+    """
+        Price data for one timeframe plus a memo of everything computed on it.
+
+        ctx.get('EMA', window=12) returns the cached series if MACD already
+        asked for it, so EMA(12)/EMA(26), SMA(20) and the typical price are
+        shared between indicators within a request.
+    """
+
+    def __init__(self, price_data: pd.DataFrame):
+        self.price_data = price_data
+        self.close = pd.Series(price_data['Close'])
+        self.high = pd.Series(price_data['High'])
+        self.low = pd.Series(price_data['Low'])
+        self._memo: Dict[Tuple[str, Tuple], Any] = {}
+
+    @classmethod
+    def from_columns(cls, close, high, low) -> 'IndicatorContext':
+        """
+            Context over prebuilt price columns.
+
+            Passing DataFrames (dates x symbols) evaluates every indicator for
+            all symbols at once with the same formulas (used by the backtester).
+        """
+        ctx = cls.__new__(cls)
+        ctx.price_data = None
+        ctx.close, ctx.high, ctx.low = close, high, low
+        ctx._memo = {}
+        return ctx
+
+    def get(self, name: str, **params) -> Any:
+        spec = INDICATORS[name]
+        resolved = tuple((key, params.get(key, default)) for key, default in spec.params)
+        memo_key = (name, resolved)
+        if memo_key not in self._memo:
+            self._memo[memo_key] = spec.compute(self, **dict(resolved))
+        return self._memo[memo_key]
+
+    def intermediate(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Memoize a non-indicator intermediate (e.g. typical price)."""
+        memo_key = (key, ())
+        if memo_key not in self._memo:
+            self._memo[memo_key] = compute()
+        return self._memo[memo_key]
+
+
+# --- indicators (formulas match the ta library with fillna=False) ---
+
+@register_indicator('SMA', lookback=lambda window: window, window=20)
+def _sma(ctx: IndicatorContext, window: int) -> pd.Series:
+    """Simple moving average of close."""
+    return ctx.close.rolling(window=window, min_periods=window).mean()
+
+
+@register_indicator('EMA', lookback=lambda window: window, window=20)
+def _ema(ctx: IndicatorContext, window: int) -> pd.Series:
+    """Exponential moving average of close."""
+    return ctx.close.ewm(span=window, min_periods=window, adjust=False).mean()
+
+
+@register_indicator('RSI', lookback=lambda window: window + 1, window=14)
+def _rsi(ctx: IndicatorContext, window: int) -> pd.Series:
+    """Relative strength index (Wilder smoothing)."""
+    diff = ctx.intermediate('close_diff', lambda: ctx.close.diff(1))
+    up = diff.where(diff > 0, 0.0)
+    down = -diff.where(diff < 0, 0.0)
+    ema_up = up.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    ema_down = down.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    relative_strength = ema_up / ema_down
+    return (100 - (100 / (1 + relative_strength))).where(ema_down != 0, 100.0)
+
+
+@register_indicator('MACD', lookback=lambda fast, slow, signal: slow + signal, depends=('EMA',), fast=12, slow=26, signal=9)
+def _macd(ctx: IndicatorContext, fast: int, slow: int, signal: int) -> Dict[str, pd.Series]:
+    """MACD line, signal line and histogram."""
+    macd_line = ctx.get('EMA', window=fast) - ctx.get('EMA', window=slow)
+    signal_line = macd_line.ewm(span=signal, min_periods=signal, adjust=False).mean()
+    return {'macd': macd_line, 'signal': signal_line, 'histogram': macd_line - signal_line}
+
+
+@register_indicator('BBANDS', lookback=lambda window, window_dev: window, depends=('SMA',), window=20, window_dev=2)
+def _bbands(ctx: IndicatorContext, window: int, window_dev: float) -> Dict[str, pd.Series]:
+    """Bollinger bands around SMA(window)."""
+    middle = ctx.get('SMA', window=window)
+    std = ctx.intermediate(
+        f'close_std_{window}',
+        lambda: ctx.close.rolling(window, min_periods=window).std(ddof=0)
+    )
+    return {'upper': middle + window_dev * std, 'middle': middle, 'lower': middle - window_dev * std}
+
+
+@register_indicator('ADX', lookback=lambda window: 2 * window, window=14)
+def _adx(ctx: IndicatorContext, window: int) -> pd.Series:
+    """Average directional index."""
+    from ta.trend import ADXIndicator
+    return ADXIndicator(high=ctx.high, low=ctx.low, close=ctx.close, window=window).adx()
+
+
+@register_indicator('CCI', lookback=lambda window, constant: window, window=20, constant=0.015)
+def _cci(ctx: IndicatorContext, window: int, constant: float) -> pd.Series:
+    """Commodity channel index of the typical price."""
+    typical_price = ctx.intermediate('typical_price', lambda: (ctx.high + ctx.low + ctx.close) / 3.0)
+    rolling = typical_price.rolling(window, min_periods=window)
+    mean_deviation = rolling.apply(lambda x: np.mean(np.abs(x - np.mean(x))), raw=True)
+    return (typical_price - rolling.mean()) / (constant * mean_deviation)
+
+
+# --- request parsing ---
+
+_REQUEST_PATTERN = re.compile(r'^\s*([A-Za-z_]+)\s*(?:\((.*)\))?\s*$')
+
+
+def _parse_value(text: str) -> Any:
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_indicator_request(request: Union[str, Dict[str, Any], IndicatorRequest]) -> IndicatorRequest:
+    """
+        Resolve an indicator request to a name and full parameter set.
+
+        Accepts 'SMA', 'SMA(50)', 'MACD(5,35,5)', 'BBANDS(window=10, window_dev=1.5)'
+        or {'name': 'SMA', 'window': 50}. Unspecified parameters take defaults.
+
+        Raises:
+            ValueError: unknown indicator or parameter
+    """
+    if isinstance(request, IndicatorRequest):
+        return request
+
+    if isinstance(request, dict):
+        name = str(request.get('name', '')).upper()
+        given = {k: v for k, v in request.items() if k != 'name'}
+        positional: List[Any] = []
+    else:
+        match = _REQUEST_PATTERN.match(str(request))
+        if not match:
+            raise ValueError(f"Invalid indicator request: {request!r}")
+        name = match.group(1).upper()
+        given, positional = {}, []
+        for arg in filter(None, (a.strip() for a in (match.group(2) or '').split(','))):
+            if '=' in arg:
+                key, value = arg.split('=', 1)
+                given[key.strip()] = _parse_value(value)
+            else:
+                positional.append(_parse_value(arg))
+
+    spec = INDICATORS.get(name)
+    if spec is None:
+        raise ValueError(f"Unsupported indicator: {name}")
+    if len(positional) > len(spec.params):
+        raise ValueError(f"{name} takes at most {len(spec.params)} parameters")
+
+    params = spec.defaults
+    for (key, _), value in zip(spec.params, positional):
+        params[key] = value
+    for key, value in given.items():
+        if key not in params:
+            raise ValueError(f"Unknown parameter {key!r} for {name}")
+        params[key] = value
+
+    return IndicatorRequest(name, tuple(params.items()))
+
+
+def required_bars(requests: List[IndicatorRequest], timeframes: Optional[List[str]] = None) -> int:
+    """
+        Daily bars needed so every requested indicator has a value on every
+        timeframe. Unknown timeframes are left out, as the indicator tool
+        reports them as unsupported instead of calculating them.
+    """
+    lookback = max((INDICATORS[r.name].lookback(**dict(r.params)) for r in requests), default=0)
+    scale = max((TIMEFRAMES.get(tf, 1) for tf in (timeframes or ['D'])), default=1)
+    return lookback * scale
+
+
+def resample(price_data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Roll daily OHLCV bars up to weekly ('W') or monthly ('M') bars."""
+    if timeframe == 'D':
+        return price_data
+    if timeframe == 'W':
+        rule = 'W-FRI'
+    elif timeframe == 'M':
+        rule = 'ME'
+    else:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+    aggregation = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    try:
+        resampled = price_data.resample(rule).agg(aggregation)
+    except ValueError:
+        # pandas < 2.2 spells month-end 'M'
+        resampled = price_data.resample('M').agg(aggregation)
+    return resampled.dropna(subset=['Close'])
@@ -0,0 +1,270 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+import numpy as np
+from .bars import COLUMNS, PriceBars
+from .utils import ToolResult
+from .yfinance_tool import get_intraday_bars
+from .technical_indicator_tool import calculate_technical_indicators
+from ..workflows import metrics
+from ..workflows.singleflight import SingleFlight
+
+# Interval the rings store; coarser intervals are rolled up from it on read
+BASE_INTERVAL = '1m'
+
+# Bars kept per symbol (default: two full sessions of 1-minute bars)
+INTRADAY_CAPACITY = int(os.getenv('GOBLIN_INTRADAY_BARS', 780))
+
+# Symbols kept at once; the least recently used ring is dropped beyond this
+INTRADAY_MAX_SYMBOLS = int(os.getenv('GOBLIN_INTRADAY_MAX_SYMBOLS', 2000))
+
+# On-demand refreshes within this many seconds of the last ingest are
+# served from the ring (the live feed keeps subscribed symbols current)
+INTRADAY_REFRESH_SECONDS = float(os.getenv('GOBLIN_INTRADAY_REFRESH_SECONDS', 30))
+
+_INTERVAL_PATTERN = re.compile(r'^(\d+)(m|h)$')
+
+
+def interval_seconds(interval: str) -> int:
+    """'5m' -> 300, '1h' -> 3600. Raises ValueError for anything else."""
+    match = _INTERVAL_PATTERN.match(interval.strip().lower())
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Unsupported interval {interval!r}, expected e.g. 1m, 5m, 15m, 1h")
+    return int(match.group(1)) * (60 if match.group(2) == 'm' else 3600)
+
+
+class BarRing:
+    """
+        The last `capacity` bars of one symbol in preallocated NumPy arrays.
+
+        Every bar is written twice, at slot i and i + capacity, so the newest
+        bars are always one contiguous range of the buffer however often the
+        ring has wrapped. bars() can then return a PriceBars slice over the
+        buffer itself: no copy on read, and a fixed 2 x capacity x 48 bytes
+        per symbol whatever the traffic.
+
+        A view reflects later writes to the slots it covers, so use it (or
+        hand it to calculate_technical_indicators, which copies into shared
+        memory before awaiting) before the next ingest.
+    """
+
+    __slots__ = ('capacity', '_buffer', '_next', 'count')
+
+    def __init__(self, capacity: int = INTRADAY_CAPACITY):
+        self.capacity = capacity
+        self._buffer = PriceBars(np.zeros((len(COLUMNS), 2 * capacity)), np.zeros(2 * capacity, dtype=np.int64))
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget every bar (the buffer is kept for reuse)."""
+        self._next = 0
+        self.count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._buffer.nbytes
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if not self.count:
+            return None
+        return int(self._buffer.timestamps[(self._next - 1) % self.capacity])
+
+    def _write(self, slot: int, timestamp: int, row: np.ndarray) -> None:
+        for position in (slot, slot + self.capacity):
+            self._buffer.timestamps[position] = timestamp
+            self._buffer.values[:, position] = row
+
+    def append(self, timestamp: int, row: np.ndarray) -> bool:
+        """
+            Add one bar (row = open, high, low, close, volume).
+
+            A bar with the newest timestamp replaces it (the forming bar was
+            updated); older timestamps are ignored.
+
+            Returns:
+                True if the ring changed
+        """
+        last = self.last_timestamp
+        if last is not None and timestamp < last:
+            return False
+        if timestamp == last:
+            self._write((self._next - 1) % self.capacity, timestamp, row)
+            return True
+        self._write(self._next, timestamp, row)
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return True
+
+    def extend(self, bars: PriceBars) -> int:
+        """Add bars in time order; returns how many were added or updated."""
+        last = self.last_timestamp
+        start = 0 if last is None else int(bars.timestamps.searchsorted(last, side='left'))
+        changed = 0
+        for i in range(start, len(bars)):
+            changed += self.append(int(bars.timestamps[i]), bars.values[:, i])
+        return changed
+
+    def bars(self, limit: Optional[int] = None) -> PriceBars:
+        """The newest bars, oldest first, as a view over the ring buffer."""
+        count = self.count if limit is None else min(limit, self.count)
+        end = (self._next - 1) % self.capacity + self.capacity + 1 if self.count else 0
+        return self._buffer[end - count:end]
+
+
+def roll_up(bars: PriceBars, seconds: int) -> PriceBars:
+    """
+        Aggregate bars into `seconds`-wide buckets aligned to the clock
+        (5m buckets start at :00, :05, ...). The last bucket may be partial.
+    """
+    if not len(bars):
+        return bars
+    buckets = bars.timestamps // seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(bars)] - 1
+
+    values = np.empty((len(COLUMNS), len(starts)))
+    values[0] = bars.open[starts]
+    values[1] = np.maximum.reduceat(bars.high, starts)
+    values[2] = np.minimum.reduceat(bars.low, starts)
+    values[3] = bars.close[ends]
+    values[4] = np.add.reduceat(bars.volume, starts)
+    return PriceBars(values, buckets[starts] * seconds)
+
+
+class IntradayStore:
+    """
+        Per-symbol BarRings of BASE_INTERVAL bars, at most max_symbols of them.
+
+        Memory is capped at max_symbols x memory_per_symbol and allocated
+        when a symbol is first ingested; the least recently used symbol's
+        ring is reused once the cap is reached.
+    """
+
+    def __init__(self, capacity: int = INTRADAY_CAPACITY, max_symbols: int = INTRADAY_MAX_SYMBOLS):
+        self.capacity = capacity
+        self.max_symbols = max_symbols
+        self._rings: 'OrderedDict[str, BarRing]' = OrderedDict()
+        self._ingested_at: Dict[str, float] = {}
+
+    @property
+    def memory_per_symbol(self) -> int:
+        return 2 * self.capacity * (len(COLUMNS) + 1) * 8
+
+    def ingest(self, symbol: str, bars: PriceBars) -> int:
+        """Add BASE_INTERVAL bars for a symbol; returns how many bars changed."""
+        symbol = symbol.upper()
+        ring = self._rings.get(symbol)
+        if ring is None:
+            if len(self._rings) >= self.max_symbols:
+                evicted, ring = self._rings.popitem(last=False)
+                self._ingested_at.pop(evicted, None)
+                ring.clear()
+                metrics.increment("intraday_evictions")
+            else:
+                ring = BarRing(self.capacity)
+            self._rings[symbol] = ring
+        else:
+            self._rings.move_to_end(symbol)
+        changed = ring.extend(bars)
+        self._ingested_at[symbol] = time.monotonic()
+        metrics.increment("intraday_bars_ingested", changed)
+        return changed
+
+    def bars(self, symbol: str, interval: str = BASE_INTERVAL, limit: Optional[int] = None) -> Optional[PriceBars]:
+        """
+            The newest bars of a symbol at any multiple of BASE_INTERVAL.
+
+            BASE_INTERVAL bars are a view over the ring; coarser intervals are
+            rolled up from it (one small array per call). None if the symbol
+            has not been ingested.
+        """
+        ring = self._rings.get(symbol.upper())
+        if ring is None or not ring.count:
+            return None
+        seconds = interval_seconds(interval)
+        base = interval_seconds(BASE_INTERVAL)
+        if seconds % base:
+            raise ValueError(f"Interval {interval} is not a multiple of {BASE_INTERVAL}")
+        bars = ring.bars() if seconds == base else roll_up(ring.bars(), seconds)
+        return bars if limit is None else bars[max(0, len(bars) - limit):]
+
+    def age(self, symbol: str) -> Optional[float]:
+        """Seconds since the symbol was last ingested, or None."""
+        ingested_at = self._ingested_at.get(symbol.upper())
+        return None if ingested_at is None else time.monotonic() - ingested_at
+
+    def symbols(self) -> List[str]:
+        return list(self._rings)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'symbols': len(self._rings),
+            'max_symbols': self.max_symbols,
+            'bars_per_symbol': self.capacity,
+            'memory_bytes': len(self._rings) * self.memory_per_symbol,
+            'memory_limit_bytes': self.max_symbols * self.memory_per_symbol
+        }
+
+
+_store: Optional[IntradayStore] = None
+
+
+def get_intraday_store() -> IntradayStore:
+    """Return the process-wide intraday store, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = IntradayStore()
+    return _store
+
+
+_refreshes = SingleFlight()
+
+
+async def refresh_intraday(symbol: str, period: str = '1d', max_age: float = INTRADAY_REFRESH_SECONDS) -> ToolResult:
+    """
+        Fetch the latest BASE_INTERVAL bars from yfinance into the intraday
+        store, unless the symbol was ingested less than max_age seconds ago.
+        Concurrent refreshes of a symbol share one upstream call.
+    """
+    symbol = symbol.upper()
+    store = get_intraday_store()
+    age = store.age(symbol)
+    if age is not None and age < max_age:
+        metrics.increment("cache_hit:intraday")
+        return ToolResult(success=True, data={'symbol': symbol, 'ingested': 0})
+
+    async def fetch() -> ToolResult:
+        result = await get_intraday_bars(symbol, period=period, interval=BASE_INTERVAL)
+        if not result.success:
+            return result
+        return ToolResult(success=True, data={'symbol': symbol, 'ingested': store.ingest(symbol, result.data['bars'])})
+
+    return await _refreshes.do(symbol, fetch)
+
+
+async def intraday_indicators(
+        symbol: str,
+        interval: str = '5m',
+        indicators: Optional[List[Union[str, dict]]] = None
+    ) -> ToolResult:
+    """
+        Technical indicators on a symbol's intraday bars at `interval`.
+
+        1-minute bars go to calculate_technical_indicators as a view over
+        the ring buffer; other intervals as the rolled-up bars.
+    """
+    try:
+        bars = get_intraday_store().bars(symbol, interval)
+    except ValueError as e:
+        return ToolResult(success=False, error=str(e))
+    if bars is None:
+        return ToolResult(success=False, error=f"No intraday bars for {symbol.upper()}")
+
+    result = await calculate_technical_indicators(bars, symbol.upper(), datetime.today().date().strftime("%Y-%m-%d"), indicators)
+    if result.success:
+        result.data['interval'] = interval
+    return result
@@ -0,0 +1,104 @@
+import os
+from typing import Any, Optional
+from . import replay
+from ..prompts.compact import count_tokens
+from ..workflows import metrics, tracing
+
+_replay_model_class = None
+
+
+def groq_configured() -> bool:
+    """Whether LLM calls can be made (an API key, or recorded responses)."""
+    return bool(os.getenv('GROQ_API_KEY')) or replay.is_replaying()
+
+
+def get_chat_model(model: str, temperature: float, max_tokens: int) -> Any:
+    """
+        ChatGroq for the given model, or a record/replay stand-in.
+
+        With GOBLIN_REPLAY=record the real model answers and every response
+        is saved; with GOBLIN_REPLAY=replay responses come from the
+        fixtures and no API key or network is needed.
+    """
+    def live():
+        from langchain_groq import ChatGroq
+        return ChatGroq(
+            model=model,
+            api_key=os.getenv('GROQ_API_KEY'),
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+
+    if replay.REPLAY_MODE == 'off':
+        return live()
+    inner = None if replay.is_replaying() else live()
+    return _get_replay_model_class()(model_name=model, temperature=temperature, inner=inner)
+
+
+def record_token_usage(stage: str, result: Any, prompt_tokens: int) -> None:
+    """
+        Count one LLM call's prompt and completion tokens under the stage name.
+
+        Uses the provider's usage metadata when the response carries it and
+        the local estimate otherwise (e.g. replayed responses). The estimate
+        is always recorded too, so the two can be compared.
+    """
+    usage = getattr(result, 'usage_metadata', None) or {}
+    completion_estimate = count_tokens(getattr(result, 'content', '') or '')
+    prompt = usage.get('input_tokens') or prompt_tokens
+    completion = usage.get('output_tokens') or completion_estimate
+
+    metrics.increment(f"llm_calls:{stage}")
+    metrics.increment(f"llm_prompt_tokens:{stage}", prompt)
+    metrics.increment(f"llm_completion_tokens:{stage}", completion)
+    metrics.increment(f"llm_prompt_tokens_estimated:{stage}", prompt_tokens)
+    tracing.set_attribute('prompt_tokens', prompt)
+    tracing.set_attribute('completion_tokens', completion)
+
+
+def _get_replay_model_class():
+    # langchain_core is only imported when replay is in use
+    global _replay_model_class
+    if _replay_model_class is not None:
+        return _replay_model_class
+
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class ReplayChatModel(BaseChatModel):
+        """Chat model answering from recorded fixtures (or recording them)."""
+        model_name: str
+        temperature: float = 0.0
+        inner: Optional[Any] = None
+
+        @property
+        def _llm_type(self) -> str:
+            return 'replay'
+
+        def _key(self, messages) -> str:
+            prompt = "\n".join(f"{message.type}:{message.content}" for message in messages)
+            return f"{self.model_name}:{self.temperature}:{prompt}"
+
+        @staticmethod
+        def _result(content: str) -> ChatResult:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            key = self._key(messages)
+            if replay.is_replaying():
+                return self._result(replay.replay_call('groq', 'chat', key))
+            content = self.inner.invoke(messages, **kwargs).content
+            replay.save_fixture('groq', 'chat', key, content)
+            return self._result(content)
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            key = self._key(messages)
+            if replay.is_replaying():
+                return self._result(await replay.replay_call_async('groq', 'chat', key))
+            content = (await self.inner.ainvoke(messages, **kwargs)).content
+            replay.save_fixture('groq', 'chat', key, content)
+            return self._result(content)
+
+    _replay_model_class = ReplayChatModel
+    return _replay_model_class
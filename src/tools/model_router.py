@@ -0,0 +1,212 @@
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from .llm import get_chat_model
+from ..workflows import metrics, tracing
+
+
+def _tiers(variable: str, default: str) -> List[str]:
+    return [model.strip() for model in os.getenv(variable, default).split(',') if model.strip()]
+
+
+# Models per stage, cheapest and fastest first
+STAGE_TIERS: Dict[str, List[str]] = {
+    'news_features': _tiers('GOBLIN_NEWS_MODELS', 'llama-3.1-8b-instant,llama-3.3-70b-versatile'),
+    'portfolio_manager': _tiers('GOBLIN_PM_MODELS', 'openai/gpt-oss-20b,openai/gpt-oss-120b')
+}
+
+# Seconds a stage's LLM call may take; a tier whose recent p90 is slower is skipped
+LATENCY_BUDGETS: Dict[str, float] = {
+    'news_features': float(os.getenv('GOBLIN_NEWS_LATENCY_BUDGET', 5)),
+    'portfolio_manager': float(os.getenv('GOBLIN_PM_LATENCY_BUDGET', 15))
+}
+
+# Calls remembered per model
+WINDOW = int(os.getenv('GOBLIN_ROUTER_WINDOW', 50))
+
+# Calls needed before a model's record is trusted over the default order
+MIN_SAMPLES = 5
+
+# A model producing usable output less often than this is skipped
+MIN_QUALITY = float(os.getenv('GOBLIN_ROUTER_MIN_QUALITY', 0.8))
+
+# Seconds a rate-limited model is avoided when the error gives no retry-after
+RATE_LIMIT_COOLDOWN = float(os.getenv('GOBLIN_ROUTER_COOLDOWN', 30))
+
+
+class ModelStats:
+    """Rolling latency and quality record of one model."""
+
+    def __init__(self, window: int = WINDOW):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.limited_until = 0.0
+        self.rate_limits = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.latencies.append(latency)
+        self.outcomes.append(ok)
+
+    @property
+    def p90(self) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))]
+
+    @property
+    def quality(self) -> Optional[float]:
+        if len(self.outcomes) < MIN_SAMPLES:
+            return None
+        return sum(self.outcomes) / len(self.outcomes)
+
+    @property
+    def limited(self) -> bool:
+        return time.monotonic() < self.limited_until
+
+    def summary(self) -> Dict[str, Any]:
+        p90, quality = self.p90, self.quality
+        return {
+            'calls': len(self.outcomes),
+            'p90_seconds': None if p90 is None else round(p90, 3),
+            'quality': None if quality is None else round(quality, 3),
+            'rate_limits': self.rate_limits,
+            'rate_limited': self.limited
+        }
+
+
+def is_rate_limit(error: Exception) -> bool:
+    """Whether an LLM call failed on a provider rate limit (HTTP 429)."""
+    return (
+        getattr(error, 'status_code', None) == 429
+        or type(error).__name__ == 'RateLimitError'
+        or 'rate_limit_exceeded' in str(error)
+    )
+
+
+def _retry_after(error: Exception) -> float:
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return RATE_LIMIT_COOLDOWN
+
+
+class ModelRouter:
+    """
+        Picks the model tier for each LLM call from the stage's tier list.
+
+        A call starts at the cheapest tier (or the first tier above a given
+        model, to escalate), or at the second tier for inputs the caller
+        does not mark simple. Tiers are passed over while rate-limited, when
+        their rolling quality is below MIN_QUALITY, or when their p90
+        latency does not fit the call's budget; if nothing fits, the fastest
+        usable tier is tried first. A rate-limited call falls through to the
+        next candidate in the same request.
+    """
+
+    def __init__(self, tiers: Optional[Dict[str, List[str]]] = None):
+        self.tiers = tiers or STAGE_TIERS
+        self._stats: Dict[str, ModelStats] = {}
+
+    def stats_for(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = ModelStats()
+        return stats
+
+    def _trusted(self, model: str) -> bool:
+        quality = self.stats_for(model).quality
+        return quality is None or quality >= MIN_QUALITY
+
+    def is_top(self, stage: str, model: Optional[str]) -> bool:
+        return model == self.tiers[stage][-1]
+
+    def candidates(
+            self,
+            stage: str,
+            simple: bool = True,
+            budget: Optional[float] = None,
+            above: Optional[str] = None
+        ) -> List[str]:
+        """Models to try for one call, in order."""
+        tiers = self.tiers[stage]
+        if above in tiers:
+            start = tiers.index(above) + 1
+        else:
+            start = 0 if simple else min(1, len(tiers) - 1)
+        budget = LATENCY_BUDGETS.get(stage) if budget is None else budget
+
+        usable = [model for model in tiers[start:] if not self.stats_for(model).limited]
+        good = [model for model in usable if self._trusted(model)] or usable
+        fitting = [model for model in good if budget is None or (self.stats_for(model).p90 or 0.0) <= budget]
+        if fitting:
+            first = fitting[0]
+        elif good:
+            first = min(good, key=lambda model: self.stats_for(model).p90 or 0.0)
+        else:
+            # Everything from the starting tier up is rate-limited: try all tiers
+            return tiers[start:] + list(reversed(tiers[:start]))
+
+        # Fallbacks: the remaining tiers upwards, then the cheaper ones
+        rest = [model for model in tiers[start:] if model != first] + list(reversed(tiers[:start]))
+        return [first] + sorted(rest, key=lambda model: self.stats_for(model).limited)
+
+    async def run(
+            self,
+            stage: str,
+            invoke: Callable[[Any], Awaitable[Any]],
+            temperature: float,
+            max_tokens: int,
+            simple: bool = True,
+            budget: Optional[float] = None,
+            above: Optional[str] = None
+        ) -> Tuple[Any, Optional[str]]:
+        """
+            Call invoke(llm) on the chosen tier, falling back on rate limits.
+
+            A result of None (no usable output) counts against the model's
+            quality; other errors are raised as before.
+
+            Returns:
+                (invoke's result, model that produced it)
+        """
+        candidates = self.candidates(stage, simple, budget, above)
+        for i, model in enumerate(candidates):
+            stats = self.stats_for(model)
+            llm = get_chat_model(model=model, temperature=temperature, max_tokens=max_tokens)
+            started = time.perf_counter()
+            try:
+                result = await invoke(llm)
+            except Exception as e:
+                if not is_rate_limit(e) or i == len(candidates) - 1:
+                    raise
+                stats.rate_limits += 1
+                stats.limited_until = time.monotonic() + _retry_after(e)
+                metrics.increment(f"model_rate_limited:{model}")
+                metrics.increment(f"model_fallbacks:{stage}")
+                print(f"{model} rate-limited for {stage}, falling back to {candidates[i + 1]}")
+                continue
+            stats.record(time.perf_counter() - started, result is not None)
+            metrics.increment(f"model_calls:{stage}:{model}")
+            tracing.set_attribute('model', model)
+            return result, model
+        return None, None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            stage: {model: self.stats_for(model).summary() for model in models}
+            for stage, models in self.tiers.items()
+        }
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide router, creating it on first use."""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
@@ -0,0 +1,207 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from . import replay
+from .cache import STATE_DIR, get_connection
+
+# Persistent article store (kept next to the fundamentals store; next to
+# the fixtures when recording or replaying)
+NEWS_DB_PATH = os.getenv('GOBLIN_NEWS_DB') or (
+    replay.state_path('news.sqlite3') if replay.REPLAY_MODE != 'off'
+    else os.path.join(STATE_DIR, 'news.sqlite3')
+)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS news_articles (
+        symbol TEXT NOT NULL,
+        id TEXT NOT NULL,
+        published INTEGER NOT NULL,
+        article TEXT NOT NULL,
+        features TEXT,
+        analyzed_at REAL,
+        PRIMARY KEY (symbol, id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS news_articles_published ON news_articles (symbol, published)",
+    """
+    CREATE TABLE IF NOT EXISTS news_coverage (
+        symbol TEXT PRIMARY KEY,
+        covered_from TEXT NOT NULL,
+        covered_to TEXT NOT NULL,
+        pulled_at REAL NOT NULL
+    )
+    """
+)
+
+
+def article_id(article: Dict[str, Any]) -> str:
+    """Identity of an article (Finnhub id, falling back to headline and time)."""
+    return str(article.get('id') or f"{article.get('headline', '')}@{article.get('datetime', '')}")
+
+
+def day_bounds(start: str, end: str) -> Tuple[int, int]:
+    """Epoch seconds from the start of `start` to the end of `end` (UTC dates)."""
+    first = datetime.strptime(start, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    last = datetime.strptime(end, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+    return int(first.timestamp()), int(last.timestamp()) - 1
+
+
+class NewsStore:
+    """
+        Local copy of company news, keyed by (symbol, article id).
+
+        Tracks the date range already pulled from Finnhub per symbol so only
+        the missing days are requested, and keeps the LLM-extracted features
+        next to each article. Window queries are served from the
+        (symbol, published) index.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or NEWS_DB_PATH
+        self._ready = set()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = get_connection(self.path)
+        if (os.getpid(), id(conn)) not in self._ready:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._ready.add((os.getpid(), id(conn)))
+        return conn
+
+    # --- coverage ---
+
+    def coverage(self, symbol: str) -> Optional[Tuple[str, str, float]]:
+        """(covered_from, covered_to, pulled_at) for symbol, or None."""
+        return self._conn().execute(
+            "SELECT covered_from, covered_to, pulled_at FROM news_coverage WHERE symbol = ?",
+            (symbol.upper(),)
+        ).fetchone()
+
+    def missing_ranges(self, symbol: str, start: str, end: str, refresh_after: float) -> List[Tuple[str, str]]:
+        """
+            Date ranges of [start, end] that still have to be pulled.
+
+            The last covered day is pulled again once refresh_after seconds
+            have passed if it is recent, since articles keep arriving for
+            the current day; older days are never pulled twice.
+        """
+        covered = self.coverage(symbol)
+        if covered is None:
+            return [(start, end)]
+        covered_from, covered_to, pulled_at = covered
+        if end < covered_from or start > covered_to:
+            return [(start, end)]
+
+        ranges = []
+        if start < covered_from:
+            ranges.append((start, covered_from))
+        recent = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
+        stale = time.time() - pulled_at > refresh_after and covered_to >= recent
+        if end > covered_to or (end == covered_to and stale):
+            ranges.append((covered_to, end))
+        return ranges
+
+    def record_pull(self, symbol: str, start: str, end: str) -> None:
+        """Extend the covered range with a completed pull of [start, end]."""
+        symbol = symbol.upper()
+        conn = self._conn()
+        covered = self.coverage(symbol)
+        if covered is not None:
+            covered_from, covered_to, _ = covered
+            overlaps = not (end < covered_from or start > covered_to)
+            if overlaps:
+                start, end = min(start, covered_from), max(end, covered_to)
+            elif end < covered_from:
+                # Older, disjoint window: keep the newer coverage
+                return
+        conn.execute(
+            "INSERT OR REPLACE INTO news_coverage (symbol, covered_from, covered_to, pulled_at) VALUES (?, ?, ?, ?)",
+            (symbol, start, end, time.time())
+        )
+
+    # --- articles ---
+
+    def add_articles(self, symbol: str, articles: List[Dict[str, Any]]) -> int:
+        """Insert articles not seen before; returns how many were new."""
+        rows = [
+            (symbol.upper(), article_id(article), int(article.get('datetime') or 0), json.dumps(article))
+            for article in articles
+        ]
+        if not rows:
+            return 0
+        conn = self._conn()
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO news_articles (symbol, id, published, article) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        return conn.total_changes - before
+
+    def articles(self, symbol: str, start: str, end: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Articles published between the start and end dates, newest first."""
+        first, last = day_bounds(start, end)
+        rows = self._conn().execute(
+            "SELECT article FROM news_articles WHERE symbol = ? AND published BETWEEN ? AND ? "
+            "ORDER BY published DESC LIMIT ?",
+            (symbol.upper(), first, last, -1 if limit is None else limit)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    # --- LLM features ---
+
+    def get_features(self, symbol: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored features for the given article ids (analyzed ones only)."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = self._conn().execute(
+            f"SELECT id, features FROM news_articles WHERE symbol = ? AND id IN ({placeholders}) "
+            "AND features IS NOT NULL",
+            (symbol.upper(), *ids)
+        ).fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def set_features(self, symbol: str, news_id: str, features: Dict[str, Any]) -> None:
+        self._conn().execute(
+            "UPDATE news_articles SET features = ?, analyzed_at = ? WHERE symbol = ? AND id = ?",
+            (json.dumps(features), time.time(), symbol.upper(), news_id)
+        )
+
+    def features(self, symbol: str, start: str, end: str) -> List[Dict[str, Any]]:
+        """
+            Analyzed articles for symbol published in [start, end], newest first.
+
+            Answered entirely from the local index, without any network call.
+        """
+        first, last = day_bounds(start, end)
+        rows = self._conn().execute(
+            "SELECT id, published, article, features FROM news_articles "
+            "WHERE symbol = ? AND published BETWEEN ? AND ? AND features IS NOT NULL "
+            "ORDER BY published DESC",
+            (symbol.upper(), first, last)
+        ).fetchall()
+        results = []
+        for news_id, published, article, features in rows:
+            article = json.loads(article)
+            results.append({
+                'id': news_id,
+                'published': datetime.fromtimestamp(published, timezone.utc).isoformat(),
+                'headline': article.get('headline', ''),
+                'source': article.get('source', ''),
+                'features': json.loads(features)
+            })
+        return results
+
+
+_news_store = None
+
+def get_news_store() -> NewsStore:
+    """Return the process-wide news store."""
+    global _news_store
+    if _news_store is None:
+        _news_store = NewsStore()
+    return _news_store
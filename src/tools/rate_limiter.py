@@ -0,0 +1,64 @@
+import asyncio
+import sqlite3
+import time
+from typing import Optional
+from .cache import get_connection
+from ..workflows import metrics
+
+
+class SharedRateLimiter:
+    """
+        Token bucket shared by every process using the same state database.
+
+        Each acquire() reserves a token inside a BEGIN IMMEDIATE transaction,
+        so workers can't race each other for the same token. When the bucket
+        is empty the token is borrowed (the balance goes negative) and the
+        caller sleeps until it would have been refilled, which keeps callers
+        in FIFO order without holding the database lock while waiting.
+    """
+
+    def __init__(self, name: str, max_per_minute: float, burst: int = 1, path: Optional[str] = None):
+        self.name = name
+        self.rate = max_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.path = path
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller must wait for it."""
+        conn = get_connection(self.path)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_limits WHERE name = ?", (self.name,)
+            ).fetchone()
+            if row is None:
+                tokens = float(self.burst)
+            else:
+                tokens = min(float(self.burst), row[0] + (now - row[1]) * self.rate)
+
+            tokens -= 1.0
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    async def acquire(self) -> None:
+        """Wait until a call is allowed under the shared limit."""
+        try:
+            wait = await asyncio.to_thread(self._reserve)
+        except sqlite3.Error as e:
+            # Fall back to fixed spacing if the shared state is unavailable
+            print(f"rate limiter {self.name} unavailable : {e}")
+            wait = 1.0 / self.rate
+
+        if wait > 0:
+            metrics.increment(f"rate_limit_wait_seconds:{self.name}", wait)
+            await asyncio.sleep(wait)
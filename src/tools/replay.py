@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import os
+import pickle
+import random
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# "off" (live services), "record" (live, saving every response) or
+# "replay" (recorded responses only, no network)
+REPLAY_MODE = os.getenv('GOBLIN_REPLAY', 'off')
+
+FIXTURES_DIR = os.getenv('GOBLIN_FIXTURES_DIR', os.path.join(os.getcwd(), 'fixtures'))
+
+# Injected on replayed calls: latency in ms ("50" or a uniform "20-200"
+# range) and the share of calls that fail
+REPLAY_LATENCY_MS = os.getenv('GOBLIN_REPLAY_LATENCY_MS', '0')
+REPLAY_ERROR_RATE = float(os.getenv('GOBLIN_REPLAY_ERROR_RATE', 0))
+REPLAY_SEED = os.getenv('GOBLIN_REPLAY_SEED', '0')
+
+
+# Analysis date used in record/replay mode. Dates end up in fixture keys
+# (LLM prompts, Finnhub date ranges), so a replay has to run "on" the day
+# the fixtures were recorded; by default that is the date saved with them.
+REPLAY_DATE = os.getenv('GOBLIN_REPLAY_DATE')
+
+
+class FixtureNotFound(KeyError):
+    """No recorded response for a call in replay mode."""
+
+
+class InjectedFault(RuntimeError):
+    """Failure injected by replay mode (GOBLIN_REPLAY_ERROR_RATE)."""
+
+
+def is_replaying() -> bool:
+    return REPLAY_MODE == 'replay'
+
+
+def is_recording() -> bool:
+    return REPLAY_MODE == 'record'
+
+
+def analysis_date() -> str:
+    """
+        Today's date (YYYY-MM-DD) for an analysis request.
+
+        In record mode the first recording pins the date in the fixtures
+        directory; replay mode reads it back (GOBLIN_REPLAY_DATE overrides
+        both), so replaying on a later day makes the same calls.
+    """
+    today = datetime.today().date().strftime("%Y-%m-%d")
+    if REPLAY_MODE == 'off':
+        return today
+    if REPLAY_DATE:
+        return REPLAY_DATE
+    path = os.path.join(FIXTURES_DIR, 'analysis_date')
+    try:
+        with open(path) as f:
+            return f.read().strip() or today
+    except FileNotFoundError:
+        if is_recording():
+            os.makedirs(FIXTURES_DIR, exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(today)
+        return today
+
+
+_state_reset = False
+
+
+def state_path(name: str) -> str:
+    """
+        Location of a persistent store (news, fundamentals) in record/replay
+        mode: next to the fixtures, per mode, and emptied the first time a
+        process asks. Each recorded or replayed process then starts from the
+        same empty stores, so it makes the same calls, and stored LLM
+        features never skip the recorded responses. Run a single worker.
+    """
+    global _state_reset
+    directory = os.path.join(FIXTURES_DIR, 'state', REPLAY_MODE)
+    if not _state_reset:
+        shutil.rmtree(directory, ignore_errors=True)
+        _state_reset = True
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', text)[:80]
+
+
+def fixture_path(service: str, method: str, key: str) -> str:
+    """Fixture file for one call: readable prefix plus a hash of the full key."""
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return os.path.join(FIXTURES_DIR, service, method, f"{_slug(key)}-{digest}.pkl")
+
+
+def save_fixture(service: str, method: str, key: str, value: Any) -> None:
+    path = fixture_path(service, method, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, path)
+
+
+def load_fixture(service: str, method: str, key: str) -> Any:
+    path = fixture_path(service, method, key)
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        raise FixtureNotFound(
+            f"No recorded {service}.{method} response for {key!r}; record one with GOBLIN_REPLAY=record"
+        ) from None
+
+
+# --- deterministic fault injection ---
+
+_call_counts: Dict[str, int] = {}
+_counts_lock = threading.Lock()
+
+
+def _latency_range() -> Tuple[float, float]:
+    low, _, high = REPLAY_LATENCY_MS.partition('-')
+    low = float(low or 0)
+    return low / 1000, float(high or low) / 1000
+
+
+def _plan(service: str, method: str, key: str) -> Tuple[float, bool]:
+    """
+        Latency and failure for this call.
+
+        Drawn from an RNG seeded by (seed, call, n-th time this call is
+        made), so a replay run injects the same faults every time however
+        concurrent requests interleave.
+    """
+    call = f"{service}.{method}:{key}"
+    with _counts_lock:
+        n = _call_counts.get(call, 0)
+        _call_counts[call] = n + 1
+    rng = random.Random(f"{REPLAY_SEED}:{call}:{n}")
+    low, high = _latency_range()
+    return rng.uniform(low, high), rng.random() < REPLAY_ERROR_RATE
+
+
+def replay_call(service: str, method: str, key: str) -> Any:
+    """Recorded response for a blocking call, after the injected latency/fault."""
+    delay, fail = _plan(service, method, key)
+    if delay:
+        time.sleep(delay)
+    if fail:
+        raise InjectedFault(f"injected failure for {service}.{method}({key[:60]!r})")
+    return load_fixture(service, method, key)
+
+
+async def replay_call_async(service: str, method: str, key: str) -> Any:
+    """Recorded response for an async call, after the injected latency/fault."""
+    delay, fail = _plan(service, method, key)
+    if delay:
+        await asyncio.sleep(delay)
+    if fail:
+        raise InjectedFault(f"injected failure for {service}.{method}({key[:60]!r})")
+    return load_fixture(service, method, key)
+
+
+def call_key(args: tuple, kwargs: dict) -> str:
+    return ",".join([repr(arg) for arg in args] + [f"{k}={v!r}" for k, v in sorted(kwargs.items())])
+
+
+class ReplayProxy:
+    """
+        Stand-in for a client object (finnhub.Client, yfinance.Ticker).
+
+        Method calls and the listed properties are recorded to fixtures in
+        record mode and answered from them in replay mode, where no real
+        client is needed.
+
+        Args:
+            service: Fixture directory for this client (e.g. "finnhub")
+            target: Real client, or None when replaying
+            scope: Part of every key (e.g. the ticker symbol)
+            properties: Attributes read as values rather than called
+    """
+
+    def __init__(self, service: str, target: Any = None, scope: str = '', properties: Tuple[str, ...] = ()):
+        self._service = service
+        self._target = target
+        self._scope = scope
+        self._properties = properties
+
+    def _key(self, detail: str) -> str:
+        return f"{self._scope}:{detail}" if self._scope else detail
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        if name in self._properties:
+            key = self._key('')
+            if is_replaying():
+                return replay_call(self._service, name, key)
+            value = getattr(self._target, name)
+            save_fixture(self._service, name, key, value)
+            return value
+
+        def method(*args, **kwargs):
+            key = self._key(call_key(args, kwargs))
+            if is_replaying():
+                return replay_call(self._service, name, key)
+            value = getattr(self._target, name)(*args, **kwargs)
+            save_fixture(self._service, name, key, value)
+            return value
+
+        return method
+
+
+def wrap_client(service: str, factory: Callable[[], Any], scope: str = '', properties: Tuple[str, ...] = ()) -> Optional[Any]:
+    """
+        The real client from factory(), or a ReplayProxy when recording/replaying.
+
+        factory is not called in replay mode, so no API key or import of the
+        client library is needed.
+    """
+    if REPLAY_MODE == 'off':
+        return factory()
+    target = None if is_replaying() else factory()
+    if target is None and not is_replaying():
+        return None
+    return ReplayProxy(service, target, scope, properties)
@@ -0,0 +1,417 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from ..prompts.compact import count_tokens
+from ..workflows import metrics
+from .llm import record_token_usage
+
+# "schema" (JSON schema where the model supports it, JSON mode elsewhere),
+# "json" (JSON mode only) or "off" (free text, parsed tolerantly)
+STRUCTURED_OUTPUT_MODE = os.getenv('GOBLIN_STRUCTURED_OUTPUT', 'schema')
+
+# Follow-up requests for fields still missing or invalid after parsing (0 = none)
+MAX_REASKS = int(os.getenv('GOBLIN_STRUCTURED_REASKS', 1))
+
+# Groq models that accept response_format={"type": "json_schema", ...}
+JSON_SCHEMA_MODELS = {'openai/gpt-oss-120b', 'openai/gpt-oss-20b', 'moonshotai/kimi-k2-instruct'}
+
+# Previous reply quoted back in a re-ask, at most this many characters
+REASK_CONTEXT_CHARS = 2000
+
+
+# --- tolerant JSON parsing ---
+
+class _Truncated(Exception):
+    """The text ended inside a scalar value."""
+
+
+_NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_WORD = re.compile(r'[A-Za-z_][\w\-./]*')
+_WORDS = {'true': True, 'false': False, 'null': None, 'none': None, 'nan': None}
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '/': '/', '\\': '\\', '"': '"', "'": "'"}
+
+
+class _TolerantParser:
+    """
+        Recursive-descent parser for the JSON LLMs actually write.
+
+        Accepts single-quoted strings, Python literals (True/None), bare
+        keys and words, trailing or missing commas and // comments. Text
+        that stops early (max_tokens) keeps every complete member and
+        closes the open containers; a value cut off mid-way is dropped.
+        repaired is set whenever the input was not strict JSON.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.repaired = False
+
+    def _peek(self) -> str:
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char.isspace():
+                self.pos += 1
+            elif self.text.startswith('//', self.pos):
+                self.repaired = True
+                end = self.text.find('\n', self.pos)
+                self.pos = len(self.text) if end == -1 else end
+            else:
+                return char
+        return ''
+
+    def value(self) -> Any:
+        char = self._peek()
+        if char == '':
+            raise _Truncated()
+        if char == '{':
+            return self._object()
+        if char == '[':
+            return self._array()
+        if char in '"\'':
+            return self._string()
+        if char in '-+.' or char.isdigit():
+            return self._number()
+        return self._word()
+
+    def _object(self) -> Dict[str, Any]:
+        self.pos += 1
+        result: Dict[str, Any] = {}
+        while True:
+            char = self._peek()
+            if char == '':
+                self.repaired = True
+                return result
+            if char == '}':
+                self.pos += 1
+                return result
+            if char == ',':
+                self.repaired = True
+                self.pos += 1
+                continue
+            try:
+                key = self._string() if char in '"\'' else self._key()
+                if self._peek() != ':':
+                    raise _Truncated() if self._peek() == '' else ValueError(f"expected ':' at {self.pos}")
+                self.pos += 1
+                result[key] = self.value()
+            except _Truncated:
+                self.repaired = True
+                return result
+            char = self._peek()
+            if char == ',':
+                self.pos += 1
+                if self._peek() == '}':
+                    self.repaired = True
+            elif char not in ('}', ''):
+                self.repaired = True
+
+    def _array(self) -> List[Any]:
+        self.pos += 1
+        result: List[Any] = []
+        while True:
+            char = self._peek()
+            if char == '':
+                self.repaired = True
+                return result
+            if char == ']':
+                self.pos += 1
+                return result
+            if char == ',':
+                self.repaired = True
+                self.pos += 1
+                continue
+            try:
+                result.append(self.value())
+            except _Truncated:
+                self.repaired = True
+                return result
+            char = self._peek()
+            if char == ',':
+                self.pos += 1
+                if self._peek() == ']':
+                    self.repaired = True
+            elif char not in (']', ''):
+                self.repaired = True
+
+    def _string(self) -> str:
+        quote = self.text[self.pos]
+        if quote == "'":
+            self.repaired = True
+        self.pos += 1
+        chars = []
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char == quote:
+                self.pos += 1
+                return ''.join(chars)
+            if char == '\\' and self.pos + 1 < len(self.text):
+                escape = self.text[self.pos + 1]
+                if escape == 'u' and self.pos + 6 <= len(self.text):
+                    try:
+                        chars.append(chr(int(self.text[self.pos + 2:self.pos + 6], 16)))
+                        self.pos += 6
+                        continue
+                    except ValueError:
+                        pass
+                chars.append(_ESCAPES.get(escape, escape))
+                self.pos += 2
+                continue
+            chars.append(char)
+            self.pos += 1
+        raise _Truncated()
+
+    def _number(self) -> Any:
+        match = _NUMBER.match(self.text, self.pos)
+        if not match:
+            raise ValueError(f"bad number at {self.pos}")
+        self.pos = match.end()
+        token = match.group()
+        if token.startswith('+') or token.startswith('.') or token.endswith('.'):
+            self.repaired = True
+        number = float(token)
+        return int(number) if re.fullmatch(r'[-+]?\d+', token) else number
+
+    def _key(self) -> str:
+        match = _WORD.match(self.text, self.pos)
+        if not match:
+            raise ValueError(f"unexpected {self.text[self.pos]!r} at {self.pos}")
+        self.repaired = True
+        self.pos = match.end()
+        return match.group()
+
+    def _word(self) -> Any:
+        match = _WORD.match(self.text, self.pos)
+        if not match:
+            raise ValueError(f"unexpected {self.text[self.pos]!r} at {self.pos}")
+        self.pos = match.end()
+        word = match.group()
+        if word in ('true', 'false', 'null'):
+            return _WORDS[word]
+        self.repaired = True
+        return _WORDS.get(word.lower(), word)
+
+
+def _json_region(content: str) -> str:
+    """The fenced ```json / ``` block if there is one, else the whole text."""
+    fence = content.find("```")
+    if fence == -1:
+        return content
+    start = content.find("\n", fence)
+    start = fence + 3 if start == -1 else start + 1
+    end = content.find("```", start)
+    return content[start:] if end == -1 else content[start:end]
+
+
+def parse_json_object(content: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+        Extract a JSON object from an LLM reply.
+
+        Strict json.loads is tried first on the fenced block (or the span
+        from the first '{' to the last '}'); otherwise the tolerant parser
+        repairs what it can, including replies cut off by max_tokens.
+
+        Returns:
+            (object or None, status) with status 'ok', 'repaired' or 'failed'
+    """
+    region = _json_region(content or '')
+    start = region.find('{')
+    if start == -1:
+        return None, 'failed'
+
+    end = region.rfind('}')
+    if end > start:
+        try:
+            data = json.loads(region[start:end + 1])
+            if isinstance(data, dict):
+                return data, 'ok'
+        except json.JSONDecodeError:
+            pass
+
+    parser = _TolerantParser(region[start:])
+    try:
+        data = parser.value()
+    except (_Truncated, ValueError):
+        return None, 'failed'
+    if not isinstance(data, dict) or not data:
+        return None, 'failed'
+    return data, 'repaired'
+
+
+# --- schemas ---
+
+@dataclass(frozen=True)
+class OutputField:
+    """One expected key of a structured reply."""
+    name: str
+    type: str
+    description: str = ''
+    enum: Tuple[str, ...] = ()
+    required: bool = True
+
+    def valid(self, value: Any) -> bool:
+        if value is None:
+            return False
+        if self.enum:
+            return str(value).strip().lower() in {option.lower() for option in self.enum}
+        if self.type in ('number', 'integer'):
+            try:
+                float(value)
+                return True
+            except (TypeError, ValueError):
+                return False
+        if self.type == 'array':
+            return isinstance(value, list)
+        return isinstance(value, str) and bool(value.strip())
+
+    def json_schema(self) -> Dict[str, Any]:
+        schema: Dict[str, Any] = {'type': self.type}
+        if self.type == 'array':
+            schema['items'] = {'type': 'string'}
+        if self.enum:
+            schema['enum'] = list(self.enum)
+        if self.description:
+            schema['description'] = self.description
+        return schema
+
+    def hint(self) -> str:
+        if self.enum:
+            return f'"{self.name}" (one of {", ".join(self.enum)})'
+        return f'"{self.name}" ({self.description or self.type})'
+
+
+@dataclass(frozen=True)
+class OutputSchema:
+    """Keys a stage expects in its LLM reply; name doubles as the metrics stage."""
+    name: str
+    fields: Tuple[OutputField, ...]
+
+    def json_schema(self) -> Dict[str, Any]:
+        return {
+            'type': 'object',
+            'properties': {field.name: field.json_schema() for field in self.fields},
+            'required': [field.name for field in self.fields if field.required]
+        }
+
+    @staticmethod
+    def normalize(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Lowercase, underscore-separated keys ("Trading Signal" -> "trading_signal")."""
+        return {str(key).strip().lower().replace(' ', '_').replace('-', '_'): value for key, value in data.items()}
+
+    def missing(self, data: Dict[str, Any]) -> List[OutputField]:
+        """Required fields absent from data or with an invalid value."""
+        return [field for field in self.fields if field.required and not field.valid(data.get(field.name))]
+
+
+# --- generation ---
+
+def constrained(llm: Any, schema: OutputSchema) -> Any:
+    """
+        The model bound to JSON-schema or JSON-mode generation, where the
+        provider supports it. With GOBLIN_STRUCTURED_OUTPUT=off the model is
+        returned unchanged.
+    """
+    if STRUCTURED_OUTPUT_MODE == 'off' or not hasattr(llm, 'bind'):
+        return llm
+    model = getattr(llm, 'model_name', None)
+    if STRUCTURED_OUTPUT_MODE == 'schema' and model in JSON_SCHEMA_MODELS:
+        response_format = {'type': 'json_schema', 'json_schema': {'name': schema.name, 'schema': schema.json_schema()}}
+    else:
+        response_format = {'type': 'json_object'}
+    return llm.bind(response_format=response_format)
+
+
+def _as_messages(prompt: Any) -> list:
+    from langchain_core.messages import HumanMessage
+    if isinstance(prompt, str):
+        return [HumanMessage(content=prompt)]
+    if hasattr(prompt, 'to_messages'):
+        return prompt.to_messages()
+    return list(prompt)
+
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(str(getattr(message, 'content', message)) for message in _as_messages(prompt))
+
+
+async def _generate(llm: Any, runnable: Any, prompt: Any, stage: str) -> Any:
+    """One call through the constrained model, falling back to free text when it rejects the output."""
+    try:
+        return await runnable.ainvoke(prompt)
+    except Exception as e:
+        # Groq answers 400 json_validate_failed when the model broke the format
+        if runnable is llm or 'json_validate_failed' not in str(e) and 'response_format' not in str(e):
+            raise
+        print(f"constrained {stage} generation failed, retrying as free text : {e}")
+        metrics.increment(f"structured_constraint_fallback:{stage}")
+        return await llm.ainvoke(prompt)
+
+
+def _reask_prompt(missing: List[OutputField]) -> str:
+    return (
+        "Your reply is missing these fields or their values are invalid: "
+        + ", ".join(field.hint() for field in missing)
+        + ". Reply with ONLY a JSON object containing exactly these keys, no other text."
+    )
+
+
+async def invoke_structured(llm: Any, prompt: Any, schema: OutputSchema) -> Optional[Dict[str, Any]]:
+    """
+        Ask for a structured reply and salvage as much of it as possible.
+
+        The model is constrained to JSON where supported (constrained()).
+        The reply is parsed tolerantly (parse_json_object); required fields
+        still missing or invalid are requested with a short follow-up that
+        quotes the previous reply and names only those fields, instead of
+        discarding the call. Parse outcomes, re-asks and failures are
+        counted per schema.name in metrics.
+
+        Args:
+            llm: Chat model
+            prompt: Prompt string, PromptValue or list of messages
+            schema: Expected keys
+
+        Returns:
+            The reply as a dict with normalized keys (extra keys kept), or
+            None if required fields are still missing
+    """
+    stage = schema.name
+    runnable = constrained(llm, schema)
+
+    response = await _generate(llm, runnable, prompt, stage)
+    record_token_usage(stage, response, count_tokens(_prompt_text(prompt)))
+    content = getattr(response, 'content', '') or ''
+    data, status = parse_json_object(content)
+    metrics.increment(f"structured_parse:{stage}:{status}")
+    data = schema.normalize(data or {})
+
+    reasked = False
+    for _ in range(MAX_REASKS):
+        missing = schema.missing(data)
+        if not missing:
+            break
+        from langchain_core.messages import AIMessage, HumanMessage
+        metrics.increment(f"structured_reask:{stage}")
+        reasked = True
+        followup = _as_messages(prompt) + [
+            AIMessage(content=content[-REASK_CONTEXT_CHARS:]),
+            HumanMessage(content=_reask_prompt(missing))
+        ]
+        reply = await _generate(llm, runnable, followup, stage)
+        record_token_usage(f"{stage}_reask", reply, count_tokens(_prompt_text(followup)))
+        content = getattr(reply, 'content', '') or ''
+        extra, status = parse_json_object(content)
+        metrics.increment(f"structured_reask_parse:{stage}:{status}")
+        extra = schema.normalize(extra or {})
+        data.update({field.name: extra[field.name] for field in missing if field.valid(extra.get(field.name))})
+
+    if schema.missing(data):
+        metrics.increment(f"structured_failed:{stage}")
+        return None
+    if reasked:
+        metrics.increment(f"structured_reask_recovered:{stage}")
+    return data
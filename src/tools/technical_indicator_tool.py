@@ -1,28 +1,74 @@
 import pandas as pd
-from typing import List,Optional
+from typing import Any,Dict,List,Optional,Union
 from ..tools.utils import ToolResult
-from ta.trend import SMAIndicator, EMAIndicator, ADXIndicator, MACD, CCIIndicator
-from ta.momentum import RSIIndicator
-from ta.volatility import BollingerBands
+from .indicator_registry import INDICATORS, TIMEFRAMES, IndicatorContext, parse_indicator_request, resample
+from .bars import PriceBars
+from .executor import offload
+from ..workflows.tracing import traced
 
 
 # Supported indicators
-SUPPORTED_INDICATORS = ['SMA', 'EMA', 'RSI', 'MACD', 'BBANDS', 'ADX', 'CCI']
+SUPPORTED_INDICATORS = list(INDICATORS)
 
-async def calculate_technical_indicators(
+# Indicators calculated when none are requested (default parameters)
+DEFAULT_INDICATORS = ['SMA', 'EMA', 'RSI', 'MACD', 'BBANDS', 'ADX', 'CCI']
+
+
+def _last_value(series : pd.Series) -> list:
+    """Last value of a series as [value], or [] when it is missing."""
+    last_value = series.iloc[-1] if len(series) > 0 else None
+    return [round(last_value, 4)] if last_value is not None and pd.notna(last_value) else []
+
+
+def _calculate_timeframe(price_data : pd.DataFrame, indicators : List[Union[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Calculate every requested indicator on one timeframe, sharing intermediates."""
+    ctx = IndicatorContext(price_data)
+    results = {}
+    for indicator in indicators:
+        try:
+            request = parse_indicator_request(indicator)
+        except ValueError as e:
+            results[str(indicator)] = f"Unspported indicator :{indicator} ({e})"
+            continue
+
+        try:
+            result = ctx.get(request.name, **dict(request.params))
+
+            # Format result (get last value for the analysis date)
+            if isinstance(result, dict):
+                results[request.label] = {key: _last_value(series) for key, series in result.items()}
+            else:
+                results[request.label] = _last_value(result)
+
+            print(f"indicator : {request.label}  -> result {results[request.label]}") 
+
+        except Exception as e :
+            results[request.label] = f"Error calculating indicator {request.label}:{str(e)}"
+
+    return results
+
+
+def compute_technical_indicators(
         price_data : pd.DataFrame,
         symbol : str,
         analysis_date : str,
-        indicators : Optional[List[str]] = None,
+        indicators : Optional[List[Union[str, Dict[str, Any]]]] = None,
+        timeframes : Optional[List[str]] = None,
     ) -> ToolResult:
     """
-         Calculate technical indicators for price data using ta library.
+         Calculate technical indicators for price data from the indicator registry.
+
+        Synchronous and CPU-bound; use calculate_technical_indicators() from
+        async code so large inputs are moved off the event loop.
     
         Args:
-            price_data: DataFrame with OHLCV data 
-            indicators: List of indicators to calculate (default: all supported)
+            price_data: DataFrame with daily OHLCV data 
+            indicators: Indicator requests, e.g. ['SMA', 'SMA(50)', 'RSI(7)',
+                        'MACD(5,35,5)'] (default: DEFAULT_INDICATORS)
             symbol: Symbol name for metadata
             analysis_date: Analysis date for metadata
+            timeframes: Extra resampled timeframes to calculate on, 'W' and/or 'M'
+                        (daily results are always returned)
             
         Returns:
             ToolResult with calculated indicators
@@ -44,104 +90,81 @@ async def calculate_technical_indicators(
                 error=f"Missing required columns: {missing_columns}"
             )
         
-        # Use all supported indicators if none specified
+        # Use the default indicator set if none specified
         if indicators is None:
-            indicators = SUPPORTED_INDICATORS.copy()
-
-        # calculate indicators using ta library
-        results = {}
-        for indicator in indicators:
-            if indicator not in SUPPORTED_INDICATORS:
-                results[indicator] = f"Unspported indicator :{indicator}"
-                continue
-
-            try:
-                # Calculate using ta library with explicit type casting
-                close_series = pd.Series(price_data['Close'])
-                high_series = pd.Series(price_data['High'])
-                low_series = pd.Series(price_data['Low'])
-
-                if indicator == 'SMA':
-                    sma_indicator = SMAIndicator(close=close_series,window=20)
-                    result = sma_indicator.sma_indicator()
-
-                elif indicator == 'EMA':
-                    ema_indicator = EMAIndicator(close=close_series,window=20)
-                    result = ema_indicator.ema_indicator()
-
-                elif indicator == 'RSI':
-                    rsi_indicator = RSIIndicator(close=close_series,window=14)
-                    result = rsi_indicator.rsi()
-
-                elif indicator == 'MACD':
-                    macd_indicator = MACD(close=close_series)
-                    macd_line = macd_indicator.macd()
-                    macd_signal = macd_indicator.macd_signal()
-                    macd_histogram = macd_indicator.macd_diff()
-                    
-                    # Get the last values for the analysis date
-                    last_macd = macd_line.iloc[-1] if len(macd_line) > 0 else None
-                    last_signal = macd_signal.iloc[-1] if len(macd_signal) > 0 else None
-                    last_histogram = macd_histogram.iloc[-1] if len(macd_histogram) > 0 else None
-                    
-                    result = {
-                        'macd': [round(last_macd, 4)] if last_macd is not None else [],
-                        'signal': [round(last_signal, 4)] if last_signal is not None else [],
-                        'histogram': [round(last_histogram, 4)] if last_histogram is not None else []
-                    }
-
-                elif indicator == 'BBANDS':
-                    bb_indicator = BollingerBands(close=close_series, window=20, window_dev=2)
-                    bb_upper = bb_indicator.bollinger_hband()
-                    bb_middle = bb_indicator.bollinger_mavg()
-                    bb_lower = bb_indicator.bollinger_lband()
-                    
-                    # Get the last values for the analysis date
-                    last_upper = bb_upper.iloc[-1] if len(bb_upper) > 0 else None
-                    last_middle = bb_middle.iloc[-1] if len(bb_middle) > 0 else None
-                    last_lower = bb_lower.iloc[-1] if len(bb_lower) > 0 else None
-                
-                    result = {
-                        'upper': [round(last_upper, 4)] if last_upper is not None else [],
-                        'middle': [round(last_middle, 4)] if last_middle is not None else [],
-                        'lower': [round(last_lower, 4)] if last_lower is not None else []
-                    }
-
-                elif indicator == 'ADX':
-                    adx_indicator = ADXIndicator(high=high_series, low=low_series, close=close_series, window=14)
-                    result = adx_indicator.adx()
-                    
-                elif indicator == 'CCI':
-                    cci_indicator = CCIIndicator(high=high_series, low=low_series, close=close_series, window=20)
-                    result = cci_indicator.cci()
-                
-                # Format result (get last value for series)
-                if hasattr(result, 'iloc') and not isinstance(result, dict):
-                    # Get the last value for the analysis date
-                    last_value = result.iloc[-1] if len(result) > 0 else None
-                    results[indicator] = [round(last_value, 4)] if last_value is not None and pd.notna(last_value) else []
-
-                else:
-                    results[indicator] = result   
-
-                print(f"indicator : {indicator}  -> result {results[indicator]}") 
-
-            except Exception as e :
-                results[indicator] = f"Error calculating indicator {indicator}:{str(e)}"
+            indicators = DEFAULT_INDICATORS.copy()
+
+        results = _calculate_timeframe(price_data, indicators)
+
+        data = {
+            'symbol': symbol or 'unknown',
+            'technical_indicators': results,
+            'data_points': len(price_data),
+            'analysis_date': analysis_date,
+            'supported_indicators': SUPPORTED_INDICATORS
+        }
+
+        # Resampled timeframes
+        extra_timeframes = [tf for tf in (timeframes or []) if tf != 'D']
+        if extra_timeframes:
+            data['timeframes'] = {}
+            for timeframe in extra_timeframes:
+                if timeframe not in TIMEFRAMES:
+                    data['timeframes'][timeframe] = f"Unsupported timeframe :{timeframe}"
+                    continue
+                resampled = resample(price_data, timeframe)
+                data['timeframes'][timeframe] = {
+                    'technical_indicators': _calculate_timeframe(resampled, indicators),
+                    'data_points': len(resampled)
+                }
 
         return ToolResult(
             success=True,
-            data={
-                'symbol': symbol or 'unknown',
-                'technical_indicators': results,
-                'data_points': len(price_data),
-                'analysis_date': analysis_date,
-                'supported_indicators': SUPPORTED_INDICATORS
-            }
+            data=data
         )
         
     except Exception as e:
         return ToolResult(
             success=False,
             error=f"Error in calculating techincal indicator {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+def _compute_from_bars(bars : PriceBars, symbol : str, analysis_date : str, indicators, timeframes) -> ToolResult:
+    """Entry point for the executor: indicators over a zero-copy DataFrame view."""
+    return compute_technical_indicators(bars.to_dataframe(), symbol, analysis_date, indicators, timeframes)
+
+
+@traced('tool:technical_indicators')
+async def calculate_technical_indicators(
+        price_data : Union[pd.DataFrame, PriceBars],
+        symbol : str,
+        analysis_date : str,
+        indicators : Optional[List[Union[str, Dict[str, Any]]]] = None,
+        timeframes : Optional[List[str]] = None,
+    ) -> ToolResult:
+    """
+        Calculate technical indicators without blocking the event loop.
+
+        Small histories are calculated inline; long histories or large
+        indicator sets are shipped to the process pool through shared memory
+        (see tools.executor). Arguments and result are the same as
+        compute_technical_indicators().
+    """
+    if isinstance(price_data, pd.DataFrame):
+        if price_data.empty or not isinstance(price_data.index, pd.DatetimeIndex):
+            return compute_technical_indicators(price_data, symbol, analysis_date, indicators, timeframes)
+        try:
+            bars = PriceBars.from_dataframe(price_data)
+        except KeyError:
+            # Missing columns are reported by compute_technical_indicators
+            return compute_technical_indicators(price_data, symbol, analysis_date, indicators, timeframes)
+    else:
+        bars = price_data
+
+    if not len(bars):
+        return ToolResult(success=False, error="empty price data provided")
+
+    requested = len(indicators) if indicators is not None else len(DEFAULT_INDICATORS)
+    cost = len(bars) * requested * (1 + len(timeframes or []))
+    return await offload(_compute_from_bars, bars, symbol, analysis_date, indicators, timeframes, cost=cost)
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any,Optional
 from dataclasses import dataclass
 
@@ -13,3 +13,28 @@ class ToolResult:
     def __post_init__(self):
         if self.timestamp is None:
             self.timestamp = datetime.now()
+
+
+# Days from a fiscal quarter's end until its report is normally out
+# (10-Q deadlines are 40-45 days for most filers)
+QUARTER_DAYS = 91
+REPORTING_LAG_DAYS = 45
+
+
+def next_report_expected(period_end : Optional[str]) -> Optional[float]:
+    """
+        Epoch seconds by which the report following a fiscal period is expected.
+
+        Args:
+            period_end: Last reported period end, YYYY-MM-DD
+
+        Returns:
+            period_end + one quarter + the reporting lag, or None if unknown
+    """
+    if not period_end:
+        return None
+    try:
+        end = datetime.strptime(str(period_end)[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+    return (end + timedelta(days=QUARTER_DAYS + REPORTING_LAG_DAYS)).timestamp()
@@ -1,6 +1,41 @@
-import yfinance  as yf
-from .utils import ToolResult
+import asyncio
+import os
+from datetime import datetime, timezone
+from .utils import ToolResult, next_report_expected
+from .cache import cached_tool, revalidating_tool
+from .bars import PriceBars
+from .replay import wrap_client
 
+# Seconds each yfinance response stays in the shared cache
+MARKET_DATA_CACHE_TTL = 60
+
+# ticker.info is a slow scrape; it is kept in the persistent store, fresh for
+# the TTL or until the next quarterly report, then revalidated in the background
+COMPANY_INFO_CACHE_TTL = int(os.getenv('GOBLIN_COMPANY_INFO_TTL', 7 * 24 * 3600))
+COMPANY_INFO_MAX_AGE = int(os.getenv('GOBLIN_FUNDAMENTALS_MAX_AGE', 180 * 24 * 3600))
+
+# yfinance history periods and the trading days they roughly cover
+HISTORY_PERIODS = [('3mo', 63), ('6mo', 126), ('1y', 252), ('2y', 504), ('5y', 1260), ('10y', 2520)]
+
+
+def _get_ticker(symbol : str):
+    """yfinance Ticker for symbol (a record/replay proxy under GOBLIN_REPLAY)."""
+    def live():
+        import yfinance as yf
+        return yf.Ticker(symbol)
+
+    return wrap_client('yfinance', live, scope=symbol, properties=('info',))
+
+
+def history_period_for(bars : int) -> str:
+    """Smallest yfinance period covering the given number of daily bars (at least 3mo)."""
+    for period, trading_days in HISTORY_PERIODS:
+        if bars <= trading_days:
+            return period
+    return 'max'
+
+
+@cached_tool('yfinance_market_data', MARKET_DATA_CACHE_TTL, key=lambda symbol, analysis_date, period='3mo': f"{symbol.upper()}:{analysis_date}:{period}")
 async def get_market_data(symbol : str,analysis_date : str , period : str = '3mo') -> ToolResult:
     """
         Get market data for a symbol for a specific date or latest data.
@@ -15,8 +50,8 @@ async def get_market_data(symbol : str,analysis_date : str , period : str = '3mo
     """
     try:
         symbol = symbol.upper()
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period=period)
+        ticker = _get_ticker(symbol)
+        data = await asyncio.to_thread(ticker.history,period=period)
 
         if data.empty:
             return ToolResult(
@@ -39,16 +74,8 @@ async def get_market_data(symbol : str,analysis_date : str , period : str = '3mo
             price_change = current_close - previous_close
             price_change_pct = (price_change / previous_close) * 100 if previous_close != 0 else 0
         
-        # Convert DataFrame to LangChain-compatible format (no Timestamp objects)
-        historical_clean = data.reset_index()
-        historical_clean['Date'] = historical_clean['Date'].dt.strftime('%Y-%m-%d')
-        
-        # Convert all numeric columns to regular Python types
-        for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-            if col in historical_clean.columns:
-                historical_clean[col] = historical_clean[col].astype(float)
-        
-        historical_dict = historical_clean.to_dict('records')
+        # Columnar OHLCV arrays instead of one dict per row
+        historical_bars = PriceBars.from_dataframe(data)
         
         result_data = {
             'symbol': symbol,
@@ -64,7 +91,7 @@ async def get_market_data(symbol : str,analysis_date : str , period : str = '3mo
                 'price_change': price_change,
                 'price_change_pct': price_change_pct
             },
-            'historical_data': historical_dict  # LangChain-friendly version only
+            'historical_data': historical_bars
         }
 
         price_data = result_data.get('price_data')
@@ -83,6 +110,45 @@ async def get_market_data(symbol : str,analysis_date : str , period : str = '3mo
         )
     
 
+async def get_intraday_bars(symbol : str, period : str = '1d', interval : str = '1m') -> ToolResult:
+    """
+        Recent bars straight from yfinance, bypassing the shared cache.
+
+        Meant for a single poller per symbol (see workflows.live_feed); the
+        last bar is usually still forming and changes between calls.
+
+        Args:
+            symbol: Stock symbol
+            period: How far back to fetch (yfinance period, e.g. '1d', '5d')
+            interval: Bar size (yfinance interval, e.g. '1m', '5m')
+
+        Returns:
+            ToolResult with the bars as PriceBars
+    """
+    try:
+        symbol = symbol.upper()
+        ticker = _get_ticker(symbol)
+        data = await asyncio.to_thread(ticker.history, period=period, interval=interval)
+        if data.empty:
+            return ToolResult(success=False, error=f"No {interval} bars available for {symbol}")
+        return ToolResult(success=True, data={'symbol': symbol, 'interval': interval, 'bars': PriceBars.from_dataframe(data)})
+
+    except Exception as e:
+        return ToolResult(success=False, error=f"Error getting {interval} bars for {symbol} : {str(e)}")
+
+
+def _next_info_report(result : ToolResult):
+    """When the quarter after the company's most recent one is due."""
+    return next_report_expected(result.data.get('most_recent_quarter'))
+
+
+@revalidating_tool(
+    'yfinance_company_info',
+    COMPANY_INFO_CACHE_TTL,
+    COMPANY_INFO_MAX_AGE,
+    key=lambda symbol: symbol.upper(),
+    fresh_until=_next_info_report
+)
 async def get_company_info(symbol : str) -> ToolResult:
     """
         Get company information for a symbol.
@@ -95,8 +161,8 @@ async def get_company_info(symbol : str) -> ToolResult:
     """
     try:
         symbol = symbol.upper()
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
+        ticker = _get_ticker(symbol)
+        info = await asyncio.to_thread(lambda: ticker.info)
 
         if not info:
             return ToolResult(
@@ -113,7 +179,11 @@ async def get_company_info(symbol : str) -> ToolResult:
             'exchange': info.get('exchange', 'N/A'),
             'market_cap': info.get('marketCap', 'N/A'),
             'website': info.get('website', 'N/A'),
-            'description': info.get('longBusinessSummary', 'N/A')[:500]  # Limit description
+            'description': info.get('longBusinessSummary', 'N/A')[:500],  # Limit description
+            'most_recent_quarter': (
+                datetime.fromtimestamp(info['mostRecentQuarter'], timezone.utc).strftime("%Y-%m-%d")
+                if isinstance(info.get('mostRecentQuarter'), (int, float)) else None
+            )
         }
 
         print(f"sector : {company_data.get('sector')}")
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+from ..tools.cache import get_cache
+from .singleflight import SingleFlight
+from . import metrics
+
+# Seconds a completed analysis is served from cache
+ANALYSIS_CACHE_TTL = int(os.getenv('GOBLIN_ANALYSIS_CACHE_TTL', 900))
+
+# Pre-warmed watchlist analyses must survive from the scheduled run past the open
+PREWARM_CACHE_TTL = int(os.getenv('GOBLIN_WATCHLIST_CACHE_TTL', 3 * 3600))
+
+# Results decided without some inputs are kept only this long, so the next
+# request soon gets a complete analysis
+DEGRADED_CACHE_TTL = int(os.getenv('GOBLIN_DEGRADED_CACHE_TTL', 60))
+
+_NAMESPACE = 'analysis'
+
+# Concurrent requests for the same symbol/date share one workflow run
+analysis_flights = SingleFlight()
+
+
+def _key(symbol: str, analysis_date: str, indicators: Optional[List[Any]] = None, timeframes: Optional[List[str]] = None) -> str:
+    key = f"{symbol.upper()}:{analysis_date}"
+    if indicators or timeframes:
+        key += f":{sorted(map(str, indicators or []))}:{sorted(timeframes or [])}"
+    return key
+
+
+def get_cached_analysis(symbol: str, analysis_date: str, **options) -> Optional[Dict[str, Any]]:
+    """Return a cached run_analysis result, or None."""
+    try:
+        return get_cache().get(_NAMESPACE, _key(symbol, analysis_date, **options))
+    except sqlite3.Error as e:
+        print(f"analysis cache read failed for {symbol} : {e}")
+        return None
+
+
+def store_analysis(symbol: str, analysis_date: str, result: Dict[str, Any], ttl: Optional[float] = None, **options) -> None:
+    """Cache a successful run_analysis result."""
+    if not result or not result.get('success'):
+        return
+    ttl = ttl or ANALYSIS_CACHE_TTL
+    if result.get('missing_inputs'):
+        ttl = min(ttl, DEGRADED_CACHE_TTL)
+    # Lets HTTP responses tell clients how long the result stays current
+    result['cache_expires_at'] = time.time() + ttl
+    try:
+        get_cache().set(_NAMESPACE, _key(symbol, analysis_date, **options), result, ttl)
+    except sqlite3.Error as e:
+        print(f"analysis cache write failed for {symbol} : {e}")
+
+
+def expires_in(result: Dict[str, Any]) -> Optional[float]:
+    """Seconds until a cached result expires (0 once it has), or None if it was never cached."""
+    expires_at = result.get('cache_expires_at')
+    if expires_at is None:
+        return None
+    return max(0.0, expires_at - time.time())
+
+
+async def get_or_run_analysis(
+        symbol: str,
+        analysis_date: str,
+        session_id: str,
+        refresh: bool = False,
+        ttl: Optional[float] = None,
+        indicators: Optional[List[Any]] = None,
+        timeframes: Optional[List[str]] = None,
+        deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+        Serve an analysis from cache or run the workflow once for all callers.
+
+        Args:
+            symbol: Stock symbol
+            analysis_date: Date for analysis in YYYY-MM-DD format
+            session_id: Session identifier for a fresh run
+            refresh: Skip the cache lookup and recompute (used by pre-warming)
+            ttl: Cache lifetime for the new result (default ANALYSIS_CACHE_TTL)
+            indicators: Extra indicator requests passed to run_analysis
+            timeframes: Extra indicator timeframes passed to run_analysis
+            deadline: Seconds a fresh run may take (run_analysis default,
+                      0 for none); not part of the cache key
+
+        Returns:
+            run_analysis result dict
+    """
+    options = {'indicators': indicators, 'timeframes': timeframes}
+    if not refresh:
+        cached = get_cached_analysis(symbol, analysis_date, **options)
+        if cached is not None:
+            metrics.increment("analysis_cache_hit")
+            return cached
+        metrics.increment("analysis_cache_miss")
+
+    async def compute():
+        from .workflow import run_analysis
+        result = await run_analysis(symbol, analysis_date, session_id, indicators, timeframes, deadline)
+        store_analysis(symbol, analysis_date, result, ttl, **options)
+        return result
+
+    return await analysis_flights.do(_key(symbol, analysis_date, **options), compute)
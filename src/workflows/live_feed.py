@@ -0,0 +1,302 @@
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+import orjson
+from ..tools import replay
+from ..tools.finnhub_tool import get_company_news
+from . import metrics
+from .analysis_cache import get_cached_analysis
+from .report import build_analysis
+
+if TYPE_CHECKING:
+    # NumPy-backed; only imported once a symbol is polled
+    from ..tools.bars import PriceBars
+    from ..tools.incremental_indicators import IncrementalIndicators
+
+# Seconds between upstream bar polls of a subscribed symbol
+LIVE_POLL_SECONDS = float(os.getenv('GOBLIN_LIVE_POLL_SECONDS', 15))
+
+# Bar size of the live feed (yfinance interval)
+LIVE_INTERVAL = os.getenv('GOBLIN_LIVE_INTERVAL', '1m')
+
+# History loaded when a symbol gets its first subscriber, to warm up the indicators
+LIVE_WARMUP_PERIOD = os.getenv('GOBLIN_LIVE_WARMUP_PERIOD', '5d')
+
+# Window fetched on every later poll; must cover more than one poll interval
+LIVE_UPDATE_PERIOD = '1d'
+
+# Seconds between news checks of a subscribed symbol
+LIVE_NEWS_POLL_SECONDS = float(os.getenv('GOBLIN_LIVE_NEWS_POLL_SECONDS', 300))
+
+# Messages buffered per connection before a slow client is resynced
+LIVE_QUEUE_SIZE = int(os.getenv('GOBLIN_LIVE_QUEUE_SIZE', 256))
+
+# Symbols one connection may subscribe to
+LIVE_MAX_SYMBOLS = int(os.getenv('GOBLIN_LIVE_MAX_SYMBOLS', 50))
+
+# Newest headlines sent with a snapshot or news update
+NEWS_ITEMS = 5
+
+
+def _bar(bars: 'PriceBars', i: int) -> Dict[str, Any]:
+    return {
+        'time': int(bars.timestamps[i]),
+        'open': round(float(bars.open[i]), 4),
+        'high': round(float(bars.high[i]), 4),
+        'low': round(float(bars.low[i]), 4),
+        'close': round(float(bars.close[i]), 4),
+        'volume': int(bars.volume[i])
+    }
+
+
+def _changed(new: Dict[str, Any], old: Dict[str, Any]) -> Dict[str, Any]:
+    """Entries of new that differ from old; nested dicts are compared per key."""
+    delta = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if isinstance(value, dict):
+            inner = _changed(value, previous if isinstance(previous, dict) else {})
+            if inner:
+                delta[key] = inner
+        elif value != previous or key not in old:
+            delta[key] = value
+    return delta
+
+
+def _headline(article: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: article.get(key) for key in ('id', 'headline', 'source', 'datetime', 'url')}
+
+
+class Subscriber:
+    """One WebSocket connection: its outgoing queue and watched symbols."""
+
+    def __init__(self, queue_size: int = LIVE_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.symbols: Set[str] = set()
+
+
+class SymbolFeed:
+    """
+        One upstream poller for a symbol, shared by all of its subscribers.
+
+        Closed bars are folded into IncrementalIndicators as they arrive; the
+        bar still forming is only previewed. Every poll pushes what changed
+        since the previous push (price fields and indicator values), and
+        news or the trading signal only when they differ from the last ones
+        sent. A new subscriber first gets a full snapshot.
+    """
+
+    def __init__(self, symbol: str, hub: 'LiveFeed'):
+        self.symbol = symbol
+        self.hub = hub
+        self.subscribers: Set[Subscriber] = set()
+        self.indicators: Optional['IncrementalIndicators'] = None
+        self.closed_until: Optional[int] = None
+        self.bar: Dict[str, Any] = {}
+        self.values: Dict[str, Any] = {}
+        self.news: List[Dict[str, Any]] = []
+        self.signal: Optional[Dict[str, Any]] = None
+        self._news_checked = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self._run(), name=f"live_feed:{self.symbol}")
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'type': 'snapshot',
+            'symbol': self.symbol,
+            'interval': LIVE_INTERVAL,
+            'bar': self.bar or None,
+            'indicators': self.values,
+            'news': self.news,
+            'signal': self.signal
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.increment("live_poll_errors")
+                print(f"live feed poll for {self.symbol} failed : {e}")
+            await asyncio.sleep(LIVE_POLL_SECONDS)
+
+    async def poll(self) -> None:
+        """Fetch once upstream and push the changes to every subscriber."""
+        # NumPy/pandas load on first use, not at startup
+        from ..tools.intraday import BASE_INTERVAL, get_intraday_store
+        from ..tools.yfinance_tool import get_intraday_bars
+
+        first = self.indicators is None
+        metrics.increment("live_polls")
+        result = await get_intraday_bars(
+            self.symbol, LIVE_WARMUP_PERIOD if first else LIVE_UPDATE_PERIOD, LIVE_INTERVAL
+        )
+        if result.success:
+            if LIVE_INTERVAL == BASE_INTERVAL:
+                # The same poll keeps the symbol's intraday ring current
+                get_intraday_store().ingest(self.symbol, result.data['bars'])
+            self._apply_bars(result.data['bars'], first)
+
+        if time.monotonic() - self._news_checked >= LIVE_NEWS_POLL_SECONDS:
+            self._news_checked = time.monotonic()
+            await self._check_news(first)
+        self._check_signal(first)
+
+        if first and self.indicators is not None:
+            self.hub.broadcast(self, self.snapshot())
+
+    def _apply_bars(self, bars: 'PriceBars', first: bool) -> None:
+        if first:
+            from ..tools.incremental_indicators import IncrementalIndicators
+            self.indicators = IncrementalIndicators.from_bars(bars[:-1])
+            closed = []
+        else:
+            # Every bar but the newest has closed; fold in the ones not seen yet
+            start = 0 if self.closed_until is None else int(bars.timestamps.searchsorted(self.closed_until, side='right'))
+            closed = []
+            for i in range(start, len(bars) - 1):
+                self.indicators.update(float(bars.high[i]), float(bars.low[i]), float(bars.close[i]))
+                closed.append(_bar(bars, i))
+        if len(bars) > 1:
+            self.closed_until = int(bars.timestamps[-2])
+
+        bar = _bar(bars, len(bars) - 1)
+        values = self.indicators.preview(float(bars.high[-1]), float(bars.low[-1]), float(bars.close[-1]))
+        price_delta = _changed(bar, self.bar)
+        indicator_delta = _changed(values, self.values)
+        self.bar, self.values = bar, values
+        if first or not (closed or price_delta or indicator_delta):
+            return
+
+        message = {'type': 'bar', 'symbol': self.symbol, 'time': bar['time'], 'bar': price_delta}
+        if closed:
+            message['closed'] = closed
+        if indicator_delta:
+            message['indicators'] = indicator_delta
+        self.hub.broadcast(self, message)
+
+    async def _check_news(self, first: bool) -> None:
+        today = replay.analysis_date()
+        result = await get_company_news(self.symbol, today)
+        if not result.success:
+            return
+        news = [_headline(article) for article in result.data['news'][:NEWS_ITEMS]]
+        if [a['id'] for a in news] == [a['id'] for a in self.news]:
+            return
+        seen = {a['id'] for a in self.news}
+        self.news = news
+        if not first:
+            self.hub.broadcast(self, {
+                'type': 'news', 'symbol': self.symbol,
+                'articles': [a for a in news if a['id'] not in seen]
+            })
+
+    def _check_signal(self, first: bool) -> None:
+        today = replay.analysis_date()
+        cached = get_cached_analysis(self.symbol, today)
+        if not cached:
+            return
+        signal = build_analysis(cached).signal
+        signal = signal.model_dump() if signal else None
+        if signal == self.signal:
+            return
+        self.signal = signal
+        if not first:
+            self.hub.broadcast(self, {'type': 'signal', 'symbol': self.symbol, 'signal': signal})
+
+
+class LiveFeed:
+    """
+        Fan-out hub for the watchlist WebSocket.
+
+        A symbol is polled while at least one connection subscribes to it,
+        by exactly one SymbolFeed, however many clients watch it. Each
+        message is serialized once and queued to every subscriber; a client
+        too slow to drain its queue has it emptied and gets a fresh snapshot
+        instead of a backlog of stale deltas.
+    """
+
+    def __init__(self):
+        self.feeds: Dict[str, SymbolFeed] = {}
+
+    def subscribe(self, symbol: str, subscriber: Subscriber) -> None:
+        symbol = symbol.upper()
+        if symbol in subscriber.symbols:
+            return
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            feed = self.feeds[symbol] = SymbolFeed(symbol, self)
+            feed.start()
+            metrics.increment("live_feeds_started")
+        elif feed.indicators is not None:
+            self._deliver(subscriber, orjson.dumps(feed.snapshot()).decode())
+        feed.subscribers.add(subscriber)
+        subscriber.symbols.add(symbol)
+
+    async def unsubscribe(self, symbol: str, subscriber: Subscriber) -> None:
+        symbol = symbol.upper()
+        subscriber.symbols.discard(symbol)
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            return
+        feed.subscribers.discard(subscriber)
+        if not feed.subscribers:
+            del self.feeds[symbol]
+            await feed.stop()
+
+    async def disconnect(self, subscriber: Subscriber) -> None:
+        for symbol in list(subscriber.symbols):
+            await self.unsubscribe(symbol, subscriber)
+
+    def broadcast(self, feed: SymbolFeed, message: Dict[str, Any]) -> None:
+        payload = orjson.dumps(message).decode()
+        metrics.increment(f"live_messages:{message['type']}", len(feed.subscribers))
+        for subscriber in list(feed.subscribers):
+            self._deliver(subscriber, payload)
+
+    def _deliver(self, subscriber: Subscriber, payload: str) -> None:
+        try:
+            subscriber.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Dropped deltas would leave the client inconsistent: replace
+            # the backlog with a snapshot of every symbol it watches
+            metrics.increment("live_client_resyncs")
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            for symbol in subscriber.symbols:
+                feed = self.feeds.get(symbol)
+                if feed is not None and feed.indicators is not None:
+                    subscriber.queue.put_nowait(orjson.dumps(feed.snapshot()).decode())
+
+    async def close(self) -> None:
+        feeds, self.feeds = list(self.feeds.values()), {}
+        for feed in feeds:
+            await feed.stop()
+
+    def stats(self) -> Dict[str, int]:
+        return {symbol: len(feed.subscribers) for symbol, feed in self.feeds.items()}
+
+
+_hub: Optional[LiveFeed] = None
+
+
+def get_live_feed() -> LiveFeed:
+    """Return the process-wide hub, creating it on first use."""
+    global _hub
+    if _hub is None:
+        _hub = LiveFeed()
+    return _hub
@@ -0,0 +1,25 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict
+
+# Process-wide counters, exposed through the /metrics endpoint
+_counters: Dict[str, float] = defaultdict(float)
+_lock = Lock()
+
+
+def increment(name: str, value: float = 1) -> None:
+    """Increment a named counter."""
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot() -> Dict[str, float]:
+    """Return a copy of all counters."""
+    with _lock:
+        return dict(_counters)
+
+
+def reset() -> None:
+    """Clear all counters (used by benchmarks)."""
+    with _lock:
+        _counters.clear()
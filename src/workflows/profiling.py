@@ -0,0 +1,228 @@
+import contextlib
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from . import metrics, tracing
+
+# Profiling requests are ignored unless GOBLIN_PROFILING=1
+PROFILING_ENABLED = os.getenv('GOBLIN_PROFILING', '0') == '1'
+
+# When set, a request is only profiled (and profiles only served) if it
+# carries this token as its profiling flag
+PROFILE_TOKEN = os.getenv('GOBLIN_PROFILE_TOKEN', '')
+
+# Where finished profiles are written
+PROFILE_DIR = os.getenv('GOBLIN_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'goblin_profiles'))
+
+# Most recent profiles kept on disk
+PROFILE_KEEP = int(os.getenv('GOBLIN_PROFILE_KEEP', 50))
+
+# Functions listed in a profile summary
+TOP_FUNCTIONS = 40
+
+_PROFILE_ID = re.compile(r'^[0-9a-f]{16}$')
+
+# The profile of the request running in this context, if any. Tasks and
+# threads started from the request (graph nodes, asyncio.to_thread) inherit it.
+_active: ContextVar[Optional['RequestProfile']] = ContextVar('goblin_profile', default=None)
+
+# cProfile hooks the whole event loop thread, so only one request at a time
+# gets a CPU profile; others profiled concurrently still record their spans
+_cpu_profile_lock = threading.Lock()
+
+
+def authorized(flag: Optional[str]) -> bool:
+    """Whether a profiling flag (header or query value) may use profiling."""
+    if not PROFILING_ENABLED or not flag:
+        return False
+    if PROFILE_TOKEN:
+        return hmac.compare_digest(flag.encode(), PROFILE_TOKEN.encode())
+    return flag.lower() not in ('0', 'false')
+
+
+class RequestProfile:
+    """
+        Profile of one request: a cProfile run plus a forced trace.
+
+        cProfile only sees CPU time on the event loop thread; a coroutine
+        waiting on I/O is not running and does not show up. The trace fills
+        that gap: every instrumented node, tool and LLM call is a span
+        covering its full wall time, awaiting included.
+    """
+
+    def __init__(self, label: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.label = label
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.meta: Dict[str, Any] = {}
+        self.root: Optional[tracing.Span] = None
+        self.profiler: Optional[cProfile.Profile] = None
+
+    @property
+    def spans(self) -> List[Dict[str, Any]]:
+        """Every span below the request, timed from the start of the request."""
+        if self.root is None:
+            return []
+        start = self.root.start_ns
+        return [
+            {
+                'name': span.name,
+                'start_ms': round((span.start_ns - start) / 1e6, 3),
+                'duration_ms': None if span.end_ns is None else round(span.duration_ms, 3),
+                'error': span.status == 'error'
+            }
+            for span in self.root.trace.spans if span is not self.root
+        ]
+
+    def span_totals(self) -> Dict[str, Dict[str, float]]:
+        totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        for span in self.spans:
+            if span['duration_ms'] is None:
+                continue
+            entry = totals[span['name']]
+            entry['count'] += 1
+            entry['total_ms'] = round(entry['total_ms'] + span['duration_ms'], 3)
+            entry['max_ms'] = max(entry['max_ms'], span['duration_ms'])
+        return dict(sorted(totals.items(), key=lambda item: -item[1]['total_ms']))
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler).stats
+        rows = [
+            {
+                'function': pstats.func_std_string(function),
+                'calls': calls,
+                'tottime_ms': round(tottime * 1000, 3),
+                'cumtime_ms': round(cumtime * 1000, 3)
+            }
+            for function, (_, calls, tottime, cumtime, _) in stats.items()
+        ]
+        rows.sort(key=lambda row: -row['cumtime_ms'])
+        return rows[:limit]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'label': self.label,
+            'started_at': self.started_at,
+            'duration_ms': self.duration_ms,
+            'cpu_profile': self.profiler is not None,
+            'trace_id': self.root.trace.trace_id if self.root else None,
+            'meta': self.meta,
+            'span_totals': self.span_totals(),
+            'spans': self.spans,
+            'top_functions': self.top_functions()
+        }
+
+    def save(self) -> None:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if self.profiler is not None:
+            self.profiler.dump_stats(os.path.join(PROFILE_DIR, f"{self.id}.prof"))
+        with open(os.path.join(PROFILE_DIR, f"{self.id}.json"), 'w') as f:
+            json.dump(self.summary(), f)
+        _prune()
+
+
+def active() -> bool:
+    """True when the current request is being profiled."""
+    return _active.get() is not None
+
+
+def annotate(**fields: Any) -> None:
+    """Attach metadata (e.g. the analyzed symbol) to the active profile, if any."""
+    profile = _active.get()
+    if profile is not None:
+        profile.meta.update(fields)
+
+
+@contextlib.contextmanager
+def profile_request(label: str):
+    """
+        Profile everything run in this context until the block exits.
+
+        Yields the RequestProfile; it is saved to PROFILE_DIR on exit and
+        can be read back with load_profile(profile.id).
+    """
+    profile = RequestProfile(label)
+    token = _active.set(profile)
+    cpu = _cpu_profile_lock.acquire(blocking=False)
+    if cpu:
+        profile.profiler = cProfile.Profile()
+        try:
+            profile.profiler.enable()
+        except ValueError:
+            # Another profiler (or debugger) owns the hook; keep spans only
+            profile.profiler = None
+            cpu = False
+            _cpu_profile_lock.release()
+    metrics.increment("profiles_started")
+    try:
+        with tracing.start_trace(label, force=True, profile_id=profile.id) as root:
+            profile.root = root
+            yield profile
+    finally:
+        if cpu:
+            profile.profiler.disable()
+            _cpu_profile_lock.release()
+        _active.reset(token)
+        profile.duration_ms = round((time.perf_counter() - profile._start) * 1000, 3)
+        try:
+            profile.save()
+        except OSError as e:
+            print(f"saving profile {profile.id} failed : {e}")
+
+
+def profile_path(profile_id: str, kind: str = 'json') -> Optional[str]:
+    """Path of a stored profile file ('json' summary or 'prof' pstats dump), or None."""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.{kind}")
+    return path if os.path.exists(path) else None
+
+
+def load_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    path = profile_path(profile_id)
+    if path is None:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profiles, newest first (id, label, start time and duration)."""
+    profiles = []
+    for path in _profile_files():
+        try:
+            with open(path) as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        profiles.append({key: summary.get(key) for key in ('id', 'label', 'started_at', 'duration_ms', 'cpu_profile')})
+    return profiles
+
+
+def _profile_files() -> List[str]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    paths = [os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR) if name.endswith('.json')]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def _prune() -> None:
+    for path in _profile_files()[PROFILE_KEEP:]:
+        for kind in ('json', 'prof'):
+            with contextlib.suppress(OSError):
+                os.remove(f"{path[:-len('.json')]}.{kind}")
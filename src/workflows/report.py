@@ -0,0 +1,441 @@
+import math
+from typing import Any, Dict, Iterable, List, Optional, Union
+from pydantic import BaseModel, ConfigDict
+
+# Optional parts of an Analysis, left out unless asked for to keep payloads small
+INCLUDE_OPTIONS = ('history', 'metrics', 'series')
+
+# An indicator's latest value, or one per line for multi-line indicators
+# (MACD, BBANDS), or the error text when it could not be calculated
+IndicatorValue = Union[Optional[float], Dict[str, Optional[float]], str]
+
+
+class PriceSnapshot(BaseModel):
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float] = None
+    volume: Optional[float] = None
+    previous_close: Optional[float] = None
+    price_change: Optional[float] = None
+    price_change_pct: Optional[float] = None
+
+
+class PriceHistory(BaseModel):
+    """Daily OHLCV columns, oldest first."""
+    dates: List[str]
+    open: List[float]
+    high: List[float]
+    low: List[float]
+    close: List[float]
+    volume: List[float]
+
+
+class MarketData(BaseModel):
+    current_price: Optional[float] = None
+    price: PriceSnapshot
+    history: Optional[PriceHistory] = None
+
+
+class Company(BaseModel):
+    name: Optional[str] = None
+    sector: Optional[str] = None
+    industry: Optional[str] = None
+    country: Optional[str] = None
+    exchange: Optional[str] = None
+    currency: Optional[str] = None
+    market_cap: Optional[float] = None
+    website: Optional[str] = None
+    description: Optional[str] = None
+
+
+class Fundamentals(BaseModel):
+    """The Finnhub metrics the agents use; the full set and series on request."""
+    pe_ratio: Optional[float] = None
+    pb_ratio: Optional[float] = None
+    roe: Optional[float] = None
+    roa: Optional[float] = None
+    debt_equity: Optional[float] = None
+    current_ratio: Optional[float] = None
+    profit_margin: Optional[float] = None
+    revenue_growth: Optional[float] = None
+    eps: Optional[float] = None
+    dividend_yield: Optional[float] = None
+    updated: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+    series: Optional[Dict[str, Any]] = None
+
+
+class PeerMetric(BaseModel):
+    value: Optional[float] = None
+    peer_median: Optional[float] = None
+    percentile: Optional[float] = None
+    peers_reporting: int = 0
+
+
+class PeerComparison(BaseModel):
+    peers: List[str]
+    metrics: Dict[str, PeerMetric]
+
+
+class Technicals(BaseModel):
+    data_points: int
+    indicators: Dict[str, IndicatorValue]
+    timeframes: Optional[Dict[str, Dict[str, IndicatorValue]]] = None
+
+
+class NewsArticle(BaseModel):
+    # The LLM may add fields; keep them
+    model_config = ConfigDict(extra='allow')
+
+    headline: Optional[str] = None
+    published_date: Optional[str] = None
+    source: Optional[str] = None
+    key_points: List[str] = []
+    sentiment: Optional[str] = None
+    impact: Optional[str] = None
+    category: Optional[str] = None
+
+
+class News(BaseModel):
+    total_news: int = 0
+    analyzed: int = 0
+    articles: List[NewsArticle]
+
+
+class Signal(BaseModel):
+    trading_signal: str
+    confidence_level: float
+    position_size: int
+
+
+class Analysis(BaseModel):
+    """
+        Typed view of a run_analysis() result.
+
+        Stages that failed or did not run are None; missing_inputs names the
+        ones the signal was decided without (failed or past the deadline),
+        and the signal's confidence is discounted for them. Raw price history,
+        the full Finnhub metric set and its series are only filled in when
+        requested through include (see INCLUDE_OPTIONS).
+    """
+    symbol: str
+    analysis_date: str
+    success: bool
+    error: Optional[str] = None
+    market: Optional[MarketData] = None
+    company: Optional[Company] = None
+    fundamentals: Optional[Fundamentals] = None
+    peers: Optional[PeerComparison] = None
+    technicals: Optional[Technicals] = None
+    news: Optional[News] = None
+    signal: Optional[Signal] = None
+    missing_inputs: List[str] = []
+
+
+# --- building ---
+
+def _stage(results: Dict[str, Any], name: str) -> Optional[Dict[str, Any]]:
+    stage = results.get(name)
+    return stage if isinstance(stage, dict) and stage.get('success', True) else None
+
+
+def _latest(value: Any) -> IndicatorValue:
+    """[x] -> x, [] -> None; dicts per line; error strings unchanged."""
+    if isinstance(value, list):
+        return value[-1] if value else None
+    if isinstance(value, dict):
+        return {key: _latest(line) for key, line in value.items()}
+    return value
+
+
+def _number(value: Any) -> Optional[float]:
+    """A float, or None for what is not a finite number (e.g. Finnhub's 'NM')."""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _string(value: Any) -> Optional[str]:
+    """Text as is; other values (an LLM's 20250101 or 3) as their text."""
+    return None if value is None else str(value)
+
+
+def _market(data: Dict[str, Any], include: set) -> Optional[MarketData]:
+    market = data.get('market_data')
+    if not market:
+        return None
+    history = None
+    bars = market.get('historical_data')
+    if 'history' in include and bars is not None:
+        from ..tools.bars import PriceBars
+        bars = PriceBars.coerce(bars)
+        history = PriceHistory(
+            dates=bars.dates().tolist(),
+            open=bars.open.tolist(), high=bars.high.tolist(), low=bars.low.tolist(),
+            close=bars.close.tolist(), volume=bars.volume.tolist()
+        )
+    return MarketData(
+        current_price=market.get('current_price'),
+        price=PriceSnapshot(**(market.get('price_data') or {})),
+        history=history
+    )
+
+
+def _company(data: Dict[str, Any]) -> Optional[Company]:
+    info = data.get('company_info') or {}
+    profile = data.get('company_profile') or {}
+    if not info and not profile:
+        return None
+    return Company(
+        name=info.get('name') or profile.get('name'),
+        sector=info.get('sector'),
+        industry=info.get('industry') or profile.get('industry'),
+        country=info.get('country') or profile.get('country'),
+        exchange=info.get('exchange') or profile.get('exchange'),
+        currency=profile.get('currency'),
+        market_cap=_number(info.get('market_cap')),
+        website=info.get('website') or profile.get('weburl') or None,
+        description=info.get('description')
+    )
+
+
+def _fundamentals(data: Dict[str, Any], include: set) -> Optional[Fundamentals]:
+    financials = data.get('basic_financials')
+    if not financials:
+        return None
+    from ..tools.finnhub_tool import essential_financials
+    metrics = financials.get('metrics') or {}
+    return Fundamentals(
+        **{key: _number(value) for key, value in essential_financials(metrics).items()},
+        updated=_string(financials.get('updated')),
+        metrics=metrics if 'metrics' in include else None,
+        series=financials.get('series') if 'series' in include else None
+    )
+
+
+def _technicals(technical: Optional[Dict[str, Any]]) -> Optional[Technicals]:
+    indicators = (technical or {}).get('indicators')
+    if not indicators:
+        return None
+    timeframes = indicators.get('timeframes')
+    return Technicals(
+        data_points=indicators.get('data_points', 0),
+        indicators={name: _latest(value) for name, value in (indicators.get('technical_indicators') or {}).items()},
+        timeframes={
+            timeframe: {name: _latest(value) for name, value in (frame.get('technical_indicators') or {}).items()}
+            for timeframe, frame in timeframes.items() if isinstance(frame, dict)
+        } if timeframes else None
+    )
+
+
+# NewsArticle fields the LLM sometimes fills with numbers (dates, impact scores)
+_ARTICLE_TEXT_FIELDS = ('headline', 'published_date', 'source', 'sentiment', 'impact', 'category')
+
+
+def _news(news: Optional[Dict[str, Any]]) -> Optional[News]:
+    if not news:
+        return None
+    features = news.get('nlp_features') or {}
+    articles = []
+    for article in features.get('news_features') or []:
+        if not isinstance(article, dict):
+            continue
+        # LLM output: a single key point sometimes comes back as a plain value
+        key_points = article.get('key_points') or []
+        if not isinstance(key_points, list):
+            key_points = [key_points]
+        text = {field: _string(article.get(field)) for field in _ARTICLE_TEXT_FIELDS}
+        articles.append(NewsArticle(**{**article, **text, 'key_points': [str(point) for point in key_points]}))
+    return News(total_news=news.get('total_news', 0), analyzed=features.get('total_analyzed', len(articles)), articles=articles)
+
+
+def _signal(portfolio: Optional[Dict[str, Any]], symbol: str) -> Optional[Signal]:
+    decision = (portfolio or {}).get(symbol)
+    if not decision or not decision.get('success'):
+        return None
+    return Signal(
+        trading_signal=decision.get('trading_signal', 'HOLD'),
+        confidence_level=decision.get('confidence_level', 0),
+        position_size=decision.get('position_size', 0)
+    )
+
+
+def parse_include(include: Union[str, Iterable[str], None]) -> set:
+    """
+        Normalize an include list ("history,series" or an iterable).
+
+        Raises:
+            ValueError: unknown include option
+    """
+    if include is None:
+        return set()
+    if isinstance(include, str):
+        include = include.split(',')
+    options = {option.strip().lower() for option in include if option.strip()}
+    unknown = options - set(INCLUDE_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown include option(s): {', '.join(sorted(unknown))} (supported: {', '.join(INCLUDE_OPTIONS)})")
+    return options
+
+
+def build_analysis(result: Dict[str, Any], include: Union[str, Iterable[str], None] = None) -> Analysis:
+    """
+        Build the typed Analysis for a run_analysis() result.
+
+        Args:
+            result: run_analysis() / get_or_run_analysis() result
+            include: Optional parts to add: 'history', 'metrics', 'series'
+    """
+    include = parse_include(include)
+    symbol = result.get('symbol', '')
+    results = result.get('results') or {}
+    data = _stage(results, 'data_collection') or {}
+    peers = _stage(results, 'peer_comparison')
+
+    return Analysis(
+        symbol=symbol,
+        analysis_date=result.get('analysis_date', ''),
+        success=bool(result.get('success')),
+        error=result.get('error'),
+        market=_market(data, include),
+        company=_company(data),
+        fundamentals=_fundamentals(data, include),
+        peers=PeerComparison(peers=peers.get('peers', []), metrics=peers.get('metrics', {})) if peers else None,
+        technicals=_technicals(_stage(results, 'technical_analysis')),
+        news=_news(_stage(results, 'news_intelligence')),
+        signal=_signal(results.get('portfolio_manager'), symbol),
+        missing_inputs=result.get('missing_inputs') or []
+    )
+
+
+# --- plain-text report ---
+
+def _text(value: Any) -> str:
+    return "N/A" if value is None else str(value)
+
+
+def format_currency(value):
+    try:
+        return f"${float(value):,.2f}"
+    except (TypeError, ValueError):
+        return "N/A"
+
+
+def format_percentage(value):
+    try:
+        return f"{float(value):.2f}%"
+    except (TypeError, ValueError):
+        return "N/A"
+
+
+def format_billions(value):
+    try:
+        return f"${float(value)/1_000_000_000:.2f}B"
+    except (TypeError, ValueError):
+        return "N/A"
+
+
+def render_text(analysis: Analysis) -> str:
+    """The 70-column plain-text report returned by /chat."""
+    market = analysis.market or MarketData(price=PriceSnapshot())
+    price = market.price
+    company = analysis.company or Company()
+    fundamentals = analysis.fundamentals or Fundamentals()
+    indicators = analysis.technicals.indicators if analysis.technicals else {}
+    articles = analysis.news.articles if analysis.news else []
+
+    def indicator(name: str, line: Optional[str] = None) -> str:
+        value = indicators.get(name)
+        if line is not None:
+            value = value.get(line) if isinstance(value, dict) else None
+        return _text(value)
+
+    lines = []
+    lines.append("=" * 70)
+    lines.append("GOBLIN - FINANCIAL ANALYST")
+    lines.append(f"Symbol: {analysis.symbol} | Date: {analysis.analysis_date}")
+    lines.append("=" * 70)
+    lines.append("")
+
+    lines.append("MARKET DATA")
+    lines.append("-" * 70)
+    lines.append(f"Current Price:      {format_currency(market.current_price)}")
+    lines.append(f"Previous Close:     {format_currency(price.previous_close)}")
+    lines.append(f"Price Change:       {format_currency(price.price_change)} ({format_percentage(price.price_change_pct)})")
+    lines.append("")
+    lines.append(f"Company:            {_text(company.name)}")
+    lines.append(f"Sector:             {_text(company.sector)}")
+    lines.append(f"Industry:           {_text(company.industry)}")
+    lines.append(f"Market Cap:         {format_billions(company.market_cap)}")
+    lines.append("")
+
+    lines.append(f"Description: {_text(company.description)}...")
+    lines.append("")
+
+    lines.append("FUNDAMENTAL METRICS")
+    lines.append("-" * 70)
+    lines.append(f"P/E Ratio:          {_text(fundamentals.pe_ratio)}")
+    lines.append(f"P/B Ratio:          {_text(fundamentals.pb_ratio)}")
+    lines.append(f"Dividend Yield:     {format_percentage(fundamentals.dividend_yield or 0)}")
+    lines.append("")
+    lines.append(f"ROE:                {format_percentage(fundamentals.roe)}")
+    lines.append(f"ROA:                {format_percentage(fundamentals.roa)}")
+    lines.append(f"Profit Margin:      {format_percentage(fundamentals.profit_margin)}")
+    lines.append(f"EPS:                {format_currency(fundamentals.eps)}")
+    lines.append("")
+    lines.append(f"Current Ratio:      {_text(fundamentals.current_ratio)}")
+    lines.append(f"Debt/Equity:        {_text(fundamentals.debt_equity)}")
+    lines.append(f"Revenue Growth:     {format_percentage(fundamentals.revenue_growth)}")
+    lines.append("")
+
+    lines.append("TECHNICAL INDICATORS")
+    lines.append("-" * 70)
+    lines.append(f"SMA (20):           {indicator('SMA')}")
+    lines.append(f"EMA (20):           {indicator('EMA')}")
+    lines.append(f"RSI (14):           {indicator('RSI')}")
+    lines.append(f"ADX (14):           {indicator('ADX')}")
+    lines.append(f"CCI (20):           {indicator('CCI')}")
+    lines.append("")
+    lines.append(f"MACD Line:          {indicator('MACD', 'macd')}")
+    lines.append(f"MACD Signal:        {indicator('MACD', 'signal')}")
+    lines.append(f"MACD Histogram:     {indicator('MACD', 'histogram')}")
+    lines.append("")
+    lines.append(f"BB Upper:           {indicator('BBANDS', 'upper')}")
+    lines.append(f"BB Middle:          {indicator('BBANDS', 'middle')}")
+    lines.append(f"BB Lower:           {indicator('BBANDS', 'lower')}")
+    lines.append("")
+
+    lines.append("NEWS ANALYSIS")
+    lines.append("-" * 70)
+    lines.append(f"Articles Analyzed:  {len(articles)}")
+    lines.append("")
+
+    for i, article in enumerate(articles[:3], 1):
+        lines.append(f"Article {i}:  {(article.sentiment or 'neutral').upper()}")
+        lines.append(f"  {article.headline or 'No headline'}...")
+        lines.append("")
+
+    lines.append("PORTFOLIO RECOMMENDATION")
+    lines.append("-" * 70)
+
+    if analysis.signal:
+        confidence = analysis.signal.confidence_level
+        lines.append(f"Signal:             {analysis.signal.trading_signal}")
+        lines.append(f"Confidence:         {confidence:.1f}/1.0 ({confidence*100:.0f}%)")
+        lines.append(f"Position Size:      {analysis.signal.position_size}%")
+    else:
+        lines.append("Portfolio analysis unavailable")
+    if analysis.missing_inputs:
+        lines.append(f"Missing Inputs:     {', '.join(stage.replace('_', ' ') for stage in analysis.missing_inputs)}")
+
+    lines.append("")
+    lines.append("=" * 70)
+    lines.append("End of Analysis")
+    lines.append("=" * 70)
+
+    return "\n".join(lines)
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Set
+from zoneinfo import ZoneInfo
+from ..tools.cache import get_cache
+from . import metrics
+
+
+class CronSchedule:
+    """
+        Minimal 5-field cron expression: minute hour day-of-month month day-of-week.
+
+        Each field accepts *, numbers, ranges (1-5), lists (1,15) and steps
+        (*/15, 0-30/10). Day of week uses 0-6 with 0 = Sunday (7 also = Sunday).
+        As in cron, when both day fields are restricted a day matching either
+        one runs.
+    """
+
+    _RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {expression!r}")
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self._RANGES)
+        ]
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_str = part.split('/', 1)
+                step = int(step_str)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start_str, end_str = part.split('-', 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = end = int(part)
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        if moment.month not in self.months:
+            return False
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.isoweekday() % 7) in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Return the first matching minute strictly after moment (same tzinfo)."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+
+class WatchlistScheduler:
+    """
+        Pre-compute analyses for a watchlist on a cron schedule.
+
+        At each run the symbols are analyzed with limited concurrency and their
+        start times are spread over `spread_seconds`, so the upstream calls stay
+        within the shared Finnhub/Groq limits. Results land in the analysis
+        cache, so the first user request after the open is a cache hit.
+
+        With several uvicorn workers only the worker that wins the lease in
+        the shared cache runs a given slot.
+    """
+
+    def __init__(
+            self,
+            symbols: List[str],
+            schedule: str,
+            prewarm: Callable[[str], Awaitable[bool]],
+            timezone: str = 'America/New_York',
+            concurrency: int = 2,
+            spread_seconds: float = 0.0
+    ):
+        self.symbols = [s.strip().upper() for s in symbols if s.strip()]
+        self.schedule = CronSchedule(schedule)
+        self.prewarm = prewarm
+        self.tz = ZoneInfo(timezone)
+        self.concurrency = max(1, concurrency)
+        self.spread_seconds = spread_seconds
+        self.last_run: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, prewarm: Callable[[str], Awaitable[bool]]) -> Optional['WatchlistScheduler']:
+        """
+            Build a scheduler from environment variables, or None if no watchlist is set.
+
+            GOBLIN_WATCHLIST: comma-separated symbols
+            GOBLIN_WATCHLIST_SCHEDULE: cron expression (default "0 9 * * 1-5")
+            GOBLIN_WATCHLIST_TZ: timezone of the schedule (default America/New_York)
+            GOBLIN_WATCHLIST_CONCURRENCY: symbols analyzed at once (default 2)
+            GOBLIN_WATCHLIST_SPREAD_SECONDS: window to spread symbol starts over (default 0)
+        """
+        symbols = [s for s in os.getenv('GOBLIN_WATCHLIST', '').split(',') if s.strip()]
+        if not symbols:
+            return None
+
+        return cls(
+            symbols,
+            os.getenv('GOBLIN_WATCHLIST_SCHEDULE', '0 9 * * 1-5'),
+            prewarm,
+            timezone=os.getenv('GOBLIN_WATCHLIST_TZ', 'America/New_York'),
+            concurrency=int(os.getenv('GOBLIN_WATCHLIST_CONCURRENCY', 2)),
+            spread_seconds=float(os.getenv('GOBLIN_WATCHLIST_SPREAD_SECONDS', 0))
+        )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            now = datetime.now(self.tz)
+            next_run = self.schedule.next_after(now)
+            print(f"watchlist pre-warm of {len(self.symbols)} symbols scheduled for {next_run.isoformat()}")
+            await asyncio.sleep(max(0.0, (next_run - datetime.now(self.tz)).total_seconds()))
+
+            if self._claim(next_run):
+                await self.run_once()
+
+    def _claim(self, slot: datetime) -> bool:
+        """Take the cross-worker lease for one scheduled slot."""
+        try:
+            return get_cache().add('scheduler', f"watchlist:{slot.isoformat()}", os.getpid(), 6 * 3600)
+        except sqlite3.Error as e:
+            print(f"watchlist lease unavailable, running anyway : {e}")
+            return True
+
+    async def run_once(self) -> int:
+        """Pre-warm every symbol once. Returns the number that succeeded."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        interval = self.spread_seconds / len(self.symbols) if self.symbols else 0.0
+
+        async def warm(index: int, symbol: str) -> bool:
+            await asyncio.sleep(index * interval)
+            async with semaphore:
+                try:
+                    ok = await self.prewarm(symbol)
+                except Exception as e:
+                    print(f"watchlist pre-warm failed for {symbol} : {e}")
+                    ok = False
+            metrics.increment("watchlist_prewarm_ok" if ok else "watchlist_prewarm_failed")
+            return ok
+
+        started = datetime.now(self.tz)
+        results = await asyncio.gather(*(warm(i, s) for i, s in enumerate(self.symbols)))
+        self.last_run = started
+
+        succeeded = sum(results)
+        elapsed = (datetime.now(self.tz) - started).total_seconds()
+        print(f"watchlist pre-warm finished : {succeeded}/{len(self.symbols)} symbols in {elapsed:.1f}s")
+        return succeeded
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+from . import metrics
+
+
+class _Call:
+    """One shared in-flight computation and the number of callers waiting on it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+        Collapse concurrent calls with the same key into one computation.
+
+        Every caller awaits the same task through asyncio.shield, so a caller
+        being cancelled (e.g. its HTTP client disconnected) never cancels the
+        work for the others. The shared task is only cancelled once the last
+        waiter has gone away.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+            Run factory() once per key and share its result.
+
+            Args:
+                key: Identity of the computation (e.g. "AAPL:2025-01-02")
+                factory: Zero-argument callable returning the coroutine to run
+
+            Returns:
+                The result of the shared computation
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _, k=key, c=call: self._forget(k, c))
+        else:
+            metrics.increment("singleflight_shared")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done() and call.waiters == 1:
+                call.task.cancel()
+                metrics.increment("analysis_cancelled")
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Awaitable, Callable, Optional
+from ..tools.cache import get_cache
+from . import metrics
+
+# Seconds a stage output stays reusable once its inputs stop changing
+STAGE_CACHE_TTL = int(os.getenv('GOBLIN_STAGE_CACHE_TTL', 7 * 24 * 3600))
+
+# Set GOBLIN_STAGE_CACHE=0 to always recompute every stage
+STAGE_CACHE_ENABLED = os.getenv('GOBLIN_STAGE_CACHE', '1') != '0'
+
+_NAMESPACE = 'stage'
+
+
+def _canonical(obj: Any) -> Any:
+    """JSON fallback: objects can provide their own cheap fingerprint."""
+    if hasattr(obj, 'fingerprint'):
+        return obj.fingerprint()
+    return str(obj)
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+        Stable hash of a stage's inputs.
+
+        Dicts are hashed with sorted keys, so the same data always produces
+        the same fingerprint regardless of insertion order.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=_canonical, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def run_stage(
+        stage: str,
+        symbol: str,
+        input_fingerprint: str,
+        compute: Callable[[], Awaitable[Any]],
+        is_valid: Optional[Callable[[Any], bool]] = None
+) -> Any:
+    """
+        Reuse a stage's previous output when its inputs are unchanged.
+
+        Like a build system's up-to-date check: the output of compute() is
+        persisted under (stage, symbol, fingerprint) and returned without
+        running compute() again while the fingerprint matches.
+
+        Args:
+            stage: Stage name (e.g. "technical_analysis")
+            symbol: Stock symbol
+            input_fingerprint: fingerprint() of everything the stage reads
+            compute: Produces the stage output when there is no reusable one
+            is_valid: Decides whether an output may be stored (default: not None)
+
+        Returns:
+            The reused or freshly computed stage output
+    """
+    if not STAGE_CACHE_ENABLED:
+        return await compute()
+
+    key = f"{stage}:{symbol.upper()}:{input_fingerprint}"
+    try:
+        previous = get_cache().get(_NAMESPACE, key)
+    except sqlite3.Error as e:
+        print(f"stage cache read failed for {stage} : {e}")
+        previous = None
+
+    if previous is not None:
+        print(f"{stage} inputs unchanged for {symbol}, reusing previous output")
+        metrics.increment(f"stage_skipped:{stage}")
+        return previous
+
+    metrics.increment(f"stage_computed:{stage}")
+    output = await compute()
+
+    valid = is_valid(output) if is_valid else output is not None
+    if valid:
+        try:
+            get_cache().set(_NAMESPACE, key, output, STAGE_CACHE_TTL)
+        except sqlite3.Error as e:
+            print(f"stage cache write failed for {stage} : {e}")
+    return output
@@ -1,4 +1,4 @@
-from typing import TypedDict, Dict, Any, Optional
+from typing import Annotated, TypedDict, Dict, Any, List, Optional
 from datetime import datetime
 
 # Import NotRequired (needed to make fields disappear from UI input)
@@ -7,6 +7,11 @@ try:
 except ImportError:
     from typing_extensions import NotRequired
 
+def _latest_error(previous: Optional[str], new: Optional[str]) -> Optional[str]:
+    """Reducer for error: stages running in parallel may each report one."""
+    return new or previous
+
+
 class AgentState(TypedDict):
     """
     Unified state structure for all Goblin agents.
@@ -19,25 +24,44 @@ class AgentState(TypedDict):
     analysis_date: NotRequired[str] 
     current_step: NotRequired[str]
 
+    # --- INDICATOR REQUEST (defaults to the standard daily set) ---
+    indicators: NotRequired[List[Any]]
+    timeframes: NotRequired[List[str]]
+
     # --- OUTPUTS (Calculated later, so not required at start) ---
     data_collection_results: NotRequired[Dict[str, Any]]
+    peer_comparison_results: NotRequired[Dict[str, Any]]
     news_intelligence_results: NotRequired[Dict[str, Any]]
     technical_analysis_results: NotRequired[Dict[str, Any]]
     portfolio_manager_results: NotRequired[Dict[str, Any]]
 
+    # --- DEADLINE (time.monotonic() value; stages still running then are marked missing) ---
+    deadline: NotRequired[float]
+
     # --- ERROR HANDLING ---
-    error: NotRequired[str]
+    error: NotRequired[Annotated[str, _latest_error]]
 
 # Keep your helper function (used by main.py)
-def create_initial_state(symbol: str, session_id: str, analysis_date: str) -> AgentState:
+def create_initial_state(
+        symbol: str,
+        session_id: str,
+        analysis_date: str,
+        indicators: Optional[List[Any]] = None,
+        timeframes: Optional[List[str]] = None
+) -> AgentState:
     if analysis_date is None:
         analysis_date = datetime.now().strftime("%Y-%m-%d")
         
-    return {
+    state = {
         "symbol": symbol,
         "session_id": session_id,
         "analysis_date": analysis_date,
         "current_step": "initialized",
         # We don't need to set the others to None explicitly anymore
         # because they are NotRequired
-    }
\ No newline at end of file
+    }
+    if indicators:
+        state["indicators"] = list(indicators)
+    if timeframes:
+        state["timeframes"] = list(timeframes)
+    return state
\ No newline at end of file
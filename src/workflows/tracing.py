@@ -0,0 +1,250 @@
+import contextlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, List, Optional
+from . import metrics
+
+# Fraction of analyses traced (0 disables tracing, 1 traces everything)
+TRACE_SAMPLE_RATE = float(os.getenv('GOBLIN_TRACE_SAMPLE_RATE', 0.1))
+
+# Comma-separated exporters: "memory" (ring buffer behind /traces), "file"
+# (JSON lines in TRACE_FILE) and "langsmith" (LangChain's own remote tracing)
+TRACE_EXPORTERS = [e.strip() for e in os.getenv('GOBLIN_TRACE_EXPORTERS', 'memory').split(',') if e.strip()]
+
+TRACE_FILE = os.getenv('GOBLIN_TRACE_FILE', os.path.join(tempfile.gettempdir(), 'goblin_traces.jsonl'))
+
+# Most recent traces kept by the memory exporter
+TRACE_BUFFER_SIZE = int(os.getenv('GOBLIN_TRACE_BUFFER', 200))
+
+
+class Span:
+    """One timed operation, shaped like an OpenTelemetry span."""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes', 'start_ns', 'end_ns', 'status', 'error')
+
+    def __init__(self, trace: 'Trace', name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = 'ok'
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_id,
+            'name': self.name,
+            'start_time_unix_nano': self.start_ns,
+            'end_time_unix_nano': self.end_ns,
+            'duration_ms': None if self.end_ns is None else round(self.duration_ms, 3),
+            'attributes': self.attributes,
+            'status': {'code': self.status, 'message': self.error}
+        }
+
+
+class Trace:
+    """All spans of one sampled operation (usually one run_analysis)."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: List[Span] = []
+        self.root = Span(self, name, None, attributes)
+        self.spans.append(self.root)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.root.name,
+            'start_time_unix_nano': self.root.start_ns,
+            'duration_ms': None if self.root.end_ns is None else round(self.root.duration_ms, 3),
+            'attributes': self.root.attributes,
+            'spans': [span.to_dict() for span in self.spans]
+        }
+
+
+# Innermost open span of the current context. Tasks and threads started from
+# it (graph nodes, asyncio.to_thread) inherit it, so their spans nest correctly.
+_current: ContextVar[Optional[Span]] = ContextVar('goblin_span', default=None)
+
+
+class _SpanScope:
+    """Context manager that opens a span on enter and ends it on exit."""
+
+    __slots__ = ('trace', 'name', 'attributes', 'span', 'token')
+
+    def __init__(self, trace: Trace, name: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        parent = _current.get()
+        self.span = Span(self.trace, self.name, parent.span_id if parent else None, self.attributes)
+        self.trace.spans.append(self.span)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.span.status = 'error'
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self.token)
+        return False
+
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def span(name: str, **attributes: Any):
+    """
+        Time a block as a child span of the current trace.
+
+        Outside a sampled trace this returns a shared null context, so
+        unsampled requests pay for one ContextVar lookup and nothing else.
+    """
+    parent = _current.get()
+    if parent is None:
+        return _NULL_SPAN
+    return _SpanScope(parent.trace, name, attributes)
+
+
+def traced(name: str):
+    """Record every call of an async function as a span of the current trace."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            parent = _current.get()
+            if parent is None:
+                return await func(*args, **kwargs)
+            with _SpanScope(parent.trace, name, {}):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Set an attribute on the current span, if tracing."""
+    current = _current.get()
+    if current is not None:
+        current.attributes[key] = value
+
+
+@contextlib.contextmanager
+def start_trace(name: str, force: bool = False, **attributes: Any):
+    """
+        Start a trace, subject to sampling.
+
+        Inside an existing trace this is an ordinary child span. Otherwise a
+        new trace is started with probability TRACE_SAMPLE_RATE (always when
+        force is set) and exported when the block exits.
+
+        Yields:
+            The root Span, or None when the trace was not sampled
+    """
+    parent = _current.get()
+    if parent is not None:
+        with _SpanScope(parent.trace, name, attributes) as child:
+            yield child
+        return
+
+    if not force and (TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE):
+        yield None
+        return
+
+    trace = Trace(name, attributes)
+    token = _current.set(trace.root)
+    metrics.increment("traces_sampled")
+    try:
+        yield trace.root
+    except BaseException as e:
+        trace.root.status = 'error'
+        trace.root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        trace.root.end_ns = time.time_ns()
+        _current.reset(token)
+        export(trace)
+
+
+# --- exporters ---
+
+_buffer: deque = deque(maxlen=TRACE_BUFFER_SIZE)
+_file_lock = threading.Lock()
+
+
+def export(trace: Trace) -> None:
+    """Hand a finished trace to the configured local exporters."""
+    if 'memory' in TRACE_EXPORTERS:
+        _buffer.append(trace)
+    if 'file' in TRACE_EXPORTERS:
+        try:
+            line = json.dumps(trace.to_dict(), default=str)
+            with _file_lock, open(TRACE_FILE, 'a') as f:
+                f.write(line + "\n")
+        except (OSError, TypeError, ValueError) as e:
+            print(f"trace export to {TRACE_FILE} failed : {e}")
+
+
+def recent_traces(limit: int = 50) -> List[Dict[str, Any]]:
+    """Summaries of the newest traces in the memory exporter."""
+    traces = list(_buffer)[-limit:][::-1]
+    return [
+        {key: value for key, value in trace.to_dict().items() if key != 'spans'} | {'span_count': len(trace.spans)}
+        for trace in traces
+    ]
+
+
+def get_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    for trace in reversed(_buffer):
+        if trace.trace_id == trace_id:
+            return trace.to_dict()
+    return None
+
+
+def clear() -> None:
+    """Drop buffered traces (used by benchmarks)."""
+    _buffer.clear()
+
+
+def configure_remote_export() -> bool:
+    """
+        Turn on LangChain's LangSmith tracing when the "langsmith" exporter
+        is selected and an API key is available. Call before LangChain runs.
+
+        Returns:
+            True if remote export is enabled
+    """
+    if 'langsmith' not in TRACE_EXPORTERS:
+        return False
+    if not (os.getenv('LANGSMITH_API_KEY') or os.getenv('LANGCHAIN_API_KEY')):
+        print("langsmith trace exporter selected but LANGSMITH_API_KEY is not set, remote export disabled")
+        return False
+
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "true")
+    os.environ.setdefault("LANGCHAIN_PROJECT", "Goblin Agent")
+    os.environ.setdefault("LANGSMITH_TRACING_SAMPLING_RATE", str(TRACE_SAMPLE_RATE))
+    return True
@@ -1,10 +1,41 @@
-from typing import Dict, Any
+import asyncio
+import os
+import time
+from typing import Dict, Any, List, Optional
 from langgraph.graph import StateGraph, START, END
+from src.workflows import metrics
 from src.workflows.state import AgentState, create_initial_state
+from src.workflows.tracing import start_trace, traced
 from src.Agents.data_collection_agent import data_collection_agent_node
+from src.Agents.peer_comparison_agent import peer_comparison_agent_node
 from src.Agents.technical_analysis_agent import technical_analysis_agent_node
 from src.Agents.news_intelligence_agent import news_intelligence_agent_node 
-from src.Agents.portfolio_manager_agent import protfolio_manager_agent_node
+from src.Agents.portfolio_manager_agent import MISSING_INPUT_PENALTY, missing_inputs, protfolio_manager_agent_node
+
+# Seconds an analysis may take end to end (0 = no deadline). Input stages
+# still running when it is near are cut off and marked missing, and the
+# portfolio manager decides on what arrived.
+ANALYSIS_DEADLINE_SECONDS = float(os.getenv('GOBLIN_ANALYSIS_DEADLINE', 20))
+
+# Part of the deadline kept for the portfolio manager's LLM call
+PORTFOLIO_RESERVE_SECONDS = float(os.getenv('GOBLIN_PORTFOLIO_RESERVE', 8))
+
+
+def check_deadline(deadline: float) -> None:
+    """
+        Raises:
+            ValueError: a deadline that leaves the input stages no time
+                        (negative, or not longer than the portfolio reserve)
+    """
+    if deadline < 0 or 0 < deadline <= PORTFOLIO_RESERVE_SECONDS:
+        raise ValueError(
+            f"Analysis deadline of {deadline:g}s must be 0 (none) or longer than "
+            f"the {PORTFOLIO_RESERVE_SECONDS:g}s portfolio reserve (GOBLIN_PORTFOLIO_RESERVE)"
+        )
+
+
+# Fail at startup rather than skip every stage of every analysis
+check_deadline(ANALYSIS_DEADLINE_SECONDS)
 
 def debug_state(state: AgentState, agent_name: str) -> AgentState:
     """Debug function to log state after each agent."""
@@ -21,6 +52,12 @@ def debug_state(state: AgentState, agent_name: str) -> AgentState:
         success = data_result.get('success', False)
         print(f"Data Collection {success}")
 
+    # Peer Comparison Results
+    peer_results = state.get('peer_comparison_results')
+    if peer_results and agent_name == "peer_comparison":
+        success = peer_results.get('success', False)
+        print(f"Peer Comparison {success} : {len(peer_results.get('peers', []))} peers")
+
     # Technical Analysis Results
     tech_results = state.get('technical_analysis_results')
     if tech_results and agent_name == "technical_analysis":
@@ -59,6 +96,12 @@ async def debug_data_collection_node(state: AgentState) -> AgentState:
     return debug_state(result, "data_collection")
 
 
+async def debug_peer_comparison_node(state: AgentState) -> AgentState:
+    """Peer comparison node with debug output"""
+    result = await peer_comparison_agent_node(state)
+    return debug_state(result, "peer_comparison")
+
+
 async def debug_technical_analysis_node(state: AgentState) -> AgentState:
     """Technnical analysis node with debug output"""
     result = await technical_analysis_agent_node(state)
@@ -77,6 +120,85 @@ async def debug_portfolio_manager_node(state: AgentState) -> AgentState:
     return debug_state(result, "portfolio_manager")
 
 
+def _missed_deadline(state: AgentState, stage: str) -> AgentState:
+    """Record a stage that did not finish before the deadline as missing."""
+    print(f"{stage} for {state['symbol']} missed the analysis deadline")
+    metrics.increment(f"stage_deadline_missed:{stage}")
+    result = {
+        'symbol': state['symbol'],
+        'success': False,
+        'missing': True,
+        'error': f"{stage} did not finish within the analysis deadline"
+    }
+    # Portfolio results are keyed by symbol
+    state[f"{stage}_results"] = {state['symbol']: result} if stage == 'portfolio_manager' else result
+    return state
+
+
+def with_deadline(stage: str, node, reserve: float = 0.0):
+    """
+        Run a node only until the state's deadline minus reserve seconds.
+
+        A node still running then is cancelled and its result replaced with
+        a missing marker; one starting after that point is skipped. Without
+        a deadline in the state the node runs unbounded.
+    """
+    async def run(state: AgentState) -> AgentState:
+        deadline = state.get('deadline')
+        if deadline is None:
+            return await node(state)
+        remaining = deadline - reserve - time.monotonic()
+        if remaining <= 0:
+            return _missed_deadline(state, stage)
+        try:
+            return await asyncio.wait_for(node(state), remaining)
+        except asyncio.TimeoutError:
+            return _missed_deadline(state, stage)
+
+    run.__name__ = getattr(node, '__name__', stage)
+    return run
+
+
+def branch(stage: str, node):
+    """
+        Run a node that shares a step with others: only its own result (and
+        an error, merged by the state's reducer) goes back to the graph, so
+        parallel nodes never write the same key.
+    """
+    async def run(state: AgentState) -> Dict[str, Any]:
+        result = await node(state)
+        update = {f"{stage}_results": result.get(f"{stage}_results")}
+        if result.get('error'):
+            update['error'] = result['error']
+        return update
+
+    run.__name__ = getattr(node, '__name__', stage)
+    return run
+
+
+_compiled_workflow = None
+
+def get_workflow():
+    """Return the compiled workflow, building it once per process."""
+    global _compiled_workflow
+    if _compiled_workflow is None:
+        _compiled_workflow = create_workflow()
+    return _compiled_workflow
+
+
+def warm_up() -> None:
+    """
+        Import the heavy libraries the tools and agents load lazily and compile
+        the graph, so the first analysis doesn't pay for them.
+    """
+    import ta.trend, ta.momentum, ta.volatility
+    import yfinance
+    import finnhub
+    import langchain_groq
+
+    get_workflow()
+
+
 def create_workflow() -> StateGraph:
     """
         create Langgraph workflow connecting all the agents
@@ -88,22 +210,35 @@ def create_workflow() -> StateGraph:
     workflow = StateGraph(AgentState)
 
     # Add nodes with debug output
-    workflow.add_node("data_collection", debug_data_collection_node)
-    workflow.add_node("technical_analysis", debug_technical_analysis_node)
-    workflow.add_node("news_intelligence", debug_news_intelligence_node)
-    workflow.add_node("portfolio_manager", debug_portfolio_manager_node)
+    # Input stages must leave the portfolio manager its reserve of the deadline
+    reserve = PORTFOLIO_RESERVE_SECONDS
+    workflow.add_node("data_collection", traced("node:data_collection")(with_deadline("data_collection", debug_data_collection_node, reserve)))
+    workflow.add_node("peer_comparison", traced("node:peer_comparison")(branch("peer_comparison", with_deadline("peer_comparison", debug_peer_comparison_node, reserve))))
+    workflow.add_node("technical_analysis", traced("node:technical_analysis")(branch("technical_analysis", with_deadline("technical_analysis", debug_technical_analysis_node, reserve))))
+    workflow.add_node("news_intelligence", traced("node:news_intelligence")(branch("news_intelligence", with_deadline("news_intelligence", debug_news_intelligence_node, reserve))))
+    workflow.add_node("portfolio_manager", traced("node:portfolio_manager")(with_deadline("portfolio_manager", debug_portfolio_manager_node)))
     
-    # Define linear flow
+    # Data collection first (peers and technicals use its financials and
+    # prices), then peers, technicals and news side by side; the portfolio
+    # manager waits for all three
     workflow.add_edge(START, "data_collection")
+    workflow.add_edge("data_collection", "peer_comparison")
     workflow.add_edge("data_collection", "technical_analysis")
-    workflow.add_edge("technical_analysis", "news_intelligence")
-    workflow.add_edge("news_intelligence", "portfolio_manager")
+    workflow.add_edge("data_collection", "news_intelligence")
+    workflow.add_edge(["peer_comparison", "technical_analysis", "news_intelligence"], "portfolio_manager")
     workflow.add_edge("portfolio_manager", END)
     
     return workflow.compile()
 
 
-async def run_analysis(symbol: str, analysis_date: str, session_id: str = 'default') -> Dict[str, Any]:
+async def run_analysis(
+        symbol: str,
+        analysis_date: str,
+        session_id: str = 'default',
+        indicators: Optional[List[Any]] = None,
+        timeframes: Optional[List[str]] = None,
+        deadline: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Run complete analysis workflow for symbol.
         
@@ -111,34 +246,50 @@ async def run_analysis(symbol: str, analysis_date: str, session_id: str = 'defau
             symbols: stock symbol to analyze
             session_id: Session identifier
             analysis_date: Date for analysis in YYYY-MM-DD format (optional, defaults to today)
+            indicators: Indicator requests such as ['SMA(50)', 'SMA(200)', 'RSI(7)'] (optional)
+            timeframes: Extra timeframes for the indicators, 'W' and/or 'M' (optional)
+            deadline: Seconds the analysis may take (default ANALYSIS_DEADLINE_SECONDS,
+                      0 for none, otherwise longer than PORTFOLIO_RESERVE_SECONDS)
             
         Returns:
-        Dict with analysis results
+        Dict with analysis results; missing_inputs lists the input stages
+        that failed or missed the deadline (success is False if all did)
     """
     try:
-        # create workflows
-        workflow = create_workflow()
+        # get compiled workflow
+        workflow = get_workflow()
 
         # intialize state with analysis date 
-        initial_state = create_initial_state(symbol, session_id, analysis_date)
+        initial_state = create_initial_state(symbol, session_id, analysis_date, indicators, timeframes)
+        deadline = ANALYSIS_DEADLINE_SECONDS if deadline is None else deadline
+        check_deadline(deadline)
+        if deadline:
+            initial_state['deadline'] = time.monotonic() + deadline
+
+        # Run workflow (traced when sampled)
+        with start_trace('run_analysis', symbol=symbol, analysis_date=analysis_date, session_id=session_id):
+            result = await workflow.ainvoke(initial_state)
 
-        # Run workflow
-        result = await workflow.ainvoke(initial_state)
+        # Without any of the inputs there is nothing to decide on
+        missing = missing_inputs(result)
+        unavailable = all(stage in missing for stage, penalty in MISSING_INPUT_PENALTY.items() if penalty)
 
         # extract result
         return {
-            'success': True,
+            'success': not unavailable,
             'session_id': session_id,
             'analysis_date': analysis_date,
             'symbol': symbol,
             'results': {
                 'data_collection': result.get('data_collection_results'),
+                'peer_comparison': result.get('peer_comparison_results'),
                 'technical_analysis': result.get('technical_analysis_results'),
                 'news_intelligence': result.get('news_intelligence_results'),
                 'portfolio_manager': result.get('portfolio_manager_results')
             },
+            'missing_inputs': missing,
             'final_step': result.get('current_step'),
-            'error': result.get('error')
+            'error': "No analysis inputs were available" if unavailable else result.get('error')
         }
 
     except Exception as e:
@@ -1,3 +1,7 @@
+// Give up on an analysis after this long; aborting closes the connection so the
+// server cancels the remaining work
+const REQUEST_TIMEOUT_MS = 120000;
+
 function escapeHtml(text) {
     const map = {
         '&': '&amp;',
@@ -62,6 +66,9 @@ async function sendMessage() {
 
     addLoadingIndicator();
 
+    const controller = new AbortController();
+    const timeoutId = setTimeout(() => controller.abort(), REQUEST_TIMEOUT_MS);
+
     try {
         const response = await fetch('/chat', {
             method: 'POST',
@@ -69,6 +76,7 @@ async function sendMessage() {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({ message }),
+            signal: controller.signal,
         });
 
         if (!response.ok) {
@@ -80,9 +88,14 @@ async function sendMessage() {
         addMessage(data.reply, false);
     } catch (error) {
         removeLoadingIndicator();
-        addMessage('Sorry, something went wrong. Please try again.', false);
+        if (error.name === 'AbortError') {
+            addMessage('The analysis took too long and was cancelled. Please try again.', false);
+        } else {
+            addMessage('Sorry, something went wrong. Please try again.', false);
+        }
         console.error('Error:', error);
     } finally {
+        clearTimeout(timeoutId);
         sendButton.disabled = false;
         messageInput.disabled = false;
         messageInput.focus();
@@ -0,0 +1,36 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.portfolio import allocation
+
+
+def returns(n=120, seed=1):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0005, 0.015, (n, 3))
+
+
+def test_allocate_keeps_buys_long():
+    result = allocation.allocate(['A', 'B', 'C'], returns(), np.array([1, 1, 0]), np.array([50, 60, 10]))
+    weights = {symbol: value['weight'] for symbol, value in result['symbols'].items()}
+    assert weights['A'] > 0 and weights['B'] > 0 and weights['C'] == 0
+
+
+@pytest.mark.parametrize('limits', [
+    {'target_volatility': -0.1}, {'target_volatility': 0}, {'target_volatility': float('nan')},
+    {'max_gross': 0}, {'max_gross': -1.0}
+])
+def test_allocate_rejects_non_positive_limits(limits):
+    with pytest.raises(ValueError):
+        allocation.allocate(['A', 'B', 'C'], returns(), np.array([1, 1, 0]), np.array([50, 60, 10]), **limits)
+
+
+@pytest.mark.parametrize('options', [{'lookback': 1}, {'lookback': 0}, {'target_volatility': -0.1}, {'max_gross': 0}])
+def test_build_portfolio_validates_before_fetching(monkeypatch, options):
+    async def load_histories(symbols, period):
+        raise AssertionError('fetched price history for invalid options')
+
+    monkeypatch.setattr(allocation, 'load_histories', load_histories)
+    with pytest.raises(ValueError):
+        asyncio.run(allocation.build_portfolio(['AAPL', 'MSFT'], signal_source='rules', **options))
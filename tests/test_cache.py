@@ -0,0 +1,42 @@
+import asyncio
+import os
+import stat
+import threading
+
+from src.tools import cache
+from src.tools.utils import ToolResult
+
+
+def test_state_files_default_to_a_private_directory(tmp_path):
+    assert cache.STATE_DIR == os.path.join(os.path.expanduser('~'), '.cache', 'goblin')
+    path = tmp_path / 'state' / 'nested' / 'state.sqlite3'
+    cache.SharedCache(str(path)).set('ns', 'key', {'a': 1}, 60)
+    assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o700
+    assert cache.SharedCache(str(path)).get('ns', 'key') == {'a': 1}
+
+
+def test_cached_tool_keeps_sqlite_off_the_event_loop(monkeypatch, tmp_path):
+    store = cache.SharedCache(str(tmp_path / 'state.sqlite3'))
+    monkeypatch.setattr(cache, '_cache', store)
+    threads = []
+    for method in ('get', 'set'):
+        original = getattr(cache.SharedCache, method)
+
+        def record(self, *args, original=original):
+            threads.append(threading.get_ident())
+            return original(self, *args)
+        monkeypatch.setattr(cache.SharedCache, method, record)
+
+    @cache.cached_tool('test_tool', 60)
+    async def tool(symbol):
+        return ToolResult(success=True, data={'symbol': symbol})
+
+    async def run():
+        first = await tool('AAPL')
+        second = await tool('AAPL')
+        return first, second, threading.get_ident()
+
+    first, second, loop_thread = asyncio.run(run())
+    assert first.data == second.data == {'symbol': 'AAPL'}
+    assert len(threads) == 3
+    assert loop_thread not in threads
@@ -0,0 +1,186 @@
+import asyncio
+import time
+
+import pytest
+
+from src.Agents import news_intelligence_agent, portfolio_manager_agent
+from src.Agents.portfolio_manager_agent import discount_for_missing, missing_inputs
+from src.tools.utils import ToolResult
+from src.workflows import analysis_cache, workflow
+
+FAILED = {'success': False, 'error': 'failed'}
+MISSED = {'success': False, 'missing': True, 'error': 'missed the deadline'}
+OK = {'success': True}
+
+
+def state(**results):
+    return {f"{stage}_results": result for stage, result in results.items()}
+
+
+def test_missing_inputs():
+    assert missing_inputs(state(data_collection=OK, technical_analysis=OK, news_intelligence=OK, peer_comparison=OK)) == []
+    assert missing_inputs(state(data_collection=OK, technical_analysis=FAILED, news_intelligence=MISSED)) == [
+        'technical_analysis', 'news_intelligence'
+    ]
+    # Peers are optional: only a missed deadline counts
+    assert missing_inputs(state(data_collection=OK, technical_analysis=OK, news_intelligence=OK, peer_comparison=FAILED)) == []
+    assert missing_inputs(state(data_collection=OK, technical_analysis=OK, news_intelligence=OK, peer_comparison=MISSED)) == [
+        'peer_comparison'
+    ]
+
+
+def test_discount_for_missing():
+    decision = {'trading_signal': 'BUY', 'confidence_level': 0.8, 'position_size': 60}
+    assert discount_for_missing(decision, []) is decision
+    assert discount_for_missing(decision, ['peer_comparison']) is decision
+    assert discount_for_missing(decision, ['news_intelligence']) == {'trading_signal': 'BUY', 'confidence_level': 0.6, 'position_size': 40}
+    assert discount_for_missing(decision, ['technical_analysis', 'news_intelligence', 'data_collection']) == {
+        'trading_signal': 'BUY', 'confidence_level': 0.3, 'position_size': 20
+    }
+
+
+def test_no_news_is_not_a_missing_input(monkeypatch):
+    async def no_articles(symbol, analysis_date):
+        return ToolResult(success=True, data={'news': [], 'total_count': 0})
+
+    monkeypatch.setattr(news_intelligence_agent, 'get_company_news', no_articles)
+    result = asyncio.run(news_intelligence_agent.analyze_news('xyz', '2025-01-02'))
+    assert result['success']
+    assert result['nlp_features'] == {'news_features': [], 'total_analyzed': 0}
+    assert missing_inputs(state(data_collection=OK, technical_analysis=OK, news_intelligence=result)) == []
+
+
+@pytest.mark.parametrize('deadline', [0, workflow.PORTFOLIO_RESERVE_SECONDS + 0.5, 60])
+def test_deadline_accepted(deadline):
+    workflow.check_deadline(deadline)
+
+
+@pytest.mark.parametrize('deadline', [-1, 1, workflow.PORTFOLIO_RESERVE_SECONDS])
+def test_deadline_within_the_reserve_is_rejected(deadline):
+    with pytest.raises(ValueError):
+        workflow.check_deadline(deadline)
+
+
+class FakeGraph:
+    def __init__(self, result):
+        self.result = result
+        self.states = []
+
+    async def ainvoke(self, initial_state):
+        self.states.append(initial_state)
+        return {**initial_state, **self.result}
+
+
+def test_run_analysis_rejects_a_deadline_within_the_reserve(monkeypatch):
+    graph = FakeGraph({})
+    monkeypatch.setattr(workflow, 'get_workflow', lambda: graph)
+    result = asyncio.run(workflow.run_analysis('AAPL', '2025-01-02', deadline=workflow.PORTFOLIO_RESERVE_SECONDS))
+    assert not result['success']
+    assert 'GOBLIN_PORTFOLIO_RESERVE' in result['error']
+    assert graph.states == []
+
+
+def test_run_analysis_fails_without_any_input(monkeypatch):
+    graph = FakeGraph(state(data_collection=MISSED, technical_analysis=MISSED, news_intelligence=FAILED, peer_comparison=MISSED))
+    monkeypatch.setattr(workflow, 'get_workflow', lambda: graph)
+    result = asyncio.run(workflow.run_analysis('AAPL', '2025-01-02', deadline=0))
+    assert not result['success']
+    assert result['missing_inputs'] == ['technical_analysis', 'data_collection', 'news_intelligence', 'peer_comparison']
+    assert 'deadline' not in graph.states[0]
+
+
+def test_run_analysis_succeeds_on_partial_inputs(monkeypatch):
+    graph = FakeGraph(state(data_collection=OK, technical_analysis=OK, news_intelligence=MISSED, peer_comparison=FAILED))
+    monkeypatch.setattr(workflow, 'get_workflow', lambda: graph)
+    result = asyncio.run(workflow.run_analysis('AAPL', '2025-01-02', deadline=workflow.PORTFOLIO_RESERVE_SECONDS + 5))
+    assert result['success']
+    assert result['missing_inputs'] == ['news_intelligence']
+    assert 'deadline' in graph.states[0]
+
+
+def test_get_or_run_analysis_passes_the_deadline(monkeypatch):
+    calls = []
+
+    async def run_analysis(symbol, analysis_date, session_id, indicators, timeframes, deadline):
+        calls.append(deadline)
+        return {'success': True, 'symbol': symbol}
+
+    monkeypatch.setattr(workflow, 'run_analysis', run_analysis)
+    monkeypatch.setattr(analysis_cache, 'store_analysis', lambda *args, **kwargs: None)
+    asyncio.run(analysis_cache.get_or_run_analysis('AAPL', '2025-01-02', 'test', refresh=True, deadline=0))
+    assert calls == [0]
+
+
+def test_signal_without_missing_inputs_given(monkeypatch):
+    prompts = []
+
+    async def decide(prompt_values):
+        prompts.append(prompt_values)
+        return {'trading_signal': 'BUY', 'confidence_level': 0.8, 'position_size': 60}
+
+    async def run_stage(stage, symbol, input_fingerprint, compute):
+        return await compute()
+
+    monkeypatch.setattr(portfolio_manager_agent, 'groq_configured', lambda: True)
+    monkeypatch.setattr(portfolio_manager_agent, '_decide_trading_signal', decide)
+    monkeypatch.setattr(portfolio_manager_agent, 'run_stage', run_stage)
+    tech = {'success': True, 'indicators': {'current_price': 100.0, 'technical_indicators': {}}}
+    decision = asyncio.run(portfolio_manager_agent.generate_trading_signal_with_prompts('AAPL', tech, None, None, '2025-01-02'))
+    assert decision == {'trading_signal': 'BUY', 'confidence_level': 0.8, 'position_size': 60}
+    assert prompts[0]['missing_inputs'] == 'none'
+
+
+def node_state(seconds_left):
+    return {'symbol': 'AAPL', 'deadline': time.monotonic() + seconds_left}
+
+
+def test_with_deadline_cancels_a_slow_node():
+    events = []
+
+    async def slow_node(state):
+        events.append('started')
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            events.append('cancelled')
+            raise
+        state['news_intelligence_results'] = {'success': True}
+        return state
+
+    node = workflow.with_deadline('news_intelligence', slow_node, reserve=0.2)
+    started = time.monotonic()
+    state = asyncio.run(node(node_state(0.3)))
+    assert time.monotonic() - started < 1
+    assert events == ['started', 'cancelled']
+    result = state['news_intelligence_results']
+    assert result['missing'] and not result['success']
+    assert missing_inputs(state) == ['technical_analysis', 'data_collection', 'news_intelligence']
+
+
+def test_with_deadline_skips_a_node_past_the_cutoff():
+    async def node_fn(state):
+        raise AssertionError('node ran after its cutoff')
+
+    node = workflow.with_deadline('peer_comparison', node_fn, reserve=1.0)
+    state = asyncio.run(node(node_state(0.5)))
+    assert state['peer_comparison_results']['missing']
+
+
+def test_with_deadline_marks_a_missed_portfolio_decision_per_symbol():
+    async def slow_node(state):
+        await asyncio.sleep(5)
+
+    node = workflow.with_deadline('portfolio_manager', slow_node)
+    state = asyncio.run(node(node_state(0.05)))
+    assert state['portfolio_manager_results']['AAPL']['missing']
+
+
+def test_with_deadline_leaves_fast_and_unbounded_nodes_alone():
+    async def fast_node(state):
+        await asyncio.sleep(0.01)
+        state['technical_analysis_results'] = {'success': True}
+        return state
+
+    node = workflow.with_deadline('technical_analysis', fast_node, reserve=0.1)
+    assert asyncio.run(node(node_state(2)))['technical_analysis_results'] == {'success': True}
+    assert asyncio.run(node({'symbol': 'AAPL'}))['technical_analysis_results'] == {'success': True}
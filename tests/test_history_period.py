@@ -0,0 +1,47 @@
+from src.Agents.data_collection_agent import history_period_for_request
+from src.tools.indicator_registry import TIMEFRAMES, parse_indicator_request, required_bars
+from src.tools.technical_indicator_tool import DEFAULT_INDICATORS
+from src.tools.yfinance_tool import HISTORY_PERIODS
+
+
+def trading_days(period):
+    return dict(HISTORY_PERIODS).get(period, float('inf'))
+
+
+def default_bars(timeframe):
+    return required_bars([parse_indicator_request(name) for name in DEFAULT_INDICATORS], [timeframe])
+
+
+def test_daily_defaults_keep_three_months():
+    assert history_period_for_request(None, None) == '3mo'
+    assert history_period_for_request([], ['D']) == '3mo'
+
+
+def test_timeframes_scale_without_extra_indicators():
+    for timeframes in (['W'], ['M'], ['D', 'W']):
+        period = history_period_for_request(None, timeframes)
+        scale = max(TIMEFRAMES[tf] for tf in timeframes)
+        assert trading_days(period) >= default_bars('D') * scale, (timeframes, period)
+
+
+def test_defaults_count_towards_lookback():
+    # MACD (35 bars) needs more history than a short extra SMA; weekly MACD needs 175
+    period = history_period_for_request(['SMA(5)'], ['W'])
+    assert trading_days(period) >= default_bars('W')
+
+
+def test_extra_indicators_extend_lookback():
+    assert trading_days(history_period_for_request(['SMA(200)'], None)) >= 200
+    assert trading_days(history_period_for_request(['SMA(200)'], ['W'])) >= 1000
+
+
+def test_invalid_requests_are_ignored():
+    assert history_period_for_request(['NOPE(3)'], None) == '3mo'
+
+
+def test_unknown_timeframes_are_skipped():
+    requests = [parse_indicator_request(name) for name in DEFAULT_INDICATORS]
+    assert required_bars(requests, ['w', 'Y']) == required_bars(requests, ['D'])
+    assert required_bars(requests, ['w', 'M']) == required_bars(requests, ['M'])
+    assert history_period_for_request(None, 'w') == '3mo'
+    assert history_period_for_request(['SMA(50)'], ['bogus', 'W']) == history_period_for_request(['SMA(50)'], ['W'])
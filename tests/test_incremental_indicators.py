@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools.bars import PriceBars
+from src.tools.incremental_indicators import LIVE_INDICATORS, IncrementalIndicators
+from src.tools.technical_indicator_tool import compute_technical_indicators
+
+
+def price_data(n, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.5, n))
+    high = close + rng.uniform(0.1, 2.0, n)
+    low = close - rng.uniform(0.1, 2.0, n)
+    return pd.DataFrame(
+        {'Open': close + rng.normal(0, 0.5, n), 'High': high, 'Low': low, 'Close': close, 'Volume': rng.uniform(1e5, 1e6, n)},
+        index=pd.date_range('2024-01-01', periods=n, freq='B')
+    )
+
+
+def batch_latest(df):
+    """Last values from the registry, in IncrementalIndicators' shape ([x] -> x, [] -> None)."""
+    result = compute_technical_indicators(df, 'TEST', '2024-06-28', LIVE_INDICATORS)
+    assert result.success
+    latest = lambda value: value[-1] if value else None
+    return {
+        name: {line: latest(series) for line, series in value.items()} if isinstance(value, dict) else latest(value)
+        for name, value in result.data['technical_indicators'].items()
+    }
+
+
+def assert_matches(incremental, batch):
+    assert set(incremental) == set(batch)
+    for name, value in batch.items():
+        if isinstance(value, dict):
+            for line, expected in value.items():
+                assert incremental[name][line] == pytest.approx(expected, abs=2e-4), (name, line)
+        else:
+            assert incremental[name] == pytest.approx(value, abs=2e-4), name
+
+
+@pytest.mark.parametrize('n', [5, 20, 30, 40, 250])
+def test_matches_batch_registry(n):
+    df = price_data(n)
+    state = IncrementalIndicators.from_bars(PriceBars.from_dataframe(df))
+    assert state.bars == n
+    assert_matches(state.latest(), batch_latest(df))
+
+
+def test_update_bar_by_bar_matches_batch():
+    df = price_data(80, seed=11)
+    state = IncrementalIndicators.from_bars(PriceBars.from_dataframe(df[:60]))
+    for i in range(60, 80):
+        row = df.iloc[i]
+        values = state.update(row['High'], row['Low'], row['Close'])
+        assert_matches(values, batch_latest(df[:i + 1]))
+
+
+def test_preview_leaves_state_unchanged():
+    df = price_data(61, seed=3)
+    state = IncrementalIndicators.from_bars(PriceBars.from_dataframe(df[:60]))
+    before = state.latest()
+    row = df.iloc[60]
+
+    preview = state.preview(row['High'], row['Low'], row['Close'])
+    assert state.bars == 60
+    assert state.latest() == before
+    assert_matches(preview, batch_latest(df))
+    assert state.update(row['High'], row['Low'], row['Close']) == preview
+
+
+def test_warming_up_values_are_none():
+    state = IncrementalIndicators.from_bars(PriceBars.from_dataframe(price_data(10)))
+    values = state.latest()
+    assert values['SMA'] is None and values['EMA'] is None and values['CCI'] is None
+    assert values['MACD'] == {'macd': None, 'signal': None, 'histogram': None}
+    assert values['BBANDS'] == {'upper': None, 'middle': None, 'lower': None}
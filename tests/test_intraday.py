@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from src.tools.bars import COLUMNS, PriceBars
+from src.tools.intraday import BarRing, IntradayStore, interval_seconds, roll_up
+
+# 2024-01-02 09:30 as epoch seconds
+OPEN = 1704187800
+
+
+def minute_bars(n, start=OPEN, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.2, n))
+    values = np.vstack([
+        close + rng.normal(0, 0.05, n),
+        close + rng.uniform(0.01, 0.3, n),
+        close - rng.uniform(0.01, 0.3, n),
+        close,
+        rng.integers(100, 10_000, n).astype(float)
+    ])
+    return PriceBars(values, start + 60 * np.arange(n))
+
+
+def test_ring_keeps_the_newest_bars_after_wrapping():
+    bars = minute_bars(23)
+    ring = BarRing(capacity=5)
+    assert ring.extend(bars) == 23
+    assert ring.count == 5
+    assert ring.last_timestamp == bars.timestamps[-1]
+
+    newest = ring.bars()
+    np.testing.assert_array_equal(newest.timestamps, bars.timestamps[-5:])
+    np.testing.assert_array_equal(newest.values, bars.values[:, -5:])
+    np.testing.assert_array_equal(ring.bars(limit=2).timestamps, bars.timestamps[-2:])
+
+
+@pytest.mark.parametrize('n', range(1, 12))
+def test_ring_contents_at_every_wrap_position(n):
+    bars = minute_bars(n)
+    ring = BarRing(capacity=4)
+    for i in range(n):
+        ring.append(int(bars.timestamps[i]), bars.values[:, i])
+    np.testing.assert_array_equal(ring.bars().timestamps, bars.timestamps[-4:])
+    np.testing.assert_array_equal(ring.bars().values, bars.values[:, -4:])
+
+
+def test_ring_bars_are_a_view():
+    ring = BarRing(capacity=4)
+    ring.extend(minute_bars(6))
+    assert np.shares_memory(ring.bars().values, ring._buffer.values)
+    assert ring.nbytes == 2 * 4 * (len(COLUMNS) + 1) * 8
+
+
+def test_ring_updates_the_forming_bar_and_ignores_older_ones():
+    bars = minute_bars(6)
+    ring = BarRing(capacity=4)
+    ring.extend(bars)
+
+    row = np.array([1.0, 2.0, 0.5, 1.5, 42.0])
+    assert ring.append(int(bars.timestamps[-1]), row)
+    assert ring.count == 4
+    np.testing.assert_array_equal(ring.bars().values[:, -1], row)
+
+    assert not ring.append(int(bars.timestamps[-2]), row * 2)
+    np.testing.assert_array_equal(ring.bars().timestamps, bars.timestamps[-4:])
+
+    # Re-ingesting an overlapping fetch only adds what is new
+    assert ring.extend(minute_bars(8)) == 3
+    assert ring.last_timestamp == OPEN + 7 * 60
+
+
+def test_empty_ring():
+    ring = BarRing(capacity=3)
+    assert ring.last_timestamp is None
+    assert len(ring.bars()) == 0
+    ring.extend(minute_bars(2))
+    ring.clear()
+    assert ring.count == 0 and len(ring.bars()) == 0
+
+
+@pytest.mark.parametrize('interval', ['5m', '15m', '1h'])
+def test_roll_up_matches_pandas_resample(interval):
+    # Start mid-bucket, so the first and last buckets are partial
+    bars = minute_bars(137, start=OPEN + 120)
+    rolled = roll_up(bars, interval_seconds(interval))
+
+    df = bars.to_dataframe()
+    expected = df.resample(interval.replace('m', 'min'), label='left', closed='left').agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    ).dropna()
+    np.testing.assert_array_equal(rolled.timestamps, expected.index.values.astype('datetime64[s]').astype(np.int64))
+    np.testing.assert_allclose(rolled.values, expected[list(COLUMNS)].to_numpy().T)
+
+
+def test_store_rolls_up_and_evicts_least_recently_used():
+    store = IntradayStore(capacity=30, max_symbols=2)
+    store.ingest('aapl', minute_bars(40))
+    store.ingest('MSFT', minute_bars(10))
+    assert len(store.bars('AAPL')) == 30
+    assert len(store.bars('AAPL', '5m')) == 6
+    assert len(store.bars('AAPL', '5m', limit=2)) == 2
+    with pytest.raises(ValueError):
+        store.bars('AAPL', '90s')
+
+    store.ingest('AAPL', minute_bars(41))
+    store.ingest('NVDA', minute_bars(3))
+    assert store.symbols() == ['AAPL', 'NVDA']
+    assert store.bars('MSFT') is None
+    assert len(store.bars('NVDA')) == 3
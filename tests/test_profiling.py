@@ -0,0 +1,32 @@
+import importlib
+
+from src.workflows import profiling
+
+
+def test_profiling_off_by_default(monkeypatch):
+    monkeypatch.delenv('GOBLIN_PROFILING', raising=False)
+    monkeypatch.delenv('GOBLIN_PROFILE_TOKEN', raising=False)
+    default = importlib.reload(profiling)
+    try:
+        assert not default.PROFILING_ENABLED
+        assert not default.authorized('1')
+    finally:
+        monkeypatch.undo()
+        importlib.reload(profiling)
+
+
+def test_flag_when_enabled(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', '')
+    assert profiling.authorized('1')
+    assert not profiling.authorized('0')
+    assert not profiling.authorized('')
+    assert not profiling.authorized(None)
+
+
+def test_token_required_when_configured(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 's3cret')
+    assert profiling.authorized('s3cret')
+    assert not profiling.authorized('1')
+    assert not profiling.authorized('s3cre')
@@ -0,0 +1,47 @@
+import os
+
+from src.tools import replay
+
+
+def configure(monkeypatch, tmp_path, mode):
+    monkeypatch.setattr(replay, 'REPLAY_MODE', mode)
+    monkeypatch.setattr(replay, 'FIXTURES_DIR', str(tmp_path))
+    monkeypatch.setattr(replay, 'REPLAY_DATE', None)
+
+
+def test_recording_pins_the_analysis_date(monkeypatch, tmp_path):
+    configure(monkeypatch, tmp_path, 'record')
+    recorded = replay.analysis_date()
+    (tmp_path / 'analysis_date').write_text('2025-06-30')
+    assert replay.analysis_date() == '2025-06-30'
+    assert recorded
+
+    configure(monkeypatch, tmp_path, 'replay')
+    assert replay.analysis_date() == '2025-06-30'
+
+
+def test_replay_date_override(monkeypatch, tmp_path):
+    configure(monkeypatch, tmp_path, 'replay')
+    monkeypatch.setattr(replay, 'REPLAY_DATE', '2024-01-02')
+    assert replay.analysis_date() == '2024-01-02'
+
+
+def test_live_mode_uses_today(monkeypatch, tmp_path):
+    configure(monkeypatch, tmp_path, 'off')
+    (tmp_path / 'analysis_date').write_text('2025-06-30')
+    assert replay.analysis_date() != '2025-06-30'
+
+
+def test_state_is_emptied_once_per_process(monkeypatch, tmp_path):
+    configure(monkeypatch, tmp_path, 'replay')
+    monkeypatch.setattr(replay, '_state_reset', False)
+    stale = tmp_path / 'state' / 'replay' / 'news.sqlite3'
+    stale.parent.mkdir(parents=True)
+    stale.write_text('from an earlier run')
+
+    path = replay.state_path('news.sqlite3')
+    assert path == str(stale) and not os.path.exists(path)
+
+    stale.write_text('this run')
+    replay.state_path('fundamentals.sqlite3')
+    assert stale.read_text() == 'this run'
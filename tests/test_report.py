@@ -0,0 +1,66 @@
+from src.workflows.report import build_analysis, render_text
+
+
+def result_with(data_collection=None, news_intelligence=None):
+    results = {}
+    if data_collection is not None:
+        results['data_collection'] = {'success': True, **data_collection}
+    if news_intelligence is not None:
+        results['news_intelligence'] = {'success': True, **news_intelligence}
+    return {'symbol': 'AAPL', 'analysis_date': '2025-01-02', 'success': True, 'results': results}
+
+
+def test_non_numeric_metrics_are_nulled():
+    result = result_with(data_collection={
+        'basic_financials': {
+            'metrics': {
+                'peBasicExclExtraTTM': 'NM',
+                'pbAnnual': '12.5',
+                'roeRfy': None,
+                'roaRfy': float('nan'),
+                'currentRatioAnnual': [1.2],
+                'epsBasicExclExtraItemsTTM': 6.1
+            },
+            'updated': 20250101
+        },
+        'company_info': {'name': 'Apple', 'market_cap': 'N/A'}
+    })
+    analysis = build_analysis(result)
+    fundamentals = analysis.fundamentals
+    assert fundamentals.pe_ratio is None
+    assert fundamentals.pb_ratio == 12.5
+    assert fundamentals.roe is None and fundamentals.roa is None
+    assert fundamentals.current_ratio is None
+    assert fundamentals.eps == 6.1
+    assert fundamentals.updated == '20250101'
+    assert analysis.company.market_cap is None
+    assert 'P/E Ratio:          N/A' in render_text(analysis)
+
+
+def test_llm_article_fields_of_the_wrong_type():
+    result = result_with(news_intelligence={
+        'total_news': 4,
+        'nlp_features': {
+            'total_analyzed': 3,
+            'news_features': [
+                {'headline': 'Apple beats', 'published_date': 20250101, 'impact': 3,
+                 'sentiment': 'positive', 'key_points': 'one point', 'relevance': 0.9},
+                {'headline': None, 'source': ['Reuters'], 'key_points': 7, 'category': 1.5},
+                'not an article'
+            ]
+        }
+    })
+    analysis = build_analysis(result)
+    first, second = analysis.news.articles
+    assert first.published_date == '20250101'
+    assert first.impact == '3'
+    assert first.key_points == ['one point']
+    assert first.model_extra == {'relevance': 0.9}
+    assert second.headline is None
+    assert second.source == "['Reuters']"
+    assert second.key_points == ['7']
+    assert second.category == '1.5'
+
+    text = render_text(analysis)
+    assert 'Article 1:  POSITIVE' in text
+    assert 'Article 2:  NEUTRAL' in text
@@ -0,0 +1,20 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# Loaded on first use (analysis, live feed, /intraday, /portfolio), never at startup
+HEAVY_MODULES = ('numpy', 'pandas', 'langgraph', 'langchain_groq')
+
+
+def test_import_main_stays_light():
+    code = (
+        "import sys, main; "
+        f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, '-c', code], cwd=Path(__file__).resolve().parents[1],
+        capture_output=True, text=True, timeout=120
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    loaded = proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else ''
+    assert loaded == '', f"import main loaded {loaded}"
@@ -0,0 +1,111 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from src.tools.structured_output import OutputField, OutputSchema, invoke_structured, parse_json_object
+from src.workflows import metrics
+
+SCHEMA = OutputSchema('test_schema', (
+    OutputField('headline', 'string'),
+    OutputField('key_points', 'array'),
+    OutputField('sentiment', 'string', enum=('positive', 'negative', 'neutral')),
+    OutputField('source', 'string', required=False)
+))
+
+
+class FakeLLM:
+    """Chat model stand-in answering with canned replies, in order."""
+
+    model_name = 'fake-model'
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+        self.bound = None
+
+    def bind(self, **kwargs):
+        self.bound = kwargs
+        return self
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls.append(messages)
+        return AIMessage(content=self.replies.pop(0))
+
+
+def test_strict_json():
+    assert parse_json_object('{"a": 1, "b": [true, null]}') == ({'a': 1, 'b': [True, None]}, 'ok')
+
+
+def test_code_fences():
+    reply = 'Here you go:\n```json\n{"sentiment": "positive", "impact": "high"}\n```\nAnything else?'
+    assert parse_json_object(reply) == ({'sentiment': 'positive', 'impact': 'high'}, 'ok')
+    assert parse_json_object('```\n{"a": 1}\n```')[0] == {'a': 1}
+
+
+def test_single_quotes_and_python_literals():
+    data, status = parse_json_object("{'headline': 'It\\'s up', 'hot': True, 'note': None}")
+    assert status == 'repaired'
+    assert data == {'headline': "It's up", 'hot': True, 'note': None}
+
+
+def test_trailing_and_missing_commas():
+    data, status = parse_json_object('{"a": 1, "b": [1, 2,], "c": "x",}')
+    assert (data, status) == ({'a': 1, 'b': [1, 2], 'c': 'x'}, 'repaired')
+    assert parse_json_object('{"a": 1 "b": 2}')[0] == {'a': 1, 'b': 2}
+
+
+def test_truncated_output_keeps_complete_members():
+    data, status = parse_json_object('```json\n{"headline": "Beat", "key_points": ["one", "tw')
+    assert status == 'repaired'
+    assert data == {'headline': 'Beat', 'key_points': ['one']}
+
+    # A value cut off mid-way is dropped, not guessed
+    assert parse_json_object('{"headline": "Beat", "sentiment": "posi')[0] == {'headline': 'Beat'}
+
+
+def test_no_object():
+    assert parse_json_object('I cannot answer that.') == (None, 'failed')
+    assert parse_json_object('') == (None, 'failed')
+
+
+def test_schema_missing_and_normalize():
+    data = OutputSchema.normalize({'Headline': 'x', 'Key Points': [], 'sentiment': 'bullish'})
+    assert data == {'headline': 'x', 'key_points': [], 'sentiment': 'bullish'}
+    assert [field.name for field in SCHEMA.missing(data)] == ['sentiment']
+
+
+def test_complete_reply_needs_no_reask():
+    llm = FakeLLM('{"headline": "Beat", "key_points": ["a"], "sentiment": "Positive"}')
+    data = asyncio.run(invoke_structured(llm, 'prompt', SCHEMA))
+    assert data == {'headline': 'Beat', 'key_points': ['a'], 'sentiment': 'Positive'}
+    assert len(llm.calls) == 1
+    assert llm.bound == {'response_format': {'type': 'json_object'}}
+
+
+def test_reask_merges_only_the_missing_fields():
+    metrics.reset()
+    llm = FakeLLM(
+        '{"headline": "Beat", "source": "Reuters", "sentiment": "great", "key_points": ["a", "b"',
+        '{"sentiment": "positive", "headline": "Changed", "key_points": "not a list"}'
+    )
+    data = asyncio.run(invoke_structured(llm, 'prompt', SCHEMA))
+
+    # key_points survived the truncation; only the invalid sentiment was re-asked
+    assert data == {'headline': 'Beat', 'source': 'Reuters', 'sentiment': 'positive', 'key_points': ['a', 'b']}
+    assert len(llm.calls) == 2
+    followup = llm.calls[1]
+    assert followup[1].content.startswith('{"headline": "Beat"')
+    assert '"sentiment" (one of positive, negative, neutral)' in followup[2].content
+    assert 'headline' not in followup[2].content
+
+    counters = metrics.snapshot()
+    assert counters['structured_parse:test_schema:repaired'] == 1
+    assert counters['structured_reask:test_schema'] == 1
+    assert counters['structured_reask_recovered:test_schema'] == 1
+
+
+def test_still_missing_after_reask():
+    metrics.reset()
+    llm = FakeLLM('{"headline": "Beat"}', 'Sorry, no.')
+    assert asyncio.run(invoke_structured(llm, 'prompt', SCHEMA)) is None
+    assert metrics.snapshot()['structured_failed:test_schema'] == 1